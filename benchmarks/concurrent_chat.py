@@ -0,0 +1,60 @@
+"""
+Concurrency benchmark for the /chat endpoint.
+
+Fires N chat requests at a running server at the same time and compares the
+wall-clock time against the per-request latencies. With a non-blocking server
+the wall time should be close to max(latency); a server that blocks its event
+loop on every LLM call shows a wall time close to sum(latency).
+
+Usage:
+    uv run python server.py                      # in another terminal
+    uv run python benchmarks/concurrent_chat.py --n 8
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+QUESTIONS = [
+    "Explain gradient descent in one paragraph.",
+    "What is the difference between TCP and UDP?",
+    "Give me a short definition of entropy.",
+    "What does a hash table do?",
+]
+
+
+async def timed_chat(client: httpx.AsyncClient, url: str, message: str) -> float:
+    start = time.perf_counter()
+    response = await client.post(f"{url}/chat", json={"message": message, "history": []})
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def run(url: str, n: int):
+    async with httpx.AsyncClient(timeout=None) as client:
+        # Also check that a trivial endpoint stays responsive while chats run
+        async def ping_latency() -> float:
+            await asyncio.sleep(0.5)
+            start = time.perf_counter()
+            await client.get(f"{url}/")
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        chats = [timed_chat(client, url, QUESTIONS[i % len(QUESTIONS)]) for i in range(n)]
+        *latencies, ping = await asyncio.gather(*chats, ping_latency())
+        wall = time.perf_counter() - start
+
+    print(f"📊 {n} parallel chats against {url}")
+    print(f"   max(latency):  {max(latencies):7.2f} s")
+    print(f"   sum(latency):  {sum(latencies):7.2f} s")
+    print(f"   wall clock:    {wall:7.2f} s  (wall / max = {wall / max(latencies):.2f})")
+    print(f"   GET / during load: {ping * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--n", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.n))
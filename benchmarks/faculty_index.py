@@ -0,0 +1,113 @@
+"""
+Microbenchmark: faculty vector search through Chroma vs the in-memory NumPy matrix.
+
+Both backends answer the same queries from the same faculty_rag_collection.
+Query embeddings are computed once up front, so only the search itself is
+timed (Chroma's SQLite/HNSW query path vs one matrix-vector product plus
+argpartition). Also checks that both return the same top-k ids: the matrix
+search is exact, Chroma's HNSW is approximate, so they can differ on larger
+corpora.
+
+--fake-embeddings builds a temporary index with random vectors (no Ollama
+needed); --copies N repeats the corpus N times to see how it scales.
+
+Usage:
+    uv run python benchmarks/faculty_index.py --k 20 150
+    uv run python benchmarks/faculty_index.py --fake-embeddings --copies 10
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils import vector_store  # noqa: E402
+from src.utils.faculty_index import MatrixIndex  # noqa: E402
+
+
+def unit_fake_embeddings(size: int = 768):
+    """Random but deterministic unit vectors (real embedding models return normalized vectors too)."""
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    class UnitFakeEmbedding(DeterministicFakeEmbedding):
+        def _get_embedding(self, seed: int) -> list:
+            vector = np.asarray(super()._get_embedding(seed))
+            return list(vector / np.linalg.norm(vector))
+
+    return UnitFakeEmbedding(size=size)
+
+
+def timed(fn, vectors, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for vector in vectors:
+            fn(vector)
+    return (time.perf_counter() - start) / (repeat * len(vectors)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", default="data/faculty_queries.json")
+    parser.add_argument("--k", type=int, nargs="+", default=[20, 150])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--fake-embeddings", action="store_true")
+    parser.add_argument("--copies", type=int, default=1, help="index the corpus N times (fake embeddings only)")
+    args = parser.parse_args()
+
+    if args.fake_embeddings:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        vector_store.DB_PATH_FACULTY = tempfile.mkdtemp(prefix="faculty_bench_")
+        vector_store._embeddings = unit_fake_embeddings()
+        # TokenTextSplitter downloads a tokenizer; ~4 chars per token is close enough here
+        vector_store.TokenTextSplitter = lambda chunk_size, chunk_overlap: RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size * 4, chunk_overlap=chunk_overlap * 4
+        )
+        vector_store.index_professors_to_chroma()
+        store = vector_store.get_vector_store("faculty")
+        base = store.get()
+        for copy in range(1, args.copies):
+            store.add_texts(
+                [f"{text} ({copy})" for text in base["documents"]],
+                metadatas=base["metadatas"],
+                ids=[f"{doc_id}-{copy}" for doc_id in base["ids"]],
+            )
+    else:
+        vector_store.index_professors_to_chroma()
+
+    store = vector_store.get_vector_store("faculty")
+    start = time.perf_counter()
+    index = MatrixIndex.from_chroma(store)
+    load_ms = (time.perf_counter() - start) * 1000
+    half = MatrixIndex.from_chroma(store, dtype="float16")
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = [item["query"] for item in json.load(f)]
+    vectors = store.embeddings.embed_documents(queries)
+
+    print(f"Corpus: {len(index)} chunks x {index.matrix.shape[1]} dims, "
+          f"{index.matrix.nbytes / 1024:.0f} KB float32 / {half.matrix.nbytes / 1024:.0f} KB float16, "
+          f"loaded in {load_ms:.0f}ms")
+    print(f"Queries: {len(queries)} x {args.repeat} repeats\n")
+    print(f"{'k':>4} | {'chroma ms':>9} | {'numpy ms':>8} | {'fp16 ms':>7} | {'speedup':>7} | {'same top-k':>10}")
+    print("-" * 62)
+
+    for k in args.k:
+        chroma = timed(lambda v: store.similarity_search_by_vector_with_relevance_scores(v, k=k), vectors, args.repeat)
+        numpy_ms = timed(lambda v: index.search_vector(v, k), vectors, args.repeat)
+        fp16_ms = timed(lambda v: half.search_vector(v, k), vectors, args.repeat)
+
+        same = 0
+        for vector in vectors:
+            chroma_ids = {doc.id for doc, _ in store.similarity_search_by_vector_with_relevance_scores(vector, k=k)}
+            same += chroma_ids == {doc.id for doc, _ in index.search_vector(vector, k)}
+        print(f"{k:>4} | {chroma:>9.2f} | {numpy_ms:>8.3f} | {fp16_ms:>7.3f} | {chroma / numpy_ms:>6.0f}x | "
+              f"{same / len(vectors):>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
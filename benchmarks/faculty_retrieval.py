@@ -0,0 +1,122 @@
+"""
+Benchmark: professor retrieval for the advisor, vector-only vs hybrid (BM25 + vector, RRF).
+
+Each query in data/faculty_queries.json names the professor(s) a student
+expects. For every mode it prints recall@5 (expected professor among the
+top 5 distinct professors), MRR, the number of chunks fetched from Chroma
+and the average latency. The old advisor path (k=150 raw chunks) is shown
+as a baseline, BM25 alone as a reference.
+
+Recall is also reported separately for the "paraphrase" queries, which share
+no token with the expected professors' name/lab/profile text (topic-level
+wording such as "medical ultrasound imaging research"). Queries that quote a
+lab name are easy for BM25 by construction; only the paraphrases tell
+whether the embeddings help.
+
+Needs the faculty index (chroma_db_faculty) and Ollama for query embeddings.
+--fake-embeddings indexes into a temporary folder with deterministic random
+vectors instead: the vector side is then meaningless, so only latency and
+the lexical contribution are representative.
+
+Usage:
+    uv run python benchmarks/faculty_retrieval.py
+    uv run python benchmarks/faculty_retrieval.py --fake-embeddings
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils import vector_store  # noqa: E402
+from src.utils import faculty_search  # noqa: E402
+from src.utils.bm25 import tokenize  # noqa: E402
+
+
+async def old_path(query: str, top_n: int) -> list:
+    """Previous advisor retrieval: 150 raw chunks, professors in order of first appearance."""
+    docs = await vector_store.get_vector_store("faculty").asimilarity_search(query, k=150)
+    names = []
+    for doc in docs:
+        name = doc.metadata.get("name", "Unknown")
+        if name not in names:
+            names.append(name)
+    return names[:top_n]
+
+
+async def lexical_only(query: str, top_n: int) -> list:
+    return [name for name, _ in faculty_search.lexical_search(query, top_n)]
+
+
+def is_paraphrase(item: dict) -> bool:
+    """True if the query shares no token with any expected professor's indexed text."""
+    professors = faculty_search.load_professors()
+    query_tokens = set(tokenize(item["query"]))
+    return not any(
+        query_tokens & set(tokenize(faculty_search.professor_text(professors.get(name, {}))))
+        for name in item["expected"]
+    )
+
+
+async def run(queries: list, top_n: int, k: int):
+    modes = [
+        ("vector k=150 (old)", 150, lambda q: old_path(q, top_n)),
+        (f"vector k={k}", k, lambda q: faculty_search.search_professors(q, top_n, mode="vector", k=k)),
+        ("lexical (BM25)", 0, lambda q: lexical_only(q, top_n)),
+        (f"hybrid k={k}", k, lambda q: faculty_search.search_professors(q, top_n, mode="hybrid", k=k)),
+    ]
+    await modes[0][2]("warm up")  # opens the collection, loads professors.json
+    faculty_search.get_lexical_index()
+
+    paraphrases = [is_paraphrase(item) for item in queries]
+    p = sum(paraphrases) or 1
+    print(f"Queries: {len(queries)} ({sum(paraphrases)} paraphrases)\n")
+    print(f"{'mode':<20} | {f'recall@{top_n}':>9} | {'paraphr.':>8} | {'MRR':>5} | {'chunks':>6} | {'avg ms':>7}")
+    print("-" * 71)
+    for label, chunks, search in modes:
+        hits = paraphrase_hits = reciprocal = elapsed = 0.0
+        for item, paraphrase in zip(queries, paraphrases):
+            t0 = time.perf_counter()
+            results = await search(item["query"])
+            elapsed += time.perf_counter() - t0
+            names = [r if isinstance(r, str) else r["name"] for r in results]
+            ranks = [names.index(n) + 1 for n in item["expected"] if n in names]
+            hits += bool(ranks)
+            paraphrase_hits += bool(ranks) and paraphrase
+            reciprocal += 1 / min(ranks) if ranks else 0
+        n = len(queries)
+        print(f"{label:<20} | {hits / n:>9.1%} | {paraphrase_hits / p:>8.1%} | {reciprocal / n:>5.2f} | {chunks:>6} | {elapsed / n * 1000:>7.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", default="data/faculty_queries.json")
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--k", type=int, default=faculty_search.ADVISOR_TOP_N * faculty_search.CHUNKS_PER_PROFESSOR)
+    parser.add_argument("--fake-embeddings", action="store_true")
+    args = parser.parse_args()
+
+    if args.fake_embeddings:
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        tmp = tempfile.mkdtemp(prefix="faculty_bench_")
+        vector_store.DB_PATH_FACULTY = tmp
+        vector_store._embeddings = DeterministicFakeEmbedding(size=768)
+        # TokenTextSplitter downloads a tokenizer; ~4 chars per token is close enough here
+        vector_store.TokenTextSplitter = lambda chunk_size, chunk_overlap: RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size * 4, chunk_overlap=chunk_overlap * 4
+        )
+        print(f"Fake embeddings, temporary index in {tmp}")
+    vector_store.index_professors_to_chroma()
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+    asyncio.run(run(queries, args.top_n, args.k))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: local (rules + TF-IDF model) intent classification.
+
+Trains on data/intent_examples.json and evaluates on the held-out messages in
+data/intent_holdout.json (never used for training). For each confidence
+threshold it prints the fraction of turns decided locally, the accuracy of
+those local decisions and the average latency. Turns below the threshold
+would go to the LLM classifier.
+
+Usage:
+    uv run python benchmarks/intent_classifier.py --thresholds 0.4 0.5 0.6 0.7
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils import intent  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--train", default="data/intent_examples.json")
+    parser.add_argument("--holdout", default="data/intent_holdout.json")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.4, 0.5, 0.6, 0.7, 0.8])
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    model = intent.train_model(*intent.load_examples(args.train))
+    print(f"Training: {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    with open(args.holdout, "r", encoding="utf-8") as f:
+        holdout = [(text, mode) for mode, items in json.load(f).items() for text in items]
+
+    print(f"Held-out messages: {len(holdout)}\n")
+    print(f"{'threshold':>9} | {'local':>6} | {'local acc':>9} | {'rules':>5} | {'avg ms':>6}")
+    print("-" * 48)
+
+    for threshold in args.thresholds:
+        local = correct = rules = 0
+        elapsed = 0.0
+        for text, expected in holdout:
+            t0 = time.perf_counter()
+            mode, _, source = intent.classify_local(text, model=model, threshold=threshold)
+            elapsed += time.perf_counter() - t0
+            if mode:
+                local += 1
+                correct += mode == expected
+                rules += source == "rules"
+
+        print(
+            f"{threshold:>9.2f} | {local / len(holdout):>6.1%} | "
+            f"{(correct / local if local else 0):>9.1%} | {rules:>5} | "
+            f"{elapsed / len(holdout) * 1000:>6.2f}"
+        )
+
+    # Misclassified local decisions at the default threshold
+    print(f"\nErrors at threshold {intent.INTENT_CONFIDENCE}:")
+    for text, expected in holdout:
+        mode, confidence, source = intent.classify_local(text, model=model)
+        if mode and mode != expected:
+            print(f"  {text!r}: expected {expected}, got {mode} ({source}, {confidence:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: single-call vs page-parallel PDF -> Markdown extraction.
+
+Generates synthetic textbook-like PDFs (headings + paragraphs + a small
+table per page), converts each one with load_pdf_content() and with the
+upload pipeline's parser (jobs.iter_parsed_pages: STREAM_BATCH_PAGES ranges
+in a pool of PARSE_WORKERS processes), checks that both outputs are
+identical and prints the timings.
+
+Usage:
+    uv run python benchmarks/pdf_extraction.py --pages 200 400 800 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import pymupdf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils import jobs, pdf_loader  # noqa: E402
+
+PARAGRAPH = (
+    "Gradient descent updates every parameter in the direction that reduces the loss. "
+    "The learning rate controls the step size; too large and training diverges, "
+    "too small and it crawls. Momentum keeps a running average of past gradients. "
+)
+
+
+def make_pdf(path: str, pages: int):
+    doc = pymupdf.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Chapter {i // 20 + 1} - Section {i + 1}", fontsize=18)
+        y = 110
+        for _ in range(6):
+            page.insert_textbox(pymupdf.Rect(72, y, 540, y + 80), PARAGRAPH, fontsize=10)
+            y += 85
+        for row in range(4):
+            page.insert_text((72, y + row * 14), f"epoch {row}    loss {1.0 / (row + 1):.3f}    acc {0.5 + row / 10:.2f}", fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+async def parse_like_upload(path: str) -> str:
+    pages = []
+    async for batch in jobs.iter_parsed_pages(path):
+        pages.extend(batch)
+    return "".join(text for _, text in sorted(pages))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main(page_counts, workers):
+    jobs.PARSE_WORKERS = workers
+    jobs.get_parse_pool().submit(int).result()  # start the worker processes before timing
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"📊 PDF extraction benchmark ({workers} workers, {os.cpu_count()} CPUs)")
+        print(f"   {'pages':>6} | {'single':>9} | {'parallel':>9} | speed-up | identical")
+        for pages in page_counts:
+            path = os.path.join(tmp, f"synthetic_{pages}.pdf")
+            make_pdf(path, pages)
+
+            single, t_single = timed(lambda: pdf_loader.load_pdf_content(path))
+            parallel, t_parallel = timed(lambda: asyncio.run(parse_like_upload(path)))
+
+            print(f"   {pages:>6} | {t_single:8.2f}s | {t_parallel:8.2f}s | {t_single / t_parallel:7.2f}x | {single == parallel}")
+    jobs.shutdown_workers()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[200, 400, 800])
+    parser.add_argument("--workers", type=int, default=jobs.PARSE_WORKERS)
+    args = parser.parse_args()
+    main(args.pages, args.workers)
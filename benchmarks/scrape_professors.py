@@ -0,0 +1,168 @@
+"""
+Benchmark: faculty scraper, offline, on local HTML.
+
+The default pages in benchmarks/fixtures/ are SYNTHETIC: written offline to
+mimic the NCKU CSIE markup (listing cards built from data/professors.json),
+not saved copies of the site. Timings on them compare the two parsers on
+that markup only; they say nothing about the real pages. To measure the real
+site, save its pages and pass them with --listing-html / --profile-html.
+
+1. Listing page: the old BeautifulSoup parser (find_all over nested
+   row/item/col containers, get_text on each) vs the single-pass lxml
+   parse_listing, on the fixture and on deeper-nested variants of it.
+   Also checks that both find the same professors.
+2. Profile pages: parse_profile on the saved profile page, then
+   enrich_profiles against a local HTTP server that serves that page for
+   every professor with an artificial latency, sequential vs concurrent.
+
+Usage:
+    uv run python benchmarks/scrape_professors.py
+    uv run python benchmarks/scrape_professors.py --depths 0 5 10 --latency 1.0
+    curl -o members.html https://www.csie.ncku.edu.tw/zh-hant/members/csie
+    uv run python benchmarks/scrape_professors.py --listing-html members.html --profile-html profile.html
+"""
+import argparse
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils import scrape_professor  # noqa: E402
+from src.utils.fetcher import close_fetcher  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+LISTING_HTML = os.path.join(FIXTURES, "synthetic_members.html")
+PROFILE_HTML = os.path.join(FIXTURES, "synthetic_profile.html")
+
+
+def legacy_parse(html: str) -> list:
+    """The previous listing parser (BeautifulSoup), kept here for comparison."""
+    soup = BeautifulSoup(html, "html.parser")
+    professors, seen_names = [], set()
+    for block in soup.find_all("div", class_=re.compile(r"(row|item|col|d-flex)")):
+        raw_text = block.get_text(separator=" ", strip=True)
+        if "@" not in raw_text and "教授" not in raw_text:
+            continue
+        if "em62500@email.ncku.edu.tw" in raw_text or len(raw_text) > 800:
+            continue
+        name, profile_url = "Unknown", "N/A"
+        header_link = block.find(["h4", "h3", "h5", "strong"])
+        if header_link:
+            name = header_link.get_text(strip=True)
+            a_tag = header_link.find("a") if not header_link.name == "a" else header_link
+            if not a_tag:
+                a_tag = block.find("a", href=True)
+            if a_tag and a_tag.has_attr("href"):
+                profile_url = urljoin(scrape_professor.BASE_URL, a_tag["href"])
+        else:
+            name = " ".join(raw_text.split()[:3])
+        if any(k in name for k in scrape_professor.JUNK_KEYWORDS) or name[0].isdigit():
+            continue
+        if profile_url.strip().endswith("/members/csie") or name in seen_names or len(name) > 30:
+            continue
+        seen_names.add(name)
+        if len(raw_text) > 20:
+            professors.append({"name": name, "profile_url": profile_url, "raw_info": raw_text})
+    return professors
+
+
+def nest(html: str, depth: int) -> str:
+    """Wraps every card's content in `depth` extra <div class="col"> levels."""
+    if not depth:
+        return html
+    return html.replace('<div class="item d-flex">', '<div class="item d-flex">' + '<div class="col">' * depth).replace(
+        "\n        </div>\n      </div>", "\n" + "</div>" * depth + "        </div>\n      </div>"
+    )
+
+
+def timed(fn, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def bench_listing(path: str, depths: list, repeat: int):
+    with open(path, "r", encoding="utf-8") as f:
+        base = f.read()
+
+    print(f"{'depth':>5} | {'KB':>5} | {'old bs4 ms':>10} | {'lxml ms':>7} | {'speedup':>7} | {'found':>9}")
+    print("-" * 58)
+    for depth in depths:
+        html = nest(base, depth)
+        old_ms, old = timed(lambda: legacy_parse(html), repeat)
+        new_ms, new = timed(lambda: scrape_professor.parse_listing(html), repeat)
+        same = {p["name"] for p in old} == {p["name"] for p in new}
+        print(f"{depth:>5} | {len(html.encode()) / 1024:>5.0f} | {old_ms:>10.1f} | {new_ms:>7.1f} | "
+              f"{old_ms / new_ms:>6.1f}x | {len(new):>3} {'same' if same else 'DIFF'}")
+    return scrape_professor.parse_listing(base)
+
+
+def serve_profiles(path: str, latency: float):
+    """Local server answering every /zh-hant/members/<id> with the given profile page."""
+    with open(path, "rb") as f:
+        page = f.read()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(page)))
+            self.end_headers()
+            self.wfile.write(page)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def bench_profiles(path: str, professors: list, latency: float, interval: float):
+    server = serve_profiles(path, latency)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"\nProfiles: {len(professors)} pages, {latency * 1000:.0f}ms server latency, "
+          f"{interval * 1000:.0f}ms min interval between request starts")
+    try:
+        for concurrency in (1, scrape_professor.PROFILE_CONCURRENCY):
+            copies = [dict(p, profile_url=base + p["profile_url"].split(".tw", 1)[-1]) for p in professors]
+            start = time.perf_counter()
+            enriched = await scrape_professor.enrich_profiles(copies, concurrency=concurrency, interval=interval)
+            elapsed = time.perf_counter() - start
+            with_areas = sum(1 for p in copies if p.get("areas", "N/A") != "N/A")
+            print(f"  concurrency {concurrency}: {elapsed:.2f}s, {enriched} enriched, {with_areas} with research areas")
+    finally:
+        await close_fetcher()
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--listing-html", default=LISTING_HTML, help="saved faculty listing page")
+    parser.add_argument("--profile-html", default=PROFILE_HTML, help="saved professor profile page")
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 4, 8, 16])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--interval", type=float, default=scrape_professor.PROFILE_INTERVAL)
+    args = parser.parse_args()
+
+    if args.listing_html == LISTING_HTML:
+        print("Listing page: synthetic fixture (timings are parser-relative, not the real site)\n")
+    professors = bench_listing(args.listing_html, args.depths, args.repeat)
+
+    with open(args.profile_html, "rb") as f:
+        print(f"\nParsed profile page: {scrape_professor.parse_profile(f.read(), scrape_professor.URL)}")
+    asyncio.run(bench_profiles(args.profile_html, professors, args.latency, args.interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -21,15 +21,16 @@ export default function App() {
   
   const [fileStatus, setFileStatus] = useState(null); 
   const [fileName, setFileName] = useState('');
-  const [fileContent, setFileContent] = useState(null);
+  const [documentId, setDocumentId] = useState(null);
+  const [uploadStage, setUploadStage] = useState('');
   const [loading, setLoading] = useState(false);
   
   const messagesEndRef = useRef(null);
 
   // --- HELPER: Signal Backend to Delete File ---
-  const clearBackendFile = async () => {
+  const clearBackendFile = async (sessionId) => {
     try {
-      await fetch(`${API_URL}/delete-file`, { method: 'DELETE' });
+      await fetch(`${API_URL}/delete-file?session_id=${encodeURIComponent(sessionId)}`, { method: 'DELETE' });
       console.log("Backend file cleared.");
     } catch (err) {
       console.error("Failed to clear backend file:", err);
@@ -51,7 +52,7 @@ export default function App() {
   useEffect(() => {
     if (!currentId) return;
     const isDefault = messages.length === 1 && messages[0].role === 'assistant';
-    if (isDefault && !fileContent) return;
+    if (isDefault && !documentId) return;
 
     const allHistory = JSON.parse(localStorage.getItem('chat_history') || '{}');
     // Save MESSAGES ONLY (File is ephemeral)
@@ -87,7 +88,7 @@ export default function App() {
       return newSessions;
     });
 
-  }, [messages, fileContent, fileName, currentId]);
+  }, [messages, documentId, fileName, currentId]);
 
   // --- SESSION MANAGERS ---
 
@@ -102,10 +103,10 @@ export default function App() {
     // Reset Frontend State
     setFileStatus(null);
     setFileName('');
-    setFileContent(null);
+    setDocumentId(null);
     
     // Reset Backend State
-    clearBackendFile();
+    clearBackendFile(newId);
   };
 
   const loadSession = (id) => {
@@ -118,11 +119,11 @@ export default function App() {
       
       // 1. Clear Frontend File State
       setFileName('');
-      setFileContent(null);
+      setDocumentId(null);
       setFileStatus(null);
       
       // 2. Clear Backend File State (Switching context)
-      clearBackendFile();
+      clearBackendFile(id);
     } else {
       createNewSession();
     }
@@ -159,6 +160,7 @@ export default function App() {
 
     const formData = new FormData();
     formData.append('file', file);
+    formData.append('session_id', currentId);
 
     try {
       const response = await fetch(`${API_URL}/upload`, {
@@ -168,14 +170,34 @@ export default function App() {
 
       if (!response.ok) throw new Error("Upload failed");
 
-      const data = await response.json();
-      setFileContent(data.content);
+      // The server indexes in the background -> poll the job until it finishes
+      // The document handle is all /chat needs; the text stays on the server
+      const { job_id, document_id } = await response.json();
+      setDocumentId(document_id);
+      let job;
+      while (true) {
+        const res = await fetch(`${API_URL}/jobs/${job_id}`);
+        if (!res.ok) throw new Error("Job lookup failed");
+        job = await res.json();
+
+        if (job.status === 'done') break;
+        if (job.status === 'error') throw new Error(job.error);
+
+        // Pages already indexed can be queried while the rest is processed
+        const { done, total } = job.progress;
+        setUploadStage(job.status === 'embedding' ? `Indexed ${done}/${total} pages` : `${job.status}...`);
+        if (job.queryable) setFileStatus('success');
+        await new Promise(resolve => setTimeout(resolve, 1000));
+      }
+
       setFileStatus('success');
     } catch (error) {
       console.error(error);
       setFileStatus('error');
       setFileName("Upload Failed");
+      setDocumentId(null);
     } finally {
+      setUploadStage('');
       try { e.target.value = ''; } catch (err) { /* ignore */ }
     }
   };
@@ -185,14 +207,14 @@ export default function App() {
     // 1. Clear Frontend
     setFileStatus(null);
     setFileName('');
-    setFileContent(null);
+    setDocumentId(null);
 
     // 2. Clear Backend
-    clearBackendFile();
+    clearBackendFile(currentId);
   };
 
   const handleSend = async () => {
-    if (!input.trim() && !fileContent) return; 
+    if (!input.trim() && !documentId) return; 
     const userText = input.trim() || "Analyze this document.";
 
     setInput('');
@@ -200,26 +222,59 @@ export default function App() {
 
     setMessages(prev => [...prev, { role: 'user', content: userText }]);
 
+    // Placeholder bubble that the token stream fills in
+    setMessages(prev => [...prev, { role: 'assistant', content: '' }]);
+    const updateReply = (content) => setMessages(prev => {
+      const next = [...prev];
+      next[next.length - 1] = { role: 'assistant', content };
+      return next;
+    });
+
     try {
-      const response = await fetch(`${API_URL}/chat`, {
+      const response = await fetch(`${API_URL}/chat/stream`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
           message: userText,
-          file_content: fileContent,
+          session_id: currentId,
+          document_id: documentId,
           history: messages.map(m => ({ role: m.role, content: m.content }))
         }),
       });
 
-      if (!response.ok) throw new Error("API Error");
-      const data = await response.json();
-      setMessages(prev => [...prev, { role: 'assistant', content: data.response }]);
+      if (!response.ok || !response.body) throw new Error("API Error");
+
+      // --- Read Server-Sent Events ---
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let reply = '';
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+
+        for (const raw of events) {
+          if (!raw.startsWith('data: ')) continue;
+          const event = JSON.parse(raw.slice(6));
+
+          if (event.type === 'token') {
+            reply += event.content;
+            updateReply(reply);
+          } else if (event.type === 'done') {
+            updateReply(event.response || reply);
+          } else if (event.type === 'error') {
+            throw new Error(event.detail);
+          }
+        }
+      }
 
     } catch (error) {
-      setMessages(prev => [...prev, { 
-        role: 'assistant', 
-        content: `⚠️ **Error:** Backend connection failed at \`${API_URL}\`.` 
-      }]);
+      updateReply(`⚠️ **Error:** Backend connection failed at \`${API_URL}\`.`);
     } finally {
       setLoading(false);
     }
@@ -230,6 +285,7 @@ export default function App() {
       <Sidebar 
         fileStatus={fileStatus} 
         fileName={fileName} 
+        uploadStage={uploadStage}
         handleFileUpload={handleFileUpload}
         handleRemoveFile={handleFileDelete} // Pass updated handler
         
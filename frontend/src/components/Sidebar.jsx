@@ -6,6 +6,7 @@ import {
 export default function Sidebar({ 
   fileStatus, 
   fileName, 
+  uploadStage,
   handleFileUpload, 
   handleRemoveFile, // <--- This function comes from App.jsx
   
@@ -72,7 +73,7 @@ export default function Sidebar({
                 <span className="text-sm font-medium text-gray-800 truncate block w-32">
                   {fileName}
                 </span>
-                <span className="text-xs text-green-600">Active Context</span>
+                <span className="text-xs text-green-600">{uploadStage || 'Active Context'}</span>
               </div>
             </div>
             
@@ -94,7 +95,10 @@ export default function Sidebar({
           `}>
             <div className="flex flex-col items-center justify-center text-center px-4">
               {fileStatus === 'uploading' ? (
-                <div className="animate-spin rounded-full h-6 w-6 border-b-2 border-blue-600"></div>
+                <>
+                  <div className="animate-spin rounded-full h-6 w-6 border-b-2 border-blue-600"></div>
+                  {uploadStage && <p className="text-xs text-blue-600 mt-2 capitalize">{uploadStage}</p>}
+                </>
               ) : (
                 <>
                   <UploadCloud className="w-6 h-6 text-gray-400 mb-1" />
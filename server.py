@@ -1,4 +1,6 @@
 import os
+import json
+import asyncio
 import shutil
 import traceback
 from contextlib import asynccontextmanager
@@ -6,15 +8,26 @@ from typing import List, Optional, Dict, Any
 
 import uvicorn
 from dotenv import load_dotenv
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
 
 # --- INTERNAL IMPORTS ---
 from src.graph import build_graph
-from src.utils.pdf_loader import load_pdf_content
-from src.utils.vector_store import index_document, index_professors_to_chroma, clear_database
-from src.utils.scrape_professor import scrape_ncku_professors
+from src.utils.jobs import submit_ingestion, get_job, shutdown_workers
+from src.utils.vector_store import get_embedding_stats
+from src.utils.doc_store import save_upload, detach_session, get_document, get_session_document, document_summary
+from src.utils.session import DEFAULT_SESSION, UPLOAD_ROOT, session_upload_dir
+from src.utils.map_reduce import INTERNAL_TAG, get_summary_stats
+from src.utils.intent import get_intent_stats
+from src.utils.llm_setup import close_llm_clients
+from src.utils.response_cache import get_response_cache_stats
+from src.utils.tool_cache import get_tool_cache_stats
+from src.utils.fetcher import close_fetcher
+from src.utils.tool_budget import new_deadline
+from src.utils.faculty_refresh import refresh_faculty, refresh_loop, get_refresh_status
+from src.utils.warmup import start_warmup, mark, mark_starting, get_readiness
 
 # Load Environment
 load_dotenv()
@@ -23,50 +36,53 @@ load_dotenv()
 agent_app = None
 CHROMA_DB_PATH = "chroma_db_user"  # <--- Verify this matches your vector store path
 
+# Nodes whose LLM tokens are forwarded to the client by /chat/stream.
+# (The classifier also calls the LLM, but its one-word output is sent as a 'mode' event instead.)
+STREAMING_NODES = {"query_agent", "simplifier_agent", "summarizer_agent", "quiz_agent", "advisor_agent"}
+QUIZ_DIVIDER = "### ANSWER KEY ###"
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
-    Executes on Server Startup.
+    Executes on Server Startup. Only fast steps run before the API accepts traffic:
     1. Initializes the AI Graph.
-    2. Checks if Professor data exists. If not, Scrapes and Indexes it.
+    2. Starts the background warm-up: professor scrape/index + in-memory faculty
+       index, user store and local models, LLM reachability (see /readyz).
+    3. Schedules the incremental faculty refresh (FACULTY_REFRESH_HOURS).
     """
     global agent_app
     
     print("🔄 Server Startup Sequence Initiated...")
+    mark_starting()
 
     # 1. Initialize LangGraph
     try:
         agent_app = build_graph()
+        mark("graph", True)
         print("   ✅ LangGraph Agent initialized.")
     except Exception as e:
+        mark("graph", False, str(e))
         print(f"   ❌ Failed to initialize LangGraph: {e}")
 
-    # 2. Professor Database Check
-    # We use 'data/' for persistent system data (Professors)
-    os.makedirs("data", exist_ok=True) 
-    json_path = "data/professors.json"
-    
-    if not os.path.exists(json_path):
-        print("   🚀 First run detected! Building Professor Database...")
-        
-        # A. Run Scraper
-        print("      🕷️ Step 1: Scraping NCKU Website...")
-        scrape_ncku_professors() 
-        
-        # B. Run Indexer
-        print("      📊 Step 2: Indexing to Vector Store...")
-        index_professors_to_chroma()
-        
-        print("   ✅ Professor DB Ready.")
-    else:
-        print("   ✅ Professor Database found. Skipping scrape.")
+    # 2. Background warm-up (the advisor answers 'still loading' until the faculty index is ready)
+    warmup_tasks = start_warmup()
+
+    # 3. Periodic re-scrape: only changed professors are re-embedded
+    refresh_task = asyncio.create_task(refresh_loop())
 
-    # 3. Ensure Upload Directory Exists
-    # We use 'uploads/' for temporary user files
-    os.makedirs("uploads", exist_ok=True)
+    # 4. Ensure Upload Directory Exists
+    # We use 'uploads/<session_id>/' for temporary user files
+    os.makedirs(UPLOAD_ROOT, exist_ok=True)
+    print("   🚀 API ready, warm-up continues in the background.")
     
     yield
-    # (Shutdown logic can go here if needed)
+
+    # Shutdown: stop background tasks and the PDF parsing worker processes, close pooled LLM / HTTP connections
+    for task in warmup_tasks + [refresh_task]:
+        task.cancel()
+    shutdown_workers()
+    await close_llm_clients()
+    await close_fetcher()
 
 
 # --- APP SETUP ---
@@ -84,7 +100,9 @@ app.add_middleware(
 # Models
 class ChatRequest(BaseModel):
     message: str
-    file_content: Optional[str] = None
+    session_id: str = DEFAULT_SESSION
+    document_id: Optional[str] = None   # handle returned by /upload (preferred)
+    file_content: Optional[str] = None  # legacy: full text sent inline
     history: List[Dict[str, str]] = []
 
 @app.get("/")
@@ -92,20 +110,53 @@ def read_root():
     return {"status": "Study Partner Agent is running"}
 
 
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    """Readiness per subsystem (graph, user store, faculty index, LLM); 503 until all are ready."""
+    readiness = get_readiness()
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+
+@app.get("/stats")
+def read_stats():
+    """Cache and classifier counters, useful to check what is served without the LLM."""
+    return {
+        "embedding_cache": get_embedding_stats(),
+        "summary_cache": get_summary_stats(),
+        "intent": get_intent_stats(),
+        "response_cache": get_response_cache_stats(),
+        "tool_cache": get_tool_cache_stats(),
+        "faculty_refresh": get_refresh_status(),
+    }
+
+
+@app.post("/faculty/refresh")
+async def refresh_faculty_index():
+    """Re-scrapes the faculty page now and re-indexes only professors that changed."""
+    return await refresh_faculty()
+
+
 @app.delete("/delete-file")
-async def delete_file():
+async def delete_file(session_id: str = DEFAULT_SESSION):
     """
-    Clears the uploaded USER file (Ephemeral).
-    SAFE: Only deletes 'uploads/', leaves 'data/' (professors) alone.
+    Clears the uploaded USER file (Ephemeral) of one session.
+    SAFE: Only deletes 'uploads/<session_id>/', leaves other sessions and 'data/' (professors) alone.
     """
     try:
-        if os.path.exists("uploads"):
-            shutil.rmtree("uploads")
-            print("🗑️ Deleted 'uploads' directory (User Context Cleanup).")
+        upload_dir = session_upload_dir(session_id)
+        shutil.rmtree(upload_dir)
+        print(f"🗑️ Deleted '{upload_dir}' directory (User Context Cleanup).")
 
-        # Recreate empty folder
-        os.makedirs("uploads", exist_ok=True)
-        success = clear_database()
+        # Recreate empty folder & forget the session's document
+        # (the document itself stays in the doc store for fast re-uploads)
+        session_upload_dir(session_id)
+        detach_session(session_id)
         
         return {"status": "success", "message": "User context cleared."}
     except Exception as e:
@@ -114,44 +165,88 @@ async def delete_file():
 
 
 @app.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(file: UploadFile = File(...), session_id: str = Form(DEFAULT_SESSION)):
     """
-    Handles PDF uploads. Saves to 'uploads/' directory.
+    Handles PDF uploads. Saves to the session's 'uploads/<session_id>/' directory
+    and returns a job id right away; parsing & indexing run in the background.
+    Poll /jobs/{job_id} for progress.
     """
     try:
-        # 1. Prepare Directory (Single File Mode)
-        # We wipe 'uploads' to ensure only one active file, but keep 'data' safe
-        if os.path.exists("uploads"):
-            shutil.rmtree("uploads")
-        os.makedirs("uploads")
+        # 1. Prepare Directory (Single File Mode per session)
+        # We wipe only this session's folder, other sessions and 'data' stay safe
+        upload_dir = session_upload_dir(session_id)
+        shutil.rmtree(upload_dir)
+        upload_dir = session_upload_dir(session_id)
         
-        file_path = f"uploads/{file.filename}" # <--- Saving to uploads/
+        file_path = os.path.join(upload_dir, os.path.basename(file.filename)) # <--- Saving to uploads/<session_id>/
         
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # SHA-256 is computed while the upload streams to disk -> document id
+        document_id = await asyncio.to_thread(save_upload, file.file, file_path)
             
-        print(f"📂 User File saved: {file_path}")
+        print(f"📂 User File saved: {file_path} (sha256 {document_id[:12]})")
         
-        # 2. Extract Text
-        markdown_text = load_pdf_content(file_path)
-        print(markdown_text[:500])
-
-        try:
-            index_document(markdown_text, file.filename)
-            print("✅ Document Indexed to Vector Store.")
-        except Exception as e:
-            print(f"⚠️ Vector Indexing Warning: {e}")
+        # 2. Extract & Index in the background (skipped if this exact file was seen before)
+        job = submit_ingestion(file_path, file.filename, session_id, document_id)
 
         return {
             "filename": file.filename, 
-            "content": markdown_text,
-            "status": "success"
+            "job_id": job["job_id"],
+            "document_id": document_id,
+            "document": document_summary(document_id),  # pages / chunk_count / token_estimate
+            "status": job["status"]
         }
     except Exception as e:
         print(f"❌ Upload Error: {e}")
         raise HTTPException(status_code=500, detail=f"File upload failed: {str(e)}")
 
 
+@app.get("/documents/{document_id}")
+def read_document(document_id: str):
+    """Metadata of an uploaded document (pages, chunk count, token estimate, status)."""
+    summary = document_summary(document_id)
+    if not summary:
+        raise HTTPException(status_code=404, detail="Unknown document id")
+    return summary
+
+
+@app.get("/jobs/{job_id}")
+def read_job(job_id: str):
+    """
+    Progress of a background upload:
+    status = queued | parsing | embedding | done | error
+    progress = {"done": k, "total": n} pages indexed so far.
+    queryable = True as soon as the first pages can be searched by /chat.
+    """
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return job
+
+
+def build_inputs(request: ChatRequest) -> dict:
+    """
+    Converts a ChatRequest into the initial LangGraph state.
+    The document travels as a handle; nodes load its text lazily from the doc store.
+    """
+    current_messages = request.history + [{"role": "user", "content": request.message}]
+
+    document_id = request.document_id or get_session_document(request.session_id)
+    document = get_document(document_id)
+    if document_id and not document:
+        print(f"⚠️ Unknown document id {document_id[:12]}. Continuing without a document.")
+        document_id = None
+
+    return {
+        "messages": current_messages,
+        "session_id": request.session_id,
+        "document_id": document_id,
+        "chunk_count": document.get("chunk_count", 0) if document else 0,
+        "file_content": request.file_content,
+        "deadline": new_deadline(),
+        "tool_rounds": 0,
+    }
+
+
 @app.post("/chat")
 async def chat_endpoint(request: ChatRequest):
     if not agent_app:
@@ -161,15 +256,10 @@ async def chat_endpoint(request: ChatRequest):
         print(f"📩 Processing Message: {request.message[:50]}...")
         
         # Prepare LangGraph Inputs
-        current_messages = request.history + [{"role": "user", "content": request.message}]
+        inputs = build_inputs(request)
         
-        inputs = {
-            "messages": current_messages,
-            "file_content": request.file_content
-        }
-        
-        # Run the Graph
-        result = agent_app.invoke(inputs)
+        # Run the Graph (async, so other requests keep being served meanwhile)
+        result = await agent_app.ainvoke(inputs)
         
         # Get Response
         last_message = result["messages"][-1]
@@ -181,6 +271,124 @@ async def chat_endpoint(request: ChatRequest):
         print(f"❌ CHAT ERROR:\n{error_details}")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+class QuizKeyFilter:
+    """
+    The quiz node asks the LLM for questions AND the answer key in one reply.
+    While streaming we must never leak the key, so we hold back any text that
+    could be the start of the divider and drop everything after it.
+    """
+    def __init__(self):
+        self.buffer = ""
+        self.hidden = False
+
+    def feed(self, token: str) -> str:
+        if self.hidden:
+            return ""
+        self.buffer += token
+        if QUIZ_DIVIDER in self.buffer:
+            self.hidden = True
+            visible = self.buffer.split(QUIZ_DIVIDER)[0]
+            self.buffer = ""
+            return visible
+        # Keep a tail that might be a partial divider
+        safe = len(self.buffer) - (len(QUIZ_DIVIDER) - 1)
+        if safe <= 0:
+            return ""
+        visible, self.buffer = self.buffer[:safe], self.buffer[safe:]
+        return visible
+
+
+def sse(event: dict) -> str:
+    """Formats one Server-Sent Event."""
+    return f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+async def stream_graph_events(inputs: dict):
+    """
+    Runs the graph with astream_events and translates the raw LangChain events
+    into a small set of client events:
+      mode        -> classifier decision
+      token       -> LLM token from one of the STREAMING_NODES
+      tool_start  -> a tool was called
+      tool_end    -> a tool returned
+      retrieval   -> a retriever returned N chunks (advisor: also N professors)
+      done        -> final answer (authoritative, replaces the streamed text)
+      error       -> something failed mid-stream
+    """
+    quiz_filter = QuizKeyFilter()
+    final_response = None
+
+    try:
+        async for event in agent_app.astream_events(inputs, version="v2"):
+            kind = event["event"]
+            node = event.get("metadata", {}).get("langgraph_node")
+
+            if kind == "on_chat_model_stream" and node in STREAMING_NODES:
+                if INTERNAL_TAG in event.get("tags", []):
+                    continue  # intermediate calls (e.g. map-reduce partial summaries)
+                content = event["data"]["chunk"].content
+                if not isinstance(content, str) or not content:
+                    continue  # tool-call chunks carry no text
+                if node == "quiz_agent":
+                    content = quiz_filter.feed(content)
+                    if not content:
+                        continue
+                yield sse({"type": "token", "node": node, "content": content})
+
+            elif kind == "on_chain_end" and event["name"] == "classifier":
+                output = event["data"].get("output") or {}
+                if isinstance(output, dict) and output.get("mode"):
+                    print(f"🧭 Stream: classifier chose '{output['mode']}'")
+                    yield sse({"type": "mode", "mode": output["mode"]})
+
+            elif kind == "on_tool_start":
+                yield sse({"type": "tool_start", "tool": event["name"], "node": node})
+
+            elif kind == "on_tool_end":
+                yield sse({"type": "tool_end", "tool": event["name"], "node": node})
+
+            elif kind == "on_retriever_end":
+                docs = event["data"].get("output") or []
+                yield sse({"type": "retrieval", "node": node, "chunks": len(docs)})
+
+            elif kind == "on_custom_event" and event["name"] == "retrieval":
+                # Retrieval outside a LangChain retriever (advisor professor search)
+                yield sse({"type": "retrieval", "node": node, **(event["data"] or {})})
+
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                # Root run finished -> final graph state
+                output = event["data"].get("output") or {}
+                messages = output.get("messages", []) if isinstance(output, dict) else []
+                if messages:
+                    final_response = messages[-1].content
+
+        yield sse({"type": "done", "response": final_response or ""})
+
+    except Exception as e:
+        error_details = traceback.format_exc()
+        print(f"❌ STREAM ERROR:\n{error_details}")
+        yield sse({"type": "error", "detail": str(e)})
+
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Same as /chat, but streams Server-Sent Events while the graph runs,
+    so the client can render tokens as soon as the first one arrives.
+    """
+    if not agent_app:
+        raise HTTPException(status_code=500, detail="Agent not initialized")
+
+    print(f"📩 Streaming Message: {request.message[:50]}...")
+    inputs = build_inputs(request)
+
+    return StreamingResponse(
+        stream_graph_events(inputs),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 if __name__ == "__main__":
     print("🚀 Starting Server on http://0.0.0.0:8000")
     uvicorn.run("server:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -1,9 +1,10 @@
 from langgraph.graph import StateGraph, END, START
-from langgraph.prebuilt import ToolNode, tools_condition 
+from langgraph.prebuilt import tools_condition 
 
 from src.state import AgentState
 from src.tools import get_all_tools
 from src.tools_advisor import get_advisor_tool
+from src.utils.tool_budget import make_tool_node
 
 # Node Imports
 from src.nodes.classifier import message_classifier_node
@@ -13,17 +14,19 @@ from src.nodes.simplifier import feynman_node
 from src.nodes.summarizer import summarizer_node
 from src.nodes.quiz import quiz_node
 from src.nodes.advisor import advisor_node  
+from src.nodes.cache import cache_lookup_node, cache_store_node
 
 def build_graph():
     workflow = StateGraph(AgentState)
 
     # --- 1. Initialize Tool Node ---
     # This node will execute the tools (Tavily, Arxiv, etc.)
+    # Budgeted: per-tool timeouts, request deadline and max tool rounds (see tool_budget.py)
     tools = get_all_tools()
     advisor_tool = get_advisor_tool()
-    tool_node_query = ToolNode(tools)
-    tool_node_simplify = ToolNode(tools)
-    tool_node_advisor = ToolNode(advisor_tool)
+    tool_node_query = make_tool_node(tools)
+    tool_node_simplify = make_tool_node(tools)
+    tool_node_advisor = make_tool_node(advisor_tool)
 
     # --- 2. Add All Nodes ---
     workflow.add_node("classifier", message_classifier_node) 
@@ -32,24 +35,28 @@ def build_graph():
     workflow.add_node("summarizer_agent", summarizer_node)
     workflow.add_node("quiz_agent", quiz_node)
     workflow.add_node("advisor_agent", advisor_node)
+    workflow.add_node("cache_lookup", cache_lookup_node)
+    workflow.add_node("cache_store", cache_store_node)
 
     workflow.add_node("tools_query", tool_node_query)  
     workflow.add_node("tools_simplify", tool_node_simplify)
     workflow.add_node("tools_advisor", tool_node_advisor)
 
-    # --- 3. Start at Classifier ---
+    # --- 3. Start at Classifier, then the Response Cache ---
     workflow.add_edge(START, "classifier")
+    workflow.add_edge("classifier", "cache_lookup")
     
-    # --- 4. Router Logic ---
+    # --- 4. Router Logic (cache hits end right away) ---
     workflow.add_conditional_edges(
-        "classifier", 
+        "cache_lookup",
         route_decision,
         {   
             "query": "query_agent", 
             "simplify": "simplifier_agent", 
             "summarize": "summarizer_agent", 
             "quiz": "quiz_agent",
-            "advisor": "advisor_agent"
+            "advisor": "advisor_agent",
+            "cached": END
         }
     )
 
@@ -60,7 +67,7 @@ def build_graph():
         tools_condition,
         {
             "tools": "tools_query", # Map the default 'tools' output to our specific node
-            END: END                # Map the default end signal to the Graph END
+            END: "cache_store"      # Final answer -> remember it, then END
         }
     )
     # After the tool runs, go BACK to the query_agent to generate the answer
@@ -71,7 +78,7 @@ def build_graph():
         tools_condition,
         {
             "tools": "tools_simplify", # Map the default 'tools' output to our specific node
-            END: END                # Map the default end signal to the Graph END
+            END: "cache_store"      # Final answer -> remember it, then END
         }
     )
     # After the tool runs, go BACK to the simplifier_agent to generate the answer
@@ -82,18 +89,17 @@ def build_graph():
         tools_condition,
         {
             "tools": "tools_advisor", # Map the default 'tools' output to our specific node
-            END: END                # Map the default end signal to the Graph END
+            END: "cache_store"      # Final answer -> remember it, then END
         }
     )
     # After the tool runs, go BACK to the advisor_agent to generate the answer
     workflow.add_edge("tools_advisor", "advisor_agent")
 
     # --- 6. Standard Endings ---
-    # (Note: query_agent can END via tools_condition if no tools are called)
-    workflow.add_edge("simplifier_agent", END)
-    workflow.add_edge("summarizer_agent", END)
-    workflow.add_edge("quiz_agent", END)
-    workflow.add_edge("advisor_agent", END)
+    # (Note: query/simplifier/advisor agents reach cache_store via tools_condition if no tools are called)
+    workflow.add_edge("summarizer_agent", "cache_store")
+    workflow.add_edge("quiz_agent", END)  # quizzes are never cached
+    workflow.add_edge("cache_store", END)
 
     app = workflow.compile()
     return app
\ No newline at end of file
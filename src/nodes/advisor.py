@@ -1,9 +1,30 @@
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from langchain_core.callbacks import adispatch_custom_event
 from src.utils.llm_setup import get_llm
-from src.utils.vector_store import get_retriever
+from src.utils.faculty_search import search_professors, format_professor_record
 from src.tools_advisor import get_advisor_tool
+from src.utils.tool_budget import bind_tools_within_budget, invoke_within_budget
+from src.utils.warmup import is_ready
 
-def advisor_node(state):
+FACULTY_LOADING_MESSAGE = (
+    "🎓 The NCKU faculty database is still being prepared after a server restart, "
+    "so I can't recommend a professor reliably yet. Please ask again in a minute or two. "
+    "Meanwhile I can help with your documents or general questions."
+)
+
+async def report_retrieval(candidates: list):
+    """
+    Professor search is not a LangChain retriever, so no on_retriever_end fires:
+    tell /chat/stream about it with a custom 'retrieval' event instead.
+    """
+    try:
+        await adispatch_custom_event(
+            "retrieval", {"professors": len(candidates), "chunks": sum(r["hits"] for r in candidates)}
+        )
+    except RuntimeError:
+        pass  # called outside a graph run (scripts, benchmarks): nobody is listening
+
+async def advisor_node(state):
     llm = get_llm()
     
     # --- 1. Input Cleaning ---
@@ -15,41 +36,25 @@ def advisor_node(state):
 
     print(f"🎓 Advisor Agent: Analyzing '{user_input[:40]}...'")
 
-    # --- 2. Bind Tools ---
+    # Without the faculty index the LLM would invent professors: say so instead (answer not cached)
+    if not is_ready("faculty_index"):
+        print("   ⏳ Faculty index not ready yet. Returning the 'still loading' answer.")
+        return {"messages": [AIMessage(content=FACULTY_LOADING_MESSAGE)], "degraded": True}
+
+    # --- 2. Bind Tools (unless the request's tool budget is used up) ---
     tools = get_advisor_tool()
-    llm_with_tools = llm.bind_tools(tools)
+    llm_with_tools, budget_notes = bind_tools_within_budget(llm, tools, state)
 
-    # --- 3. "Search All" Retrieval Strategy ---
+    # --- 3. Professor-Level Retrieval ---
     context_content = ""
     try:
-        # STEP A: Retrieve EVERYONE (or a very high number)
-        # This ensures we scan the entire JSON list mathematically.
-        # 150 is safe for 'searching', but not for 'reading'.
-        retriever = get_retriever(k=150, db_type="faculty") 
-        all_matches = retriever.invoke(user_input)
-        
-        MAX_CHARS = 100000 
-        current_chars = 0
-        docs_text = []
-        
-        print(f"   📊 Scanning {len(all_matches)} total candidates...")
-        
-        for doc in all_matches:
-            name = doc.metadata.get("name", "Unknown")
-            profile_link = doc.metadata.get("profile_url", "N/A")
-            
-            # Format this professor's entry
-            entry = f"NAME: {name}\nLINK: {profile_link}\nDATA: {doc.page_content}\n\n"
-            
-            # Check if adding this entry exceeds our safety limit
-            if current_chars + len(entry) > MAX_CHARS:
-                break # Stop adding, we are full!
-                
-            docs_text.append(entry)
-            current_chars += len(entry)
-            
-        context_content = "".join(docs_text)
-        print(f"   ✅ Selected top {len(docs_text)} matches (Context filled: {current_chars}/{MAX_CHARS} chars).")
+        # Chunk scores pooled per professor: one compact record per distinct candidate
+        candidates = await search_professors(user_input)
+        context_content = "\n\n".join(
+            f"#{i} {format_professor_record(record)}" for i, record in enumerate(candidates, 1)
+        )
+        print(f"   ✅ Selected top {len(candidates)} professors: {', '.join(r['name'] for r in candidates)}")
+        await report_retrieval(candidates)
             
     except Exception as e:
         print(f"   ⚠️ Retrieval failed: {e}")
@@ -70,13 +75,13 @@ def advisor_node(state):
     2. **Tool Usage Rules (STRICT):**
        - **DO NOT** use a tool named 'search'. It does not exist.
        - The ONLY valid tools are: `deep_research` and `ncku_faculty_search`.
-       - **Usage:** Only use `ncku_faculty_search` if the 'DATA' field is missing the Lab Name or Email.
+       - **Usage:** Only use `ncku_faculty_search` if the LAB or EMAIL field is 'N/A'.
     
     3. **Output Format:**
     ## 🏆 Top Recommendation: [Professor Name]
-    **🧪 Lab:** [Extract from DATA]
-    **🔗 Profile:** [Insert the LINK from DATA]
-    **📧 Email:** [Extract from DATA]
+    **🧪 Lab:** [LAB]
+    **🔗 Profile:** [LINK]
+    **📧 Email:** [EMAIL]
     
     ### 🎯 Research Match
     [Explain match]
@@ -87,12 +92,11 @@ def advisor_node(state):
     [Body]
     """
 
-    messages = [SystemMessage(content=system_prompt)] + state["messages"]
+    messages = [SystemMessage(content=system_prompt)] + state["messages"] + budget_notes
     
-    # --- 5. Execution (With Crash Protection) ---
+    # --- 5. Execution (With Crash Protection, capped by the request deadline) ---
     try:
-        response = llm_with_tools.invoke(messages)
-        return {"messages": [response]}
+        response, timed_out = await invoke_within_budget(llm_with_tools, messages, state)
         
     except Exception as e:
         print(f"❌ Tool Call Error detected: {e}")
@@ -100,5 +104,8 @@ def advisor_node(state):
         
         fallback_msg = SystemMessage(content="Error: Tools unavailable. Answer using ONLY the provided database context.")
         messages.append(fallback_msg)
-        response = llm.invoke(messages)
-        return {"messages": [response]}
\ No newline at end of file
+        response, timed_out = await invoke_within_budget(llm, messages, state)
+
+    if timed_out:
+        return {"messages": [response], "degraded": True}
+    return {"messages": [response]}
\ No newline at end of file
@@ -0,0 +1,116 @@
+import os
+import time
+import hashlib
+from langchain_core.messages import AIMessage
+from src.utils.intent import looks_like_quiz_answers
+from src.utils.doc_store import get_document
+from src.utils.session import UPLOAD_ROOT, safe_session_id
+from src.utils.vector_store import get_embeddings
+from src.utils.response_cache import CACHEABLE_MODES, get_response_cache
+from src.utils.tool_cache import TOOL_TTLS, DEFAULT_TTL
+
+
+def last_user_message(state) -> str:
+    """The question of this turn (tool loops append AI/tool messages after it)."""
+    return next((m.content for m in reversed(state["messages"]) if m.type == "human"), "")
+
+
+def conversation_context(state) -> str:
+    """Hash of the turns before this one ('' for a first turn): follow-ups only match the same conversation."""
+    messages = state["messages"]
+    last_human = max((i for i, m in enumerate(messages) if m.type == "human"), default=0)
+    if last_human == 0:
+        return ""
+    history = "\n".join(f"{m.type}: {m.content}" for m in messages[:last_human])
+    return hashlib.sha256(history.encode("utf-8")).hexdigest()
+
+
+def has_answer_key(state) -> bool:
+    """A quiz is running in this session: any message may be an answer to grade."""
+    if state.get("quiz_answers"):
+        return True
+    # Not session_upload_dir(): it would create a folder for every session that never uploads
+    folder = os.path.join(UPLOAD_ROOT, safe_session_id(state.get("session_id")))
+    return os.path.isdir(folder) and os.path.exists(os.path.join(folder, "quiz_solutions.txt"))
+
+
+def answer_ttl(state):
+    """
+    Lifetime of this turn's answer: the shortest tool-cache TTL of the tools it called
+    (a web-search answer goes stale with the search results), None if it used no tool.
+    """
+    messages = state["messages"]
+    last_human = max((i for i, m in enumerate(messages) if m.type == "human"), default=0)
+    tools = {m.name for m in messages[last_human:] if m.type == "tool"}
+    return min((TOOL_TTLS.get(name, DEFAULT_TTL) for name in tools), default=None)
+
+
+def cache_scope(state):
+    """
+    (mode, document content hash, query, conversation context) for this turn, or None if it
+    must not be cached: quizzes, quiz answers / grading (or any turn while the session has an
+    answer key), and documents that are still being indexed.
+    """
+    mode = state.get("mode")
+    query = last_user_message(state)
+    if mode not in CACHEABLE_MODES or not query.strip() or looks_like_quiz_answers(query):
+        return None
+    if has_answer_key(state):
+        return None
+
+    doc_key = state.get("document_id") or ""
+    if doc_key:
+        document = get_document(doc_key)
+        if document and document.get("status") != "ready":
+            return None  # partial answers while indexing
+    elif state.get("file_content"):
+        doc_key = hashlib.sha256(state["file_content"].encode("utf-8")).hexdigest()  # legacy inline text
+
+    return mode, doc_key, query, conversation_context(state)
+
+
+async def embed_query(query: str):
+    try:
+        return await get_embeddings().aembed_query(query)
+    except Exception as e:
+        print(f"   ⚠️ Response Cache: embedding failed ({e}). Exact matching only.")
+        return None
+
+
+async def cache_lookup_node(state):
+    """Answers repeated questions from the response cache, skipping the agents entirely."""
+    scope = cache_scope(state)
+    if not scope:
+        return {"cache_hit": False}
+
+    start = time.perf_counter()
+    mode, doc_key, query, context = scope
+    cache = get_response_cache()
+    response, kind = cache.lookup(mode, doc_key, query, count_miss=False, context=context)  # cheap exact probe first
+    if response is None:
+        response, kind = cache.lookup(mode, doc_key, query, vector=await embed_query(query), context=context)
+
+    if response is None:
+        return {"cache_hit": False}
+
+    print(f"⚡ Response Cache: {kind} hit for '{query[:40]}' ({(time.perf_counter() - start) * 1000:.1f}ms).")
+    return {"messages": [AIMessage(content=response)], "cache_hit": True}
+
+
+async def cache_store_node(state):
+    """Remembers the final answer of a cacheable turn."""
+    scope = cache_scope(state)
+    last = state["messages"][-1]
+    if not scope or state.get("cache_hit") or getattr(last, "tool_calls", None) or not last.content:
+        return {}
+    if state.get("degraded"):
+        return {}  # a tool timed out or was skipped: don't keep a partial answer
+
+    mode, doc_key, query, context = scope
+    try:
+        get_response_cache().store(
+            mode, doc_key, query, last.content, vector=await embed_query(query), context=context, ttl=answer_ttl(state)
+        )
+    except Exception as e:
+        print(f"   ⚠️ Response Cache: could not store answer: {e}")
+    return {}
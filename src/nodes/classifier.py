@@ -1,24 +1,42 @@
+import time
 from langchain_core.prompts import ChatPromptTemplate
 from src.utils.llm_setup import get_llm
+from src.utils.intent import classify_local, record
 
-def message_classifier_node(state):
+async def message_classifier_node(state):
     """
     DETERMINES the intent (Mode).
     It does not route; it only updates the state with 'mode'.
     """
     user_message = state["messages"][-1].content
     
-    # 1. Get the actual content (since you don't store file_name)
-    file_content = state.get("file_content", "")
+    # 1. Does this turn have a document? (A handle is enough, no need to load the text)
+    has_file = bool(state.get("document_id") or state.get("file_content"))
     
     # 2. HEURISTIC: File detected (has content) but no user text
     # If the user just uploaded a file and hit send, default to "summarize"
-    if file_content and not user_message.strip():
+    if has_file and not user_message.strip():
         print("🧠 Classifier: File detected with no text -> Summarize.")
         return {"mode": "summarize"}
 
-    # 3. LLM: Classify intent
-    llm = get_llm()
+    # 3. FAST PATH: keyword rules + local model (milliseconds, no network)
+    start = time.perf_counter()
+    try:
+        mode, confidence, source = classify_local(user_message)
+    except Exception as e:
+        print(f"⚠️ Local classifier unavailable: {e}")
+        mode, confidence, source = None, 0.0, "model"
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if mode:
+        record(source, elapsed_ms)
+        print(f"🧠 Classifier ({source}, {confidence:.2f}, {elapsed_ms:.1f}ms): {mode}")
+        return {"mode": mode}
+
+    # 4. LLM: Classify intent (only when the local stage isn't confident)
+    print(f"🧠 Classifier: local confidence {confidence:.2f} too low. Asking the LLM...")
+    record("llm")
+    llm = get_llm("classifier")
     
     system_prompt = """
     You are the Intent Classifier.
@@ -42,9 +60,9 @@ def message_classifier_node(state):
     chain = prompt | llm
     
     try:
-        response = chain.invoke({
+        response = await chain.ainvoke({
             # Check if content exists to tell LLM "Yes"
-            "has_file": "Yes" if file_content else "No",
+            "has_file": "Yes" if has_file else "No",
             "input": user_message
         })
         
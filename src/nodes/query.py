@@ -1,13 +1,44 @@
 import os
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import SystemMessage, AIMessage
 from src.utils.llm_setup import get_llm
 from src.tools import get_all_tools
-from src.utils.vector_store import get_retriever  
+from src.utils.vector_store import get_vector_store
+from src.utils.context import assemble_context, get_token_budget, truncate_to_budget
+from src.utils.session import session_upload_dir
+from src.utils.doc_store import get_document, load_document_text
+from src.utils.tool_budget import bind_tools_within_budget, invoke_within_budget
 
-def query_node(state):
+def indexing_note(document: dict) -> str:
+    """Tells the LLM that only part of the document is searchable yet."""
+    done, total = document.get("pages_done", 0), document.get("pages", 0)
+    print(f"   ⏳ Document still indexing: {done}/{total} pages searchable.")
+    return (
+        f"\n\n[NOTE: The document is still being indexed. Only {done} of {total} pages "
+        "are searchable so far. If the answer is missing, say it may be in a later page.]"
+    )
+
+def indexing_reply(state):
+    """
+    User-facing answer for nodes that need the WHOLE document (summary, quiz) while it
+    is still being indexed (its text is only stored once every page is parsed). None if ready.
+    """
+    if state.get("file_content"):
+        return None
+    document = get_document(state.get("document_id"))
+    if not document or document.get("status") != "indexing":
+        return None
+    done, total = document.get("pages_done", 0), document.get("pages", 0)
+    print(f"   ⏳ Document still indexing ({done}/{total} pages): whole-document request deferred.")
+    return AIMessage(content=(
+        f"⏳ Your document is still being indexed ({done} of {total} pages so far). "
+        "Summaries and quizzes need the whole document, so please try again in a moment. "
+        "You can already ask questions about the indexed pages."
+    ))
+
+async def query_node(state):
     llm = get_llm()
     tools = get_all_tools()
-    llm_with_tools = llm.bind_tools(tools)
+    llm_with_tools, budget_notes = bind_tools_within_budget(llm, tools, state)
     query = state["messages"][-1].content
     
     # --- 1. Intelligent RAG Retrieval (Safety-First) ---
@@ -17,22 +48,26 @@ def query_node(state):
     try:
         # A. READ FROM STATE (Fast! No DB lookup needed)
         total_chunks = state.get("chunk_count", 0)
+
+        # A2. The document handle (server.py resolved its chunk_count from the registry)
+        document_id = state.get("document_id")
+        document = get_document(document_id)
         
-        # B. Safety Cap (Max 50 chunks)
-        # Prevents "Context Window Overflow" on large files
-        safe_k = total_chunks 
-        
-        if safe_k > 0:
-            print(f"   📊 State indicates {total_chunks} total chunks. Fetching {safe_k}...")
+        # B. Token Budget (instead of fetching every chunk)
+        # Best chunks that fit the model's budget; MMR-diverse, de-duplicated, with page labels
+        if total_chunks > 0:
+            print(f"   📊 State indicates {total_chunks} total chunks. Assembling context...")
             
-            # Use the precise K value
-            retriever = get_retriever(k=safe_k, db_type="user")
-            relevant_docs = retriever.invoke(query)
+            store = get_vector_store("user", document_id)
+            context_content, relevant_docs = await assemble_context(
+                query, store, get_token_budget(), max_chunks=total_chunks
+            )
             
             if relevant_docs:
-                docs_text = [doc.page_content for doc in relevant_docs]
-                context_content = "\n\n".join(docs_text)
                 print(f"   ✅ Found {len(relevant_docs)} relevant document chunks.")
+
+                if document and document.get("status") == "indexing":
+                    context_content += indexing_note(document)
         else:
              print("   ℹ️ State indicates 0 chunks (or no file). Skipping vector search.")
             
@@ -41,16 +76,12 @@ def query_node(state):
 
     # Fallback: If retrieval found nothing, use raw file with Safe Limit
     if not context_content:
-        raw_file = state.get("file_content", "") or ""
-        
-        # Limit to 30,000 chars (approx 8k tokens) to prevent LLM crash
-        safe_limit = 30000 
+        raw_file = load_document_text(state) or ""
         
-        if len(raw_file) > safe_limit:
-            context_content = raw_file[:safe_limit]
-            print(f"   ⚠️ Raw file too large. Truncated to {safe_limit} chars.")
-        else:
-            context_content = raw_file
+        # Limit to the same token budget to prevent LLM crash
+        context_content = truncate_to_budget(raw_file, get_token_budget())
+        if len(context_content) < len(raw_file):
+            print(f"   ⚠️ Raw file too large. Truncated to {len(context_content)} chars.")
             
         if raw_file:
             print("   ⚠️ Using raw file fallback.")
@@ -60,7 +91,7 @@ def query_node(state):
 
     if not answer_key:
         # Fallback: Check if a key file exists from a previous turn
-        key_path = os.path.join("uploads", "quiz_solutions.txt")
+        key_path = os.path.join(session_upload_dir(state.get("session_id")), "quiz_solutions.txt")
         if os.path.exists(key_path):
             try:
                 with open(key_path, "r", encoding="utf-8") as f:
@@ -107,9 +138,11 @@ def query_node(state):
     4. **Citations:** Cite the uploaded document or the web source URL.
     """)
 
-    messages_with_prompt = [system_instruction] + state["messages"]
+    messages_with_prompt = [system_instruction] + state["messages"] + budget_notes
     
     print("🌐 Query Node: Invoking LLM...")
-    response = llm_with_tools.invoke(messages_with_prompt)
+    response, timed_out = await invoke_within_budget(llm_with_tools, messages_with_prompt, state)
+    if timed_out:
+        return {"messages": [response], "degraded": True}
 
     return {"messages": [response]}
\ No newline at end of file
@@ -1,12 +1,62 @@
 import os
 from langchain_core.messages import SystemMessage, AIMessage
 from src.utils.llm_setup import get_llm
+from src.utils.session import session_upload_dir
+from src.utils.doc_store import load_document_text, register_inline_document
+from src.nodes.query import indexing_reply
+from src.utils.context import get_token_budget, truncate_to_budget
+from src.utils.question_bank import (
+    LOW_WATERMARK, unseen_count, draw_questions, fill_bank, schedule_top_up
+)
+
+QUIZ_SIZE = 5
+
+def format_quiz(questions: list):
+    """Returns (quiz for the user, answer key) for questions drawn from the bank."""
+    quiz_lines, key_lines = ["## 📝 Quiz"], []
+    for i, q in enumerate(questions, 1):
+        quiz_lines.append(f"\n**{i}. {q['question']}**")
+        quiz_lines.extend(f"- {letter}) {q['options'][letter]}" for letter in "ABCD")
+        key_lines.append(f"{i}. {q['answer']} - {q['explanation']}".rstrip(" -"))
+    return "\n".join(quiz_lines), "\n".join(key_lines)
+
+async def quiz_node(state):
+    # Questions must cover the whole document: wait until indexing is done
+    reply = indexing_reply(state)
+    if reply:
+        return {"messages": [reply], "degraded": True}
 
-def quiz_node(state):
     llm = get_llm()
     
-    # 1. Get raw content (Limit to 50k chars to fit context)
-    context_text = state.get("file_content", "")
+    # 1. Get raw content
+    context_text = load_document_text(state) or ""
+    doc_id = state.get("document_id")
+    if not doc_id and context_text:
+        doc_id = register_inline_document(context_text)  # legacy inline text: its bank is evicted with the doc store
+    session_id = state.get("session_id")
+
+    # --- 2. Question Bank (per document, filled section by section) ---
+    questions = []
+    if doc_id and context_text:
+        try:
+            if unseen_count(doc_id, session_id) < QUIZ_SIZE:
+                print("🏦 Question bank low. Generating questions from sampled sections...")
+                await fill_bank(llm, doc_id, session_id, context_text, QUIZ_SIZE)
+            questions = draw_questions(doc_id, session_id, QUIZ_SIZE)
+
+            # Refill in the background so the next quiz is instant
+            if unseen_count(doc_id, session_id) < LOW_WATERMARK:
+                schedule_top_up(llm, doc_id, context_text)
+        except Exception as e:
+            print(f"   ⚠️ Question bank unavailable ({e}). Generating quiz in one call.")
+
+    if questions:
+        print(f"📝 Serving {len(questions)} questions from the question bank.")
+        quiz_for_user, answer_key = format_quiz(questions)
+        return save_and_return(state, quiz_for_user, answer_key)
+
+    # --- 3. Fallback: one prompt over the (budgeted) document ---
+    context_text = truncate_to_budget(context_text, get_token_budget())
     
     prompt = f"""
     You are a Professor creating a quiz based on the provided text.
@@ -35,10 +85,10 @@ def quiz_node(state):
     messages = [SystemMessage(content=prompt)]
     
     print("📝 Generating Quiz & Answer Key...")
-    response = llm.invoke(messages)
+    response = await llm.ainvoke(messages)
     full_content = response.content
     
-    # --- 2. Parse Output (Split Questions vs. Answers) ---
+    # --- 4. Parse Output (Split Questions vs. Answers) ---
     if "### ANSWER KEY ###" in full_content:
         parts = full_content.split("### ANSWER KEY ###")
         quiz_for_user = parts[0].strip()
@@ -48,10 +98,12 @@ def quiz_node(state):
         quiz_for_user = full_content
         answer_key = "Error: Answer Key not generated. Please check the document content."
 
-    # --- 3. Write Answer Key to File ---
-    # We save it in 'uploads' so it gets cleaned up automatically by your delete endpoint
-    output_dir = "uploads"
-    os.makedirs(output_dir, exist_ok=True)
+    return save_and_return(state, quiz_for_user, answer_key)
+
+def save_and_return(state, quiz_for_user: str, answer_key: str):
+    # --- 5. Write Answer Key to File ---
+    # We save it in the session's 'uploads' folder so it gets cleaned up automatically by your delete endpoint
+    output_dir = session_upload_dir(state.get("session_id"))
     file_path = os.path.join(output_dir, "quiz_solutions.txt")
     
     try:
@@ -61,7 +113,7 @@ def quiz_node(state):
     except Exception as e:
         print(f"❌ Failed to save answer key: {e}")
 
-    # --- 4. Return ---
+    # --- 6. Return ---
     # We still return 'quiz_answers' in state in case other nodes need it immediately
     return {
         "messages": [AIMessage(content=quiz_for_user)],
@@ -1,9 +1,13 @@
 from typing import Literal
 
-def route_decision(state) -> Literal["query", "summarize", "simplify", "quiz", "quiz_grade", "advisor"]:
+def route_decision(state) -> Literal["query", "summarize", "simplify", "quiz", "quiz_grade", "advisor", "cached"]:
     """
     Traffic Cop: Reads state['mode'] and directs to the correct node.
     """
+    # Already answered from the response cache
+    if state.get("cache_hit"):
+        return "cached"
+
     mode = state.get("mode", "query")
 
     # Map the mode string to the exact routing key defined in graph.py
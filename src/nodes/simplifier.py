@@ -1,9 +1,13 @@
 from langchain_core.messages import SystemMessage
 from src.utils.llm_setup import get_llm
 from src.tools import get_all_tools
-from src.utils.vector_store import get_retriever
+from src.utils.vector_store import get_vector_store
+from src.utils.context import assemble_context, get_token_budget, truncate_to_budget
+from src.utils.doc_store import get_document, load_document_text
+from src.nodes.query import indexing_note
+from src.utils.tool_budget import bind_tools_within_budget, invoke_within_budget
 
-def feynman_node(state):
+async def feynman_node(state):
     """
     Explains complex topics simply using the Feynman Technique.
     Leverages pre-calculated chunk counts from State for efficient retrieval.
@@ -19,22 +23,26 @@ def feynman_node(state):
         # A. READ FROM STATE (Fast! No DB lookup needed)
         # server.py already injected 'chunk_count' into the state.
         total_chunks = state.get("chunk_count", 0)
+
+        # A2. The document handle (server.py resolved its chunk_count from the registry)
+        document_id = state.get("document_id")
+        document = get_document(document_id)
         
-        # B. Safety Cap (Max 50 chunks)
-        # 50 chunks * ~500 chars = ~25,000 chars. 
-        # This keeps us safely within Llama3's context window.
-        safe_k = total_chunks
-        
-        if safe_k > 0:
-            print(f"   📊 State indicates {total_chunks} total chunks. Fetching {safe_k}...")
+        # B. Token Budget
+        # Only the best (MMR-diverse, de-duplicated) chunks that fit the model's budget.
+        if total_chunks > 0:
+            print(f"   📊 State indicates {total_chunks} total chunks. Assembling context...")
             
-            # Use the precise K value
-            retriever = get_retriever(k=safe_k, db_type="user")
-            relevant_docs = retriever.invoke(user_input)
+            store = get_vector_store("user", document_id)
+            context_content, relevant_docs = await assemble_context(
+                user_input, store, get_token_budget(), max_chunks=total_chunks
+            )
             
             if relevant_docs:
-                context_content = "\n\n".join([doc.page_content for doc in relevant_docs])
                 print(f"   ✅ Successfully loaded context from {len(relevant_docs)} chunks.")
+
+                if document and document.get("status") == "indexing":
+                    context_content += indexing_note(document)
         else:
             print("   ℹ️ State indicates 0 chunks (or no file). Skipping vector search.")
 
@@ -43,26 +51,21 @@ def feynman_node(state):
 
     # --- 2. Fallback: Raw File Content ---
     if not context_content:
-        raw_file = state.get("file_content", "") or ""
+        raw_file = load_document_text(state) or ""
         
-        # CRITICAL SAFETY LIMIT: 
-        # 200,000 chars is too big. We limit to 30,000 (approx 8k tokens).
-        safe_limit = 30000 
-        
-        if len(raw_file) > safe_limit:
-            print(f"   ⚠️ Raw file is huge. Truncating to first {safe_limit} chars.")
-            context_content = raw_file[:safe_limit]
-        else:
-            context_content = raw_file
+        # CRITICAL SAFETY LIMIT: same token budget as retrieval
+        context_content = truncate_to_budget(raw_file, get_token_budget())
+        if len(context_content) < len(raw_file):
+            print(f"   ⚠️ Raw file is huge. Truncated to first {len(context_content)} chars.")
             
         if context_content:
             print("   ⚠️ Using raw file content as fallback.")
         else:
             print("   ⚠️ No context available (File and DB empty).")
 
-    # --- 3. Bind Tools ---
+    # --- 3. Bind Tools (unless the request's tool budget is used up) ---
     tools = get_all_tools()
-    llm_with_tools = llm.bind_tools(tools)
+    llm_with_tools, budget_notes = bind_tools_within_budget(llm, tools, state)
     
     # --- 4. Construct Feynman Prompt ---
     system_prompt = f"""
@@ -88,11 +91,13 @@ def feynman_node(state):
     """
     
     # Use SystemMessage to properly set the AI's persona
-    messages = [SystemMessage(content=system_prompt)] + state["messages"]
+    messages = [SystemMessage(content=system_prompt)] + state["messages"] + budget_notes
     
     print("💡 Feynman Agent: Generating explanation...")
     
-    # --- 5. Invoke ---
-    response = llm_with_tools.invoke(messages)
+    # --- 5. Invoke (capped by the request deadline) ---
+    response, timed_out = await invoke_within_budget(llm_with_tools, messages, state)
+    if timed_out:
+        return {"messages": [response], "degraded": True}
     
     return {"messages": [response]}
\ No newline at end of file
@@ -1,21 +1,41 @@
 from langchain_core.messages import SystemMessage
 from src.utils.llm_setup import get_llm
-from src.utils.vector_store import get_retriever  # <--- Import your Vector logic
+from src.utils.doc_store import load_document_text
+from src.utils.context import get_token_budget, truncate_to_budget
+from src.utils.map_reduce import needs_map_reduce, map_reduce_summary
+from src.nodes.query import indexing_reply
 
-def summarizer_node(state):
+async def summarizer_node(state):
     """
-    Summarizes the document using Vector Store (RAG) to handle large files.
+    Summarizes the document. Small files go into one prompt; large files are
+    summarized section by section (map-reduce) and the partial summaries merged.
     """
+    # A partial document would give a partial summary: wait until indexing is done
+    reply = indexing_reply(state)
+    if reply:
+        return {"messages": [reply], "degraded": True}
+
     llm = get_llm()
     user_query = state["messages"][-1].content
     
-    context_content = state.get("file_content", "")
+    context_content = load_document_text(state) or ""
+    context_label = "Retrieved from Document"
+
+    # --- Large documents: hierarchical summary ---
+    if needs_map_reduce(context_content):
+        print("📝 Document exceeds the context budget. Using map-reduce summarization...")
+        try:
+            context_content = await map_reduce_summary(llm, context_content)
+            context_label = "Section Summaries of the Document"
+        except Exception as e:
+            print(f"   ⚠️ Map-reduce failed ({e}). Falling back to the beginning of the document.")
+        context_content = truncate_to_budget(context_content, get_token_budget())
 
     # We put the text into a SystemMessage for better instruction following.
     system_prompt = f"""
     You are an expert Study Assistant.
     
-    ### CONTEXT (Retrieved from Document)
+    ### CONTEXT ({context_label})
     {context_content}
     
     ### INSTRUCTIONS
@@ -30,6 +50,6 @@ def summarizer_node(state):
     messages = [SystemMessage(content=system_prompt)] + state["messages"]
     
     print("📝 Generating Summary...")
-    response = llm.invoke(messages)
+    response = await llm.ainvoke(messages)
     
     return {"messages": [response]}
\ No newline at end of file
@@ -4,8 +4,14 @@ from langgraph.graph.message import add_messages
 
 class AgentState(TypedDict):
     messages : Annotated[List[BaseMessage], add_messages]
+    session_id : Optional[str] # isolates uploads & vector collection per user session
     filename : Optional[str]
-    file_content : Optional[str] # file PDF if loaded
+    document_id : Optional[str] # handle of the uploaded file in the doc store (text resolved lazily)
+    file_content : Optional[str] # legacy: file text sent inline by old clients
     mode: Optional[str] # mode determined by classifer
     chunk_count: int
-    quiz_answers: Optional[str]
\ No newline at end of file
+    quiz_answers: Optional[str]
+    cache_hit: Optional[bool] # answered from the response cache
+    deadline: Optional[float] # epoch seconds by which the request must be answered
+    tool_rounds: int # agent -> tools cycles used so far
+    degraded: Optional[bool] # a tool timed out / was skipped (answer not cached)
\ No newline at end of file
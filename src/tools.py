@@ -1,8 +1,6 @@
 import os
 import base64
-import requests
 import mimetypes
-from bs4 import BeautifulSoup
 
 from langchain_community.utilities import SerpAPIWrapper 
 from langchain_community.utilities import ArxivAPIWrapper, WikipediaAPIWrapper, WolframAlphaAPIWrapper
@@ -13,6 +11,10 @@ from langchain_core.tools import tool
 from langchain_core.messages import HumanMessage
 from langchain_tavily import TavilySearch
 
+from src.utils.tool_cache import with_cache
+from src.utils.fetcher import fetch_text
+from src.utils.research import deep_research as research
+
 try:
     from langchain_ollama import ChatOllama
 except ImportError:
@@ -20,7 +22,7 @@ except ImportError:
 
 
 @tool
-def ncku_faculty_search(professor_name: str):
+async def ncku_faculty_search(professor_name: str):
     """
     Specifically searches for a professor's latest contact info or lab page 
     on the NCKU CSIE website domain.
@@ -28,95 +30,45 @@ def ncku_faculty_search(professor_name: str):
     search = SerpAPIWrapper()
     # We force the search to restrict results to the university domain
     query = f"site:csie.ncku.edu.tw {professor_name} lab research interests"
-    return search.run(query)
+    return await search.arun(query)
 
 # --- 1. Helper Function for Scraping (Reusable) ---
-def scrape_url(url: str):
+async def scrape_url(url: str):
     """
-    Helper function to scrape text from a URL using BeautifulSoup.
+    Scrapes the readable text of a URL through the shared fetcher
+    (pooled connections, byte budget, lxml text extraction).
     """
-    try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        
-        if response.status_code != 200:
-            return f"Error: Failed to load page (Status: {response.status_code})"
-            
-        soup = BeautifulSoup(response.content, "html.parser")
-        
-        # Cleanup: Remove scripts, styles, nav, footer
-        for script in soup(["script", "style", "nav", "footer", "header", "aside"]):
-            script.decompose()
-            
-        text = soup.get_text(separator="\n")
-        
-        # Clean whitespace
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-        clean_text = "\n".join(lines)
-        
-        return clean_text[:30000] 
-    except Exception as e:
-        return f"Scraping failed: {str(e)}"
+    return await fetch_text(url, max_chars=30000)
 
 # --- 2. The Individual Tools (UPDATED) ---
 
 @tool
-def google_search(query: str):
+async def google_search(query: str):
     """
     Performs a standard Google Search using SerpAPI.
     Returns snippets only. Good for quick facts.
     """
     # Requires SERPAPI_API_KEY in .env
     search = SerpAPIWrapper()
-    return search.run(query)
+    return await search.arun(query)
 
 @tool
-def scrape_website(url: str):
+async def scrape_website(url: str):
     """
     Scrapes the text content from a specific URL.
     Use this if you already have a link you want to read.
     """
-    return scrape_url(url)
+    return await scrape_url(url)
 
 @tool
-def deep_research(query: str):
+async def deep_research(query: str):
     """
-    COMBINED TOOL: Searches Google (via SerpAPI) AND scrapes the top result.
+    COMBINED TOOL: Searches Google (via SerpAPI), reads the top results in parallel
+    and returns the passages most relevant to the query, with their source URLs.
     Use this for comprehensive research on a specific topic.
     """
     try:
-        # A. Search
-        search = SerpAPIWrapper()
-        results = search.results(query)
-        
-        # B. Handle SerpAPI JSON Structure (Different from Serper)
-        # SerpAPI uses 'organic_results' instead of 'organic'
-        if "organic_results" not in results or not results["organic_results"]:
-            return "No search results found on Google."
-            
-        # Get the best link (Top 1)
-        top_result = results["organic_results"][0]
-        link = top_result.get("link")
-        title = top_result.get("title")
-        snippet = top_result.get("snippet")
-        
-        print(f"🔗 Found Link: {link} ({title})")
-        
-        # C. Scrape it
-        page_content = scrape_url(link)
-        
-        return f"""
-        ### RESEARCH RESULT
-        **Source:** {title}
-        **URL:** {link}
-        **Google Snippet:** {snippet}
-        
-        ### FULL PAGE CONTENT:
-        {page_content}
-        """
-        
+        return await research(query, max_passages=6)
     except Exception as e:
         return f"Deep research failed: {e}"
 
@@ -151,13 +103,14 @@ def python_calculator(code: str):
         return f"Error executing code: {e}"
 
 def get_all_tools():
+    # Network tools go through the persistent tool cache (per-tool TTLs)
     return [
-        get_web_search_tool(),
-        get_arxiv_tool(),
-        get_wiki_tool(),
-        get_wolfram_tool(),
-        python_calculator,
-        google_search,    # Now uses SerpAPI
-        scrape_website,
-        deep_research,    # Now uses SerpAPI
+        with_cache(get_web_search_tool()),
+        with_cache(get_arxiv_tool()),
+        with_cache(get_wiki_tool()),
+        with_cache(get_wolfram_tool()),
+        python_calculator,                # local, nothing to cache
+        with_cache(google_search),        # Now uses SerpAPI
+        with_cache(scrape_website),
+        with_cache(deep_research),        # Now uses SerpAPI
     ]
\ No newline at end of file
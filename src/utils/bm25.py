@@ -0,0 +1,68 @@
+import re
+import math
+from collections import Counter
+
+# Latin words / numbers, or runs of CJK characters (Chinese, Japanese kana)
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:['_][a-z0-9]+)*|[぀-ヿ㐀-䶿一-鿿]+")
+_CJK_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿]")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "where", "which",
+    "who", "why", "with", "does", "do", "can", "i", "me", "my", "you",
+}
+
+
+def tokenize(text: str) -> list:
+    """
+    Lowercased word tokens. Chinese has no spaces, so CJK runs become
+    overlapping character bigrams ('機器學習' -> '機器', '器學', '學習').
+    """
+    tokens = []
+    for match in _TOKEN_RE.findall((text or "").lower()):
+        if _CJK_RE.match(match):
+            if len(match) == 1:
+                tokens.append(match)
+            else:
+                tokens.extend(match[i:i + 2] for i in range(len(match) - 1))
+        elif match not in STOPWORDS:
+            tokens.append(match)
+    return tokens
+
+
+class BM25:
+    """Okapi BM25 over a small in-memory corpus (no external dependency)."""
+
+    def __init__(self, corpus_tokens: list, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_freqs = [Counter(tokens) for tokens in corpus_tokens]
+        self.doc_lens = [len(tokens) for tokens in corpus_tokens]
+        self.avg_len = (sum(self.doc_lens) / len(self.doc_lens)) if self.doc_lens else 0.0
+
+        df = Counter()
+        for freqs in self.doc_freqs:
+            df.update(freqs.keys())
+        n = len(corpus_tokens)
+        self.idf = {term: math.log(1 + (n - f + 0.5) / (f + 0.5)) for term, f in df.items()}
+
+    def scores(self, query_tokens: list) -> list:
+        results = []
+        for freqs, length in zip(self.doc_freqs, self.doc_lens):
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_len) if self.avg_len else self.k1
+            score = 0.0
+            for term in query_tokens:
+                tf = freqs.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            results.append(score)
+        return results
+
+
+def rank(query: str, texts: list, top_k: int = None) -> list:
+    """[(index, score), ...] of texts sorted by BM25 relevance to query (zero scores dropped)."""
+    if not texts:
+        return []
+    scores = BM25([tokenize(t) for t in texts]).scores(tokenize(query))
+    ranked = sorted(((i, s) for i, s in enumerate(scores) if s > 0), key=lambda x: x[1], reverse=True)
+    return ranked[:top_k] if top_k else ranked
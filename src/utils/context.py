@@ -0,0 +1,118 @@
+import os
+import math
+import hashlib
+
+# --- CONFIG ---
+CHARS_PER_TOKEN = 4  # rough average for English/Markdown; no tokenizer download needed
+
+# Context window (tokens) of the models we run. Retrieved context may use CONTEXT_SHARE of it,
+# capped at MAX_CONTEXT_TOKENS: prompt length is what drives latency on the remote endpoint.
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-oss": 131072,
+    "llama3": 8192,
+    "llama3.1": 131072,
+    "qwen2.5": 32768,
+    "mistral": 32768,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+CONTEXT_SHARE = 0.5
+MAX_CONTEXT_TOKENS = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+
+AVG_CHUNK_TOKENS = 250  # 1000-char chunks from the user splitter
+
+
+def count_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per token)."""
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def get_token_budget(model: str = None, share: float = CONTEXT_SHARE) -> int:
+    """
+    Token budget for retrieved context, derived from the model's context window.
+    model defaults to OLLAMA_MODEL; 'gpt-oss:20b' is looked up as 'gpt-oss'.
+    """
+    model = (model or os.getenv("OLLAMA_MODEL") or "").lower()
+    window = MODEL_CONTEXT_WINDOWS.get(model) or MODEL_CONTEXT_WINDOWS.get(model.split(":")[0], DEFAULT_CONTEXT_WINDOW)
+    return min(int(window * share), MAX_CONTEXT_TOKENS)
+
+
+def truncate_to_budget(text: str, token_budget: int) -> str:
+    """Hard cut for raw text (used when there is no vector index to select from)."""
+    return (text or "")[:token_budget * CHARS_PER_TOKEN]
+
+
+def default_formatter(doc) -> str:
+    """'[Source: file.pdf | page 3]' header followed by the chunk text."""
+    source = doc.metadata.get("source", "document")
+    page = doc.metadata.get("page")
+    header = f"[Source: {source} | page {page}]" if page else f"[Source: {source}]"
+    return f"{header}\n{doc.page_content}"
+
+
+def _merge_overlaps(docs: list) -> list:
+    """
+    Neighbouring chunks share ~100 chars (splitter overlap). When both were selected,
+    cut the repeated prefix from the later one so the LLM doesn't read it twice.
+    Only chunks with a 'start_index' (same source & page) can be merged.
+    """
+    positioned = [d for d in docs if "start_index" in d.metadata]
+    others = [d for d in docs if "start_index" not in d.metadata]
+
+    def key(d):
+        return (d.metadata.get("source", ""), d.metadata.get("page", 0), d.metadata["start_index"])
+
+    merged = []
+    for doc in sorted(positioned, key=key):
+        prev = merged[-1] if merged else None
+        if prev is not None and key(prev)[:2] == key(doc)[:2]:
+            prev_end = prev.metadata["start_index"] + len(prev.page_content)
+            overlap = prev_end - doc.metadata["start_index"]
+            if overlap >= len(doc.page_content):
+                continue  # fully contained in the previous chunk
+            if overlap > 0:
+                prev.page_content += doc.page_content[overlap:]
+                continue
+            if overlap == 0:
+                prev.page_content += doc.page_content
+                continue
+        merged.append(doc.model_copy(deep=True))
+    return merged + others
+
+
+async def assemble_context(query: str, store, token_budget: int, formatter=default_formatter,
+                           max_chunks: int = None, lambda_mult: float = 0.6, search_filter: dict = None):
+    """
+    Picks the best chunks for `query` from a Chroma `store` without exceeding `token_budget`.
+
+    1. MMR retrieval (relevance + diversity, so we don't get 10 near-identical chunks).
+    2. Greedy packing in MMR order until the budget is full; exact duplicates skipped.
+    3. Overlapping neighbours merged, each block labelled with its source/page.
+
+    Returns (context_text, selected_docs).
+    """
+    k = max(4, math.ceil(token_budget / AVG_CHUNK_TOKENS * 1.5))
+    if max_chunks:
+        k = min(k, max_chunks)
+    search_kwargs = {"k": k, "fetch_k": k * 3, "lambda_mult": lambda_mult}
+    if search_filter:
+        search_kwargs["filter"] = search_filter
+
+    retriever = store.as_retriever(search_type="mmr", search_kwargs=search_kwargs)
+    candidates = await retriever.ainvoke(query)
+
+    selected, seen, used = [], set(), 0
+    for doc in candidates:
+        digest = hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+        if digest in seen:
+            continue
+        cost = count_tokens(formatter(doc))
+        if used + cost > token_budget:
+            continue  # a smaller chunk further down may still fit
+        seen.add(digest)
+        selected.append(doc)
+        used += cost
+
+    blocks = [formatter(doc) for doc in _merge_overlaps(selected)]
+    context_text = "\n\n".join(blocks)
+    print(f"   🧩 Context: {len(selected)}/{len(candidates)} chunks, ~{count_tokens(context_text)}/{token_budget} tokens.")
+    return context_text, selected
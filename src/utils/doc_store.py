@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from src.utils.pdf_loader import DOC_STORE_DIR, clear_cache, get_from_cache
+from src.utils.session import safe_session_id
+from src.utils.vector_store import clear_database
+from src.utils.response_cache import invalidate_document
+
+# --- CONFIG ---
+# Every uploaded file is stored once, under the SHA-256 of its bytes (= document id):
+#   data/doc_store/<doc_id>/content.md   -> extracted Markdown   (pdf_loader cache)
+#   chroma_db_user, collection doc_<id>  -> chunks, metadata & vectors (vector_store)
+#   data/doc_store/manifest.json         -> document metadata + session -> document pointers
+# Re-uploading a known file only moves the session's pointer. The raw upload
+# (uploads/<session>/) is deleted once ingested, so DOC_STORE_MAX_MB bounds what stays on disk.
+MANIFEST_PATH = os.path.join(DOC_STORE_DIR, "manifest.json")
+DOC_STORE_MAX_MB = float(os.getenv("DOC_STORE_MAX_MB", "2048"))
+VECTOR_BYTES_PER_CHUNK = 768 * 4 + 1200  # float32 vector + chunk text/metadata (estimate)
+HASH_BLOCK_SIZE = 1024 * 1024
+
+_lock = threading.Lock()
+_manifest = None
+
+
+# --- MANIFEST ---
+
+def _load():
+    global _manifest
+    if _manifest is None:
+        _manifest = {"documents": {}, "sessions": {}}
+        if os.path.exists(MANIFEST_PATH):
+            try:
+                with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+                    _manifest = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Doc Store: manifest unreadable ({e}). Starting empty.")
+        # Ingestion jobs live in this process: one left 'indexing' on disk was cut off by a crash/restart
+        for meta in _manifest["documents"].values():
+            if meta.get("status") == "indexing":
+                meta["status"] = "error"
+                meta["error"] = "interrupted"
+    return _manifest
+
+
+def _save():
+    os.makedirs(DOC_STORE_DIR, exist_ok=True)
+    with open(MANIFEST_PATH + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(_manifest, f, ensure_ascii=False, indent=2)
+    os.replace(MANIFEST_PATH + ".tmp", MANIFEST_PATH)
+
+
+def save_upload(src, dest_path: str) -> str:
+    """
+    Copies an uploaded file object to disk block by block, hashing as it streams.
+    Returns the SHA-256 hex digest, which is the document id.
+    """
+    sha = hashlib.sha256()
+    with open(dest_path, "wb") as out:
+        while True:
+            block = src.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            sha.update(block)
+            out.write(block)
+    return sha.hexdigest()
+
+
+def get_document(doc_id: str):
+    """Metadata of a stored document, or None."""
+    if not doc_id:
+        return None
+    with _lock:
+        meta = _load()["documents"].get(doc_id)
+        return dict(meta) if meta else None
+
+
+def register_document(doc_id: str, **fields):
+    """Creates or updates a document's metadata (status, filename, pages, chunk_count, ...)."""
+    with _lock:
+        docs = _load()["documents"]
+        meta = docs.setdefault(doc_id, {"doc_id": doc_id, "created_at": time.time()})
+        meta.update(fields)
+        meta["last_used"] = time.time()
+        _save()
+
+
+def touch_document(doc_id: str):
+    register_document(doc_id)
+
+
+def register_inline_document(text: str) -> str:
+    """
+    Legacy clients send text inline ('file_content'). It gets a manifest entry too
+    (id = SHA-256 of the text), so what is stored for it (question bank, cached
+    answers) is evicted by the LRU like any upload. Returns the document id.
+    """
+    doc_id = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    is_new = get_document(doc_id) is None
+    register_document(doc_id, status="ready", filename="inline text", inline=True,
+                      text_bytes=len(text.encode("utf-8")))
+    if is_new:
+        enforce_size_limit(keep=(doc_id,))
+    return doc_id
+
+
+def document_summary(doc_id: str):
+    """Public metadata returned to clients (no text)."""
+    meta = get_document(doc_id)
+    if not meta:
+        return None
+    return {
+        "document_id": doc_id,
+        "filename": meta.get("filename"),
+        "status": meta.get("status"),
+        "pages": meta.get("pages", 0),
+        "pages_done": meta.get("pages_done", 0),
+        "chunk_count": meta.get("chunk_count", 0),
+        "token_estimate": meta.get("token_estimate", 0),
+    }
+
+
+def load_document_text(state) -> str:
+    """
+    Full text of the document a graph run is about, resolved lazily.
+    Legacy clients may still send the text inline as 'file_content';
+    otherwise it is read from the doc store by 'document_id'.
+    """
+    inline = state.get("file_content")
+    if inline:
+        return inline
+    return get_from_cache(state.get("document_id"))
+
+
+# --- SESSION POINTERS ---
+
+def attach_session(session_id: str, doc_id: str):
+    """Makes doc_id the active document of a session (the 'pointer swap')."""
+    with _lock:
+        _load()["sessions"][safe_session_id(session_id)] = doc_id
+        _save()
+    touch_document(doc_id)
+
+
+def detach_session(session_id: str):
+    with _lock:
+        _load()["sessions"].pop(safe_session_id(session_id), None)
+        _save()
+
+
+def get_session_document(session_id: str):
+    """Document id the session is currently working with (or None)."""
+    with _lock:
+        return _load()["sessions"].get(safe_session_id(session_id))
+
+
+# --- EVICTION ---
+
+def document_size(meta: dict) -> int:
+    return meta.get("text_bytes", 0) + meta.get("chunk_count", 0) * VECTOR_BYTES_PER_CHUNK
+
+
+def enforce_size_limit(keep: tuple = ()):
+    """
+    Evicts least recently used documents until the store fits DOC_STORE_MAX_MB.
+    Documents that a session points to, that are still indexing, or listed in keep are kept;
+    failed or interrupted ingestions are evicted like finished ones.
+    """
+    limit = DOC_STORE_MAX_MB * 1024 * 1024
+    with _lock:
+        manifest = _load()
+        docs = manifest["documents"]
+        in_use = set(manifest["sessions"].values()) | set(keep)
+        total = sum(document_size(m) for m in docs.values())
+
+        candidates = sorted(
+            (m for m in docs.values() if m["doc_id"] not in in_use and m.get("status") != "indexing"),
+            key=lambda m: m["last_used"],
+        )
+        evicted = []
+        for meta in candidates:
+            if total <= limit:
+                break
+            total -= document_size(meta)
+            evicted.append(docs.pop(meta["doc_id"]))
+        if evicted:
+            _save()
+
+    for meta in evicted:
+        doc_id = meta["doc_id"]
+        clear_cache(doc_id)
+        if not meta.get("inline"):
+            clear_database(doc_id)  # inline text is never indexed
+        invalidate_document(doc_id)
+        print(f"🧹 Doc Store: evicted document {doc_id[:12]} (LRU).")
+    return [meta["doc_id"] for meta in evicted]
@@ -0,0 +1,135 @@
+import os
+import hashlib
+from array import array
+from collections import OrderedDict
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from src.utils.sqlite_kv import SqliteKV
+
+# --- CONFIG ---
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "data/embedding_cache.sqlite3")  # 🔒 Permanent
+# Queries are one-off user text: kept in a small in-memory LRU, never written to disk
+QUERY_CACHE_SIZE = int(os.getenv("EMBED_QUERY_CACHE_SIZE", "256"))
+
+
+def text_hash(text: str) -> str:
+    """Content address of a chunk."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps any LangChain Embeddings with an on-disk cache keyed by
+    (embedding model, sha256 of the text). Vectors are stored as float32 blobs.
+    Only cache misses are sent to the underlying model (in one batch).
+    Query embeddings only go to a bounded in-memory LRU (query_cache_size entries).
+    """
+
+    def __init__(self, underlying: Embeddings, model_name: str, path: str = EMBED_CACHE_PATH,
+                 query_cache_size: int = QUERY_CACHE_SIZE):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.path = path
+        self.query_cache_size = query_cache_size
+        self.hits = 0
+        self.misses = 0
+        self._queries = OrderedDict()
+
+        self._db = SqliteKV(
+            path,
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, hash))",
+        )
+
+    # --- Storage helpers ---
+
+    def _lookup(self, hashes: List[str]) -> dict:
+        rows = self._db.fetch_in(
+            "SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({})", [self.model_name], hashes
+        )
+        return {h: array("f", blob).tolist() for h, blob in rows}
+
+    def _store(self, items: dict):
+        self._db.execute_many(
+            "INSERT OR REPLACE INTO embeddings (model, hash, vector) VALUES (?, ?, ?)",
+            [(self.model_name, h, array("f", vec).tobytes()) for h, vec in items.items()],
+        )
+
+    def _cached_query(self, text: str):
+        h = text_hash(text)
+        vector = self._queries.get(h)
+        if vector is None:
+            self.misses += 1
+            return h, None
+        self._queries.move_to_end(h)
+        self.hits += 1
+        return h, vector
+
+    def _remember_query(self, h: str, vector: List[float]):
+        if self.query_cache_size <= 0:
+            return
+        self._queries[h] = vector
+        self._queries.move_to_end(h)
+        while len(self._queries) > self.query_cache_size:
+            self._queries.popitem(last=False)
+
+    def _split(self, texts: List[str]):
+        """Returns (hashes, cached vectors, unique texts that still need embedding)."""
+        hashes = [text_hash(t) for t in texts]
+        cached = self._lookup(list(set(hashes)))
+
+        missing = {}
+        for h, t in zip(hashes, texts):
+            if h not in cached:
+                missing.setdefault(h, t)
+
+        self.hits += len(texts) - sum(1 for h in hashes if h in missing)
+        self.misses += len(missing)
+        return hashes, cached, missing
+
+    # --- Embeddings interface ---
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes, cached, missing = self._split(texts)
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            new = dict(zip(missing.keys(), vectors))
+            self._store(new)
+            cached.update(new)
+        return [cached[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        h, vector = self._cached_query(text)
+        if vector is None:
+            vector = self.underlying.embed_query(text)
+            self._remember_query(h, vector)
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes, cached, missing = self._split(texts)
+        if missing:
+            vectors = await self.underlying.aembed_documents(list(missing.values()))
+            new = dict(zip(missing.keys(), vectors))
+            self._store(new)
+            cached.update(new)
+        return [cached[h] for h in hashes]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        h, vector = self._cached_query(text)
+        if vector is None:
+            vector = await self.underlying.aembed_query(text)
+            self._remember_query(h, vector)
+        return vector
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "cached_queries": len(self._queries),
+        }
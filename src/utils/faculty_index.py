@@ -0,0 +1,119 @@
+import os
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from src.utils.vector_store import get_vector_store
+
+# --- CONFIG ---
+FACULTY_BACKEND = os.getenv("FACULTY_BACKEND", "numpy")            # "numpy" (in-memory matrix) or "chroma"
+FACULTY_INDEX_DTYPE = os.getenv("FACULTY_INDEX_DTYPE", "float32")  # "float16" halves memory, but is slower on most CPUs
+
+# --- SHARED STATE ---
+# The loaded matrix index; replaced as a whole on reload, so readers never see a half-built one
+_index = None
+
+
+class MatrixIndex(VectorStore):
+    """
+    Read-only, in-memory copy of a Chroma collection: one L2-normalized row per chunk
+    in a contiguous matrix. A query is one matrix-vector product plus argpartition.
+    Scores are squared L2 distances between unit vectors (2 - 2*cos), the same
+    metric Chroma uses by default, so callers can switch backends transparently.
+    """
+
+    def __init__(self, ids: list, documents: list, matrix: np.ndarray, embedding):
+        self.ids = ids
+        self.documents = documents
+        self.matrix = matrix
+        self._embedding = embedding
+
+    @classmethod
+    def from_chroma(cls, store, dtype: str = FACULTY_INDEX_DTYPE) -> "MatrixIndex":
+        data = store.get(include=["embeddings", "documents", "metadatas"])
+        vectors = np.asarray(data["embeddings"], dtype=np.float32)
+        if vectors.size:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        matrix = np.ascontiguousarray(vectors, dtype=dtype)
+        documents = [
+            Document(page_content=text or "", metadata=metadata or {}, id=doc_id)
+            for doc_id, text, metadata in zip(data["ids"], data["documents"], data["metadatas"])
+        ]
+        return cls(list(data["ids"]), documents, matrix, store.embeddings)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    def search_vector(self, vector, k: int = 4) -> list:
+        """[(Document, distance), ...] closest first."""
+        if not len(self):
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        similarities = self.matrix @ query.astype(self.matrix.dtype)
+        k = min(k, len(self))
+        # argpartition finds the k best in O(n); only those k are sorted
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [(self.documents[i], float(2.0 - 2.0 * similarities[i])) for i in top]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> list:
+        return self.search_vector(self._embedding.embed_query(query), k)
+
+    async def asimilarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> list:
+        return self.search_vector(await self._embedding.aembed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> list:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs) -> list:
+        return [doc for doc, _ in await self.asimilarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        return lambda distance: 1.0 - distance / 2.0  # back to cosine similarity
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError("MatrixIndex is read-only: write to Chroma, then reload_faculty_index().")
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError("Build a MatrixIndex with MatrixIndex.from_chroma().")
+
+
+def reload_faculty_index():
+    """
+    (Re)builds the in-memory matrix from faculty_rag_collection and swaps it in.
+    Called at startup and after every faculty re-index; the previous matrix keeps
+    serving until the new one is ready (or if loading fails).
+    """
+    global _index
+    if FACULTY_BACKEND != "numpy":
+        return None
+    start = time.perf_counter()
+    try:
+        index = MatrixIndex.from_chroma(get_vector_store("faculty"))
+    except Exception as e:
+        print(f"⚠️ Faculty matrix index not loaded (using Chroma): {e}")
+        return _index
+    _index = index
+    print(
+        f"🧮 Faculty index in memory: {len(index)} chunks x {index.matrix.shape[1] if len(index) else 0} "
+        f"({index.matrix.dtype}, {index.matrix.nbytes / 1024:.0f} KB) in {(time.perf_counter() - start) * 1000:.0f}ms."
+    )
+    return index
+
+
+def get_faculty_store():
+    """Faculty search backend: the in-memory matrix when enabled and non-empty, otherwise Chroma."""
+    if FACULTY_BACKEND == "numpy":
+        if _index is None:
+            reload_faculty_index()
+        if _index is not None and len(_index):
+            return _index
+    return get_vector_store("faculty")
@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import asyncio
+
+from src.utils.scrape_professor import scrape_ncku_professors, save_professors, PROFESSORS_JSON
+from src.utils.vector_store import get_vector_store, professor_id, professor_hash, professor_documents
+from src.utils.faculty_index import reload_faculty_index
+from src.utils.response_cache import invalidate_mode
+from src.utils.warmup import mark
+
+# --- CONFIG ---
+FACULTY_REFRESH_HOURS = float(os.getenv("FACULTY_REFRESH_HOURS", "24"))  # 0 disables the scheduled refresh
+MIN_PROFESSORS = 5  # a scrape returning fewer than this is treated as a failure, not mass removal
+
+# --- SHARED STATE ---
+_refresh_lock = None
+_last_refresh = {}
+
+
+def load_saved_professors(path: str = PROFESSORS_JSON) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def diff_professors(old: list, new: list) -> dict:
+    """
+    Compares two scrapes by stable professor id and content hash.
+    Returns {"added": [prof], "changed": [(old, new)], "removed": [prof], "unchanged": n}.
+    """
+    old_by_id = {professor_id(p): p for p in old}
+    new_by_id = {professor_id(p): p for p in new}
+    diff = {"added": [], "changed": [], "removed": [], "unchanged": 0}
+    for pid, prof in new_by_id.items():
+        before = old_by_id.get(pid)
+        if before is None:
+            diff["added"].append(prof)
+        elif professor_hash(before) != professor_hash(prof):
+            diff["changed"].append((before, prof))
+        else:
+            diff["unchanged"] += 1
+    diff["removed"] = [p for pid, p in old_by_id.items() if pid not in new_by_id]
+    return diff
+
+
+def _chunk_ids(db, prof: dict) -> set:
+    """
+    Ids of a professor's chunks: by professor_id, plus chunks indexed before stable
+    ids (no professor_id in their metadata) that carry the professor's name.
+    Chunks of another professor id with the same name (a renamed profile URL) are not included.
+    """
+    found = set(db.get(where={"professor_id": professor_id(prof)})["ids"])
+    legacy = db.get(where={"name": prof.get("name", "Unknown")}, include=["metadatas"])
+    found.update(i for i, m in zip(legacy["ids"], legacy["metadatas"]) if not (m or {}).get("professor_id"))
+    return found
+
+
+def apply_diff(diff: dict) -> int:
+    """
+    Upserts added/changed professors, then deletes their stale chunks and the
+    removed professors' chunks. New chunks go in before old ones go out, so a
+    changed professor is never missing from the collection, and an id written
+    in this refresh is never deleted by it. Returns chunks written.
+    """
+    db = get_vector_store("faculty")
+    written = 0
+    upserted = set()
+    stale = set()
+    for before, prof in [(None, p) for p in diff["added"]] + diff["changed"]:
+        docs, ids = professor_documents(prof)
+        stale |= (_chunk_ids(db, before) if before else set()) | _chunk_ids(db, prof)
+        if docs:
+            db.add_documents(docs, ids=ids)  # upsert: same id, new content
+            written += len(docs)
+            upserted.update(ids)
+
+    for prof in diff["removed"]:
+        stale |= _chunk_ids(db, prof)
+
+    stale -= upserted
+    if stale:
+        db.delete(ids=list(stale))
+    if not db.get(limit=1)["ids"]:
+        raise RuntimeError("the faculty collection is empty after the update")
+    return written
+
+
+async def refresh_faculty() -> dict:
+    """
+    Incremental faculty update: re-scrape (conditional GET), diff against
+    professors.json, re-embed only added/changed professors and delete removed ones.
+    The in-memory index keeps serving the old data until everything is committed,
+    then professors.json is replaced and the index reloaded.
+    """
+    global _refresh_lock, _last_refresh
+    if _refresh_lock is None:
+        _refresh_lock = asyncio.Lock()
+    if _refresh_lock.locked():
+        return {"status": "already_running"}
+
+    async with _refresh_lock:
+        start = time.perf_counter()
+        print("🔄 Faculty Refresh: checking the NCKU faculty page...")
+
+        # --- 1. Scrape (without touching the saved file) ---
+        new = await scrape_ncku_professors(save=False)
+        if len(new) < MIN_PROFESSORS:
+            print(f"   ⚠️ Faculty Refresh: scrape returned {len(new)} professors. Keeping the current index.")
+            _last_refresh = {"status": "scrape_failed", "professors": len(new), "at": time.time()}
+            return _last_refresh
+
+        # --- 2. Diff by content hash ---
+        old = load_saved_professors()
+        diff = diff_professors(old, new)
+        summary = {
+            "added": len(diff["added"]),
+            "changed": len(diff["changed"]),
+            "removed": len(diff["removed"]),
+            "unchanged": diff["unchanged"],
+        }
+
+        # --- 3. Apply (blocking Chroma / embedding calls off the event loop) ---
+        if diff["added"] or diff["changed"] or diff["removed"]:
+            try:
+                summary["chunks_written"] = await asyncio.to_thread(apply_diff, diff)
+            except Exception as e:
+                print(f"   ❌ Faculty Refresh failed, professors.json left as is: {e}")
+                _last_refresh = {"status": "index_failed", "error": str(e), "at": time.time(), **summary}
+                return _last_refresh
+
+            # --- 4. Commit: new file, new in-memory index, stale advisor answers dropped ---
+            save_professors(new)
+            await asyncio.to_thread(reload_faculty_index)
+            invalidate_mode("advisor")
+            mark("faculty_index", True)
+            status = "updated"
+        else:
+            status = "unchanged"
+
+        _last_refresh = {"status": status, **summary, "seconds": round(time.perf_counter() - start, 2), "at": time.time()}
+        print(f"   ✅ Faculty Refresh: {status} (+{summary['added']} ~{summary['changed']} -{summary['removed']}).")
+        return _last_refresh
+
+
+def get_refresh_status() -> dict:
+    return _last_refresh
+
+
+async def refresh_loop(interval_hours: float = FACULTY_REFRESH_HOURS):
+    """Background task: refreshes the faculty index every interval_hours (cancelled on shutdown)."""
+    if interval_hours <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        try:
+            await refresh_faculty()
+        except Exception as e:
+            print(f"⚠️ Scheduled faculty refresh failed: {e}")
@@ -0,0 +1,156 @@
+import os
+import json
+
+from src.utils.bm25 import BM25, tokenize
+from src.utils.faculty_index import get_faculty_store
+
+# --- CONFIG ---
+PROFESSORS_JSON = "data/professors.json"
+ADVISOR_TOP_N = int(os.getenv("ADVISOR_TOP_N", "5"))             # distinct professors shown to the advisor
+FACULTY_POOLING = os.getenv("FACULTY_POOLING", "max")             # "max" or "sum" of a professor's chunk scores
+FACULTY_SEARCH_MODE = os.getenv("FACULTY_SEARCH_MODE", "hybrid")  # "hybrid" (BM25 + vector) or "vector"
+CHUNKS_PER_PROFESSOR = 4  # chunks fetched per wanted professor before pooling
+SNIPPET_CHARS = 300
+RRF_K = 60  # reciprocal rank fusion constant (damps the weight of the very top ranks)
+
+# --- SHARED STATE ---
+# professors.json keyed by name, reloaded when the file changes (re-scrape)
+_professors = {}
+_professors_mtime = None
+_lexical = None  # (mtime, names, BM25) built from the same file
+
+
+def load_professors(path: str = PROFESSORS_JSON) -> dict:
+    """{name: professor dict} from professors.json (cached until the file changes)."""
+    global _professors, _professors_mtime
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    if mtime != _professors_mtime:
+        with open(path, "r", encoding="utf-8") as f:
+            _professors = {p.get("name", "Unknown"): p for p in json.load(f)}
+        _professors_mtime = mtime
+    return _professors
+
+
+def professor_text(prof: dict) -> str:
+    """Everything a student might search for literally: names, lab, areas, profile text."""
+    fields = [prof.get("name"), prof.get("lab"), prof.get("areas"), prof.get("raw_info")]
+    return " ".join(f for f in fields if f and f != "N/A")
+
+
+def get_lexical_index():
+    """(names, BM25) over one document per professor, rebuilt when professors.json changes."""
+    global _lexical
+    professors = load_professors()
+    if _lexical is None or _lexical[0] != _professors_mtime:
+        names = list(professors)
+        _lexical = (_professors_mtime, names, BM25([tokenize(professor_text(professors[n])) for n in names]))
+    return _lexical[1], _lexical[2]
+
+
+def lexical_search(query: str, top_k: int) -> list:
+    """[(name, bm25_score), ...] for exact terms: lab names (實驗室), names, acronyms (AIoT, XR)."""
+    names, index = get_lexical_index()
+    if not names:
+        return []
+    scores = index.scores(tokenize(query))
+    ranked = sorted(((n, s) for n, s in zip(names, scores) if s > 0), key=lambda x: x[1], reverse=True)
+    return ranked[:top_k]
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = RRF_K) -> list:
+    """Fuses ranked name lists: score = sum of 1 / (k + rank). Returns [(name, score), ...] best first."""
+    fused = {}
+    for ranking in rankings:
+        for rank, name in enumerate(ranking, 1):
+            fused[name] = fused.get(name, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda x: x[1], reverse=True)
+
+
+def chunk_snippet(content: str) -> str:
+    """The chunk text without the 'Professor: / Lab: / ...' header added at indexing time."""
+    if "\n...\n" in content:
+        content = content.split("\n...\n", 1)[1]
+    content = " ".join(content.split())
+    return content[:SNIPPET_CHARS] + ("..." if len(content) > SNIPPET_CHARS else "")
+
+
+def pool_by_professor(scored_chunks: list, pooling: str = FACULTY_POOLING) -> list:
+    """
+    Groups (doc, score) chunk hits by metadata["name"] and pools their scores
+    (max: best chunk wins, sum: many matching chunks add up).
+    Returns [(name, score, best_doc, hits), ...] best first.
+    """
+    groups = {}
+    for doc, score in scored_chunks:
+        name = doc.metadata.get("name", "Unknown")
+        group = groups.setdefault(name, {"score": 0.0 if pooling == "sum" else float("-inf"), "best": (doc, score), "hits": 0})
+        group["hits"] += 1
+        group["score"] = group["score"] + score if pooling == "sum" else max(group["score"], score)
+        if score > group["best"][1]:
+            group["best"] = (doc, score)
+
+    pooled = [(name, g["score"], g["best"][0], g["hits"]) for name, g in groups.items()]
+    return sorted(pooled, key=lambda x: x[1], reverse=True)
+
+
+def professor_record(name: str, score: float, doc=None, hits: int = 0) -> dict:
+    """
+    Compact record for one professor: contact fields from professors.json, evidence
+    from the best chunk (or the profile text when only the lexical index matched).
+    """
+    info = load_professors().get(name, {})
+    metadata = doc.metadata if doc is not None else {}
+    return {
+        "name": name,
+        "lab": info.get("lab") or metadata.get("lab", "N/A"),
+        "email": info.get("email") or metadata.get("email", "N/A"),
+        "profile_url": info.get("profile_url") or metadata.get("profile_url", "N/A"),
+        "snippet": chunk_snippet(doc.page_content if doc is not None else info.get("raw_info", "")),
+        "score": round(float(score), 4),
+        "hits": hits,
+    }
+
+
+def format_professor_record(record: dict) -> str:
+    return (
+        f"NAME: {record['name']}\nLAB: {record['lab']}\nEMAIL: {record['email']}\n"
+        f"LINK: {record['profile_url']}\nEVIDENCE: {record['snippet']}"
+    )
+
+
+async def vector_search(query: str, top_n: int, pooling: str = FACULTY_POOLING, k: int = None) -> list:
+    """Embedding search over faculty chunks, pooled per professor: [(name, score, best_doc, hits), ...]."""
+    store = get_faculty_store()  # in-memory matrix, or Chroma
+    hits = await store.asimilarity_search_with_score(query, k=k or top_n * CHUNKS_PER_PROFESSOR)
+    # Chroma returns distances (lower = closer); 1 / (1 + d) is a positive similarity for pooling
+    return pool_by_professor([(doc, 1.0 / (1.0 + distance)) for doc, distance in hits], pooling)
+
+
+async def search_professors(query: str, top_n: int = ADVISOR_TOP_N, pooling: str = FACULTY_POOLING,
+                            mode: str = FACULTY_SEARCH_MODE, k: int = None) -> list:
+    """
+    Professor-level retrieval: the top_n distinct professors as compact records (best first).
+
+    vector: chunk relevance pooled per professor.
+    hybrid: the pooled vector ranking fused (RRF) with a BM25 ranking over professors.json,
+            so exact lab names, professor names and acronyms are not lost in the embedding.
+            If the embedding side fails, the lexical ranking alone is used.
+    """
+    try:
+        pooled = await vector_search(query, top_n, pooling, k)
+    except Exception as e:
+        if mode != "hybrid":
+            raise
+        print(f"   ⚠️ Faculty vector search failed, using lexical only: {e}")
+        pooled = []
+
+    if mode != "hybrid":
+        return [professor_record(*entry) for entry in pooled[:top_n]]
+
+    by_name = {name: (doc, hits) for name, _, doc, hits in pooled}
+    lexical = lexical_search(query, top_k=top_n * 2)
+    fused = reciprocal_rank_fusion([[name for name, *_ in pooled], [name for name, _ in lexical]])
+    return [professor_record(name, score, *by_name.get(name, (None, 0))) for name, score in fused[:top_n]]
@@ -0,0 +1,157 @@
+import os
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import httpx
+import lxml.html
+from lxml import etree
+
+# --- CONFIG ---
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "10"))
+FETCH_MAX_CONNECTIONS = int(os.getenv("FETCH_MAX_CONNECTIONS", "20"))
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", "4"))              # concurrent requests per host
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(2 * 1024 * 1024)))  # stop reading after this
+VALIDATOR_CACHE_SIZE = 256  # pages remembered for ETag / Last-Modified revalidation
+
+# Elements whose text is never useful to the LLM
+NOISE_TAGS = ["script", "style", "noscript", "template", "svg", "nav", "footer", "header", "aside"]
+
+# --- SHARED STATE ---
+# One pooled client per event loop (keep-alive connections are reused across tools)
+_client = None
+_client_loop = None
+_host_slots = {}
+_validators = OrderedDict()  # {url: (etag, last_modified, body, encoding)}
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int
+    body: bytes = b""
+    encoding: str = "utf-8"
+    truncated: bool = False     # stopped at the byte budget
+    revalidated: bool = False   # 304 Not Modified -> body from the validator cache
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200
+
+    @property
+    def html(self) -> str:
+        return self.body.decode(self.encoding or "utf-8", errors="replace")
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=FETCH_TIMEOUT,
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(max_connections=FETCH_MAX_CONNECTIONS, max_keepalive_connections=FETCH_MAX_CONNECTIONS),
+        )
+        _client_loop = loop
+        _host_slots.clear()
+    return _client
+
+
+async def close_fetcher():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _host_slot(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc.lower()
+    if host not in _host_slots:
+        _host_slots[host] = asyncio.Semaphore(FETCH_PER_HOST)
+    return _host_slots[host]
+
+
+def _remember(url: str, response: httpx.Response, body: bytes, encoding: str):
+    etag, modified = response.headers.get("etag"), response.headers.get("last-modified")
+    if not (etag or modified):
+        return
+    _validators[url] = (etag, modified, body, encoding)
+    _validators.move_to_end(url)
+    while len(_validators) > VALIDATOR_CACHE_SIZE:
+        _validators.popitem(last=False)
+
+
+async def fetch(url: str, max_bytes: int = FETCH_MAX_BYTES, headers: dict = None) -> FetchResult:
+    """
+    GET through the shared pool. The body is streamed and reading stops at
+    max_bytes; pages seen before are revalidated with If-None-Match /
+    If-Modified-Since, and a 304 reuses the stored body.
+    """
+    request_headers = dict(headers or {})
+    known = _validators.get(url)
+    if known:
+        etag, modified, _, _ = known
+        if etag:
+            request_headers["If-None-Match"] = etag
+        if modified:
+            request_headers["If-Modified-Since"] = modified
+
+    client = get_client()
+    async with _host_slot(url):
+        async with client.stream("GET", url, headers=request_headers) as response:
+            if response.status_code == 304 and known:
+                _validators.move_to_end(url)
+                return FetchResult(url, 200, known[2], known[3], revalidated=True)
+            if response.status_code != 200:
+                return FetchResult(url, response.status_code)
+
+            chunks, size, truncated = [], 0, False
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= max_bytes:
+                    truncated = True
+                    break  # leaving the context closes the stream, the rest is never downloaded
+
+            body = b"".join(chunks)[:max_bytes]
+            encoding = response.charset_encoding or "utf-8"
+
+    if not truncated:
+        _remember(url, response, body, encoding)
+    return FetchResult(url, 200, body, encoding, truncated=truncated)
+
+
+def html_to_text(html, drop_tags=NOISE_TAGS, separator: str = "\n", encoding: str = "utf-8") -> str:
+    """Fast HTML -> text with lxml: noise elements dropped, one stripped line per text node."""
+    if not html or not html.strip():
+        return ""
+    try:
+        if isinstance(html, bytes):
+            # Parse the raw bytes: lxml rejects str input that carries an encoding declaration
+            tree = lxml.html.fromstring(html, parser=lxml.html.HTMLParser(encoding=encoding))
+        else:
+            tree = lxml.html.fromstring(html)
+    except (etree.ParserError, ValueError, LookupError):
+        return ""
+    etree.strip_elements(tree, etree.Comment, *drop_tags, with_tail=False)
+    pieces = (piece.strip() for piece in tree.itertext())
+    return separator.join(piece for piece in pieces if piece)
+
+
+async def fetch_text(url: str, max_chars: int = 30000, drop_tags=NOISE_TAGS, separator: str = "\n") -> str:
+    """
+    Page text for the LLM (at most max_chars). Failures are returned as
+    'Error: ...' / 'Scraping failed: ...' strings, which the tools pass on as-is.
+    """
+    try:
+        # Pages are mostly markup: 8 bytes of HTML per visible character is plenty (capped globally)
+        result = await fetch(url, max_bytes=min(FETCH_MAX_BYTES, max(max_chars * 8, 256 * 1024)))
+        if not result.ok:
+            return f"Error: Failed to load page (Status: {result.status})"
+        text = await asyncio.to_thread(html_to_text, result.body, drop_tags, separator, result.encoding)
+        return text[:max_chars]
+    except Exception as e:
+        return f"Scraping failed: {str(e)}"
@@ -0,0 +1,153 @@
+import os
+import re
+import json
+import time
+import threading
+
+import numpy as np
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import FeatureUnion, make_pipeline
+
+# --- CONFIG ---
+INTENT_EXAMPLES_PATH = os.getenv("INTENT_EXAMPLES_PATH", "data/intent_examples.json")
+# Below this probability the local model defers to the LLM classifier
+INTENT_CONFIDENCE = float(os.getenv("INTENT_CONFIDENCE", "0.6"))
+
+# A keyword hit counts as a vote of this weight for its mode, averaged with the
+# model's probabilities (1.0: the rule mode wins unless the model gives it < 20%)
+RULE_WEIGHT = float(os.getenv("INTENT_RULE_WEIGHT", "1.0"))
+
+# Typical phrasings of each mode, used as a prior for the model. A message
+# matching rules of two different modes gets no prior.
+KEYWORD_RULES = {
+    "quiz": [r"\bquiz\b", r"\bmcqs?\b", r"\b(mock|practice) (exam|test)\b", r"\btest me\b", r"出題|測驗|考我"],
+    "summarize": [r"\bsummar(y|ize|ise)\b", r"\btl;?dr\b", r"\bkey takeaways\b", r"摘要|總結|重點整理"],
+    "simplify": [r"\beli5\b", r"like i'?m (five|5|ten|a beginner)", r"\bfeynman\b", r"\banalogy\b", r"簡單.*解釋|比喻"],
+    "advisor": [r"\b(advisor|adviser|supervisor|mentor)\b", r"\bprofessors?\b.*\b(work|research|recommend|lab)",
+                r"教授|實驗室"],
+}
+
+# An answer choice: b-d on their own, 'a' only when it can't be the article ('is a.', 'a,', '(a)')
+_CHOICE = r"(?<![\w'])(?:\(?[b-d]\)?(?![\w'])|\(a\)|a(?=\s*(?:[,;.?!]|$)))"
+# Quiz answers ("1. A, 2. C", "1-B 2-D", "question 2 is C", "first one is b") go to the
+# query agent, which grades them against the session's answer key
+ANSWER_PATTERNS = [
+    r"^\s*(\d+\s*[.):\-]?\s*[a-d]\b[\s,;]*){2,}$",
+    r"^\s*([a-d][\s,;]+){2,}[a-d]\s*$",
+    rf"\d+\s*[.):\-]?\s*{_CHOICE}.*\d+\s*[.):\-]?\s*{_CHOICE}",
+    rf"\banswers?\b.*{_CHOICE}",
+    rf"\b(question|q)\s*\d+\b.*\b(is|was)\s+{_CHOICE}",
+    rf"\b(first|second|third|fourth|fifth|last)( one| question)?\s+(is|was|=|:)\s*{_CHOICE}",
+    # 'grade' only next to choices ('grade this: 1. A', 'grade a c b'), not 'what grade do I need'
+    rf"\bgrade\b.*(\d+\s*[.):\-]?\s*{_CHOICE}|(?<![\w'])[a-d]([\s,;]+[a-d]){{2,}}(?![\w']))",
+    r"答案",
+]
+# Questions that merely mention a mode keyword ('what is a summary statistic')
+# get no keyword prior; the model (or the LLM) decides
+QUESTION_RE = re.compile(r"^\s*(what|what's|whats|how|why|when|where|who|which|is|are|does|do|did)\b|什麼是|是什麼")
+
+_model = None
+_model_lock = threading.Lock()
+_stats = {"rules": 0, "model": 0, "llm": 0, "latency_ms": 0.0}
+
+
+def load_examples(path: str = INTENT_EXAMPLES_PATH):
+    """{mode: [example, ...]} -> (texts, labels)"""
+    with open(path, "r", encoding="utf-8") as f:
+        examples = json.load(f)
+    texts, labels = [], []
+    for mode, items in examples.items():
+        texts.extend(items)
+        labels.extend([mode] * len(items))
+    return texts, labels
+
+
+def build_model():
+    """Word + character n-gram TF-IDF (character n-grams also cover Chinese) -> logistic regression."""
+    features = FeatureUnion([
+        ("word", TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)),
+        ("char", TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4), sublinear_tf=True)),
+    ])
+    return make_pipeline(features, LogisticRegression(C=10, max_iter=1000))
+
+
+def train_model(texts: list, labels: list):
+    model = build_model()
+    model.fit(texts, labels)
+    return model
+
+
+def get_model():
+    """Trained on first use from the labeled examples (a few ms, no network)."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            start = time.perf_counter()
+            _model = train_model(*load_examples())
+            print(f"🧠 Intent model trained in {(time.perf_counter() - start) * 1000:.0f}ms.")
+        return _model
+
+
+def match_rules(message: str):
+    """Mode whose keyword rules match, or None when none / several modes match."""
+    text = message.lower()
+    hits = {mode for mode, patterns in KEYWORD_RULES.items() if any(re.search(p, text) for p in patterns)}
+    return hits.pop() if len(hits) == 1 else None
+
+
+def looks_like_quiz_answers(message: str) -> bool:
+    """'1. A, 2. C ...', 'question 2 is C', 'my answer is B', '第一題答案' -> the user is being graded."""
+    text = message.lower().strip()
+    return any(re.search(p, text) for p in ANSWER_PATTERNS)
+
+
+def is_question(message: str) -> bool:
+    return bool(QUESTION_RE.search(message.lower()))
+
+
+def classify_local(message: str, model=None, threshold: float = INTENT_CONFIDENCE, rule_weight: float = RULE_WEIGHT):
+    """
+    Returns (mode, confidence, source) where source is 'rules' or 'model',
+    or (None, confidence, 'model') when the caller should ask the LLM.
+
+    1. Quiz answers -> query (decided here: they must reach the grader).
+    2. Keyword rules (skipped for questions) add a prior to the model's probabilities.
+    """
+    if looks_like_quiz_answers(message):
+        return "query", 1.0, "rules"
+
+    rule = None if is_question(message) else match_rules(message)
+
+    model = model or get_model()
+    probabilities = model.predict_proba([message])[0]
+    classes = [str(c) for c in model.classes_]
+    if rule in classes:
+        prior = [1.0 if c == rule else 0.0 for c in classes]
+        probabilities = (probabilities + rule_weight * np.asarray(prior)) / (1.0 + rule_weight)
+
+    best = probabilities.argmax()
+    confidence = float(probabilities[best])
+    mode = classes[best]
+    source = "rules" if mode == rule else "model"
+    if confidence >= threshold:
+        return mode, confidence, source
+    return None, confidence, source
+
+
+def record(source: str, latency_ms: float = 0.0):
+    _stats[source] += 1
+    _stats["latency_ms"] += latency_ms
+
+
+def get_intent_stats() -> dict:
+    local = _stats["rules"] + _stats["model"]
+    total = local + _stats["llm"]
+    return {
+        "rules": _stats["rules"],
+        "model": _stats["model"],
+        "llm": _stats["llm"],
+        "local_fraction": round(local / total, 3) if total else 0.0,
+        "avg_local_ms": round(_stats["latency_ms"] / local, 2) if local else 0.0,
+    }
@@ -0,0 +1,233 @@
+import os
+import time
+import uuid
+import asyncio
+from collections import OrderedDict
+from contextlib import aclosing
+from concurrent.futures import ProcessPoolExecutor
+
+from src.utils.pdf_loader import load_pdf_content, get_page_count, extract_page_range, save_to_cache
+from src.utils.session import safe_session_id
+from src.utils.vector_store import chunk_pages, add_chunks
+from src.utils.response_cache import invalidate_document
+from src.utils.doc_store import (
+    get_document, register_document, attach_session, enforce_size_limit, document_summary
+)
+
+# --- CONFIG ---
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "2"))  # ingestions embedding at the same time
+STREAM_BATCH_PAGES = int(os.getenv("STREAM_BATCH_PAGES", "8"))  # pages parsed & committed per step
+MAX_JOBS = 200  # finished jobs kept for polling
+
+# --- JOB REGISTRY ---
+# {job_id: {"status": ..., "progress": {...}, ...}}, oldest first
+_jobs = OrderedDict()
+_tasks = set()  # keeps running asyncio tasks referenced until they finish
+
+_parse_pool = None
+_embed_slots = None
+
+
+def get_parse_pool():
+    """PDF parsing is CPU-bound, so it runs in worker processes, not on the event loop."""
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+    return _parse_pool
+
+
+def get_embed_slots():
+    global _embed_slots
+    if _embed_slots is None:
+        _embed_slots = asyncio.Semaphore(EMBED_CONCURRENCY)
+    return _embed_slots
+
+
+def shutdown_workers():
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
+
+def create_job(filename: str, session_id: str, document_id: str) -> dict:
+    job = {
+        "job_id": uuid.uuid4().hex,
+        "filename": filename,
+        "session_id": safe_session_id(session_id),
+        "document_id": document_id,
+        "deduplicated": False,    # True if the file was already in the doc store
+        "status": "queued",       # queued -> parsing -> embedding (pages k of n) -> done | error
+        "progress": {"done": 0, "total": 0},
+        "chunk_count": 0,
+        "queryable": False,       # True once the first batch of pages is searchable
+        "error": None,
+        "created_at": time.time(),
+    }
+    _jobs[job["job_id"]] = job
+
+    # Forget the oldest finished jobs so the registry stays bounded
+    for job_id in list(_jobs):
+        if len(_jobs) <= MAX_JOBS:
+            break
+        if _jobs[job_id]["status"] in ("done", "error"):
+            del _jobs[job_id]
+
+    return job
+
+
+def get_job(job_id: str):
+    return _jobs.get(job_id)
+
+
+def update_job(job_id: str, **fields):
+    if job_id in _jobs:
+        _jobs[job_id].update(fields)
+
+
+async def iter_parsed_pages(file_path: str, page_count: int = None):
+    """
+    Async stream of parsed page batches [(page_number, markdown), ...].
+    PDF page ranges are converted in the parse pool (several at once) and
+    yielded as soon as each one finishes, so indexing can start right away.
+    Ranges not parsed yet are cancelled when the stream is closed early (failed job).
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_parse_pool()
+
+    if not file_path.lower().endswith(".pdf"):
+        text = await loop.run_in_executor(pool, load_pdf_content, file_path)
+        yield [(1, text)]
+        return
+
+    if page_count is None:
+        page_count = await asyncio.to_thread(get_page_count, file_path)
+    ranges = [
+        list(range(start, min(start + STREAM_BATCH_PAGES, page_count)))
+        for start in range(0, page_count, STREAM_BATCH_PAGES)
+    ]
+
+    async def convert(pages):
+        texts = await loop.run_in_executor(pool, extract_page_range, file_path, pages)
+        return [(page + 1, text) for page, text in zip(pages, texts)]
+
+    # The pool runs PARSE_WORKERS ranges at a time, roughly in page order
+    tasks = [asyncio.ensure_future(convert(r)) for r in ranges]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()  # queued ranges never start; a range already running just finishes
+
+
+async def run_ingestion(job_id: str, file_path: str):
+    """
+    Streaming upload pipeline: parse a batch of pages -> chunk -> embed -> commit,
+    repeated until the document is done. Each committed batch is immediately
+    searchable, so the first question doesn't wait for the whole file.
+    """
+    job = _jobs[job_id]
+    doc_id = job["document_id"]
+    start = time.perf_counter()
+
+    try:
+        update_job(job_id, status="parsing")
+
+        total_pages = 1
+        if file_path.lower().endswith(".pdf"):
+            total_pages = await asyncio.to_thread(get_page_count, file_path)
+        register_document(doc_id, status="indexing", filename=job["filename"], pages=total_pages, pages_done=0, chunk_count=0)
+
+        parsed_pages = []
+        chunk_count = 0
+
+        async with aclosing(iter_parsed_pages(file_path, total_pages)) as batches:
+            async for pages in batches:
+                parsed_pages.extend(pages)
+
+                # Chunk + Embed this batch (bounded concurrency across all uploads)
+                chunks = await asyncio.to_thread(chunk_pages, pages, job["filename"])
+                async with get_embed_slots():
+                    await asyncio.to_thread(add_chunks, chunks, doc_id)
+                chunk_count += len(chunks)
+
+                register_document(doc_id, pages_done=len(parsed_pages), chunk_count=chunk_count)
+                update_job(
+                    job_id,
+                    status="embedding",
+                    progress={"done": len(parsed_pages), "total": total_pages},
+                    chunk_count=chunk_count,
+                    queryable=chunk_count > 0,
+                )
+
+        markdown_text = "".join(text for _, text in sorted(parsed_pages))
+        if not markdown_text.strip():
+            raise ValueError("No text could be extracted from the file.")
+
+        # Persist the extracted text under the document hash, then mark it reusable
+        await asyncio.to_thread(save_to_cache, doc_id, markdown_text)
+        register_document(
+            doc_id,
+            status="ready",
+            text_bytes=len(markdown_text.encode("utf-8")),
+            token_estimate=len(markdown_text) // 4,  # ~4 chars per token
+        )
+        await asyncio.to_thread(invalidate_document, doc_id)  # answers from a previous ingestion
+        await asyncio.to_thread(enforce_size_limit)
+
+        update_job(job_id, status="done", chunk_count=chunk_count, document=document_summary(doc_id))
+        print(f"✅ Job {job_id[:8]}: {job['filename']} indexed ({chunk_count} chunks, {time.perf_counter() - start:.1f}s).")
+
+    except Exception as e:
+        print(f"❌ Job {job_id[:8]} failed: {e}")
+        register_document(doc_id, status="error")
+        update_job(job_id, status="error", error=str(e))
+    finally:
+        discard_upload(file_path)
+
+
+def discard_upload(file_path: str):
+    """The raw upload is only needed until its text is in the doc store (which is size-bounded)."""
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+
+def submit_ingestion(file_path: str, filename: str, session_id: str, document_id: str) -> dict:
+    """
+    Points the session at the document and returns a job immediately.
+    Known files (same SHA-256) are served from the doc store without re-ingesting;
+    new files are parsed & indexed in the background.
+    """
+    attach_session(session_id, document_id)
+
+    meta = get_document(document_id)
+    if meta and meta.get("status") == "indexing" and meta.get("job_id") in _jobs:
+        # Same file is being ingested right now (e.g. another session): follow that job
+        discard_upload(file_path)
+        return _jobs[meta["job_id"]]
+
+    job = create_job(filename, session_id, document_id)
+    if meta and meta.get("status") == "ready":
+        print(f"♻️ Upload {filename} matches stored document {document_id[:12]}. Skipping ingestion.")
+        discard_upload(file_path)
+        pages = meta.get("pages", 0)
+        update_job(
+            job["job_id"],
+            status="done",
+            deduplicated=True,
+            queryable=True,
+            progress={"done": pages, "total": pages},
+            chunk_count=meta.get("chunk_count", 0),
+            document=document_summary(document_id),
+        )
+        return job
+
+    register_document(document_id, status="indexing", job_id=job["job_id"])
+    task = asyncio.create_task(run_ingestion(job["job_id"], file_path))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job
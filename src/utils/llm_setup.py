@@ -1,6 +1,8 @@
 import os
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
+import httpx
 from langchain_ollama import ChatOllama
 
 # 1. Robustly load .env from the project root
@@ -8,35 +10,111 @@ from langchain_ollama import ChatOllama
 env_path = Path(__file__).resolve().parents[2] / ".env"
 load_dotenv(dotenv_path=env_path)
 
-def get_llm():
-    """
-    Returns the standard LangChain ChatOllama instance.
-    This automatically has .invoke(), .stream(), and .batch() methods.
-    """
-    # 2. Get Config
-    base_url = os.getenv("OLLAMA_BASE_URL")
-    api_key = os.getenv("OLLAMA_API_KEY")
-    model = os.getenv("OLLAMA_MODEL")
+# --- CONFIG (read once per process) ---
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL")
+OLLAMA_API_KEY = os.getenv("OLLAMA_API_KEY")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL")
+
+# Keep-alive pool shared by all requests of one client (per model/params)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "10"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+
+# Per-role defaults. Each can be overridden with LLM_<ROLE>_MODEL / LLM_<ROLE>_TEMPERATURE /
+# LLM_<ROLE>_NUM_PREDICT.
+ROLE_CONFIGS = {
+    "generator": {"temperature": 0.7},  # answers, explanations, quizzes
+    # One-word intent label. Thinking off where the model allows it; reasoning models that
+    # always think (gpt-oss) spend tokens before the label, hence the generous num_predict.
+    "classifier": {"temperature": 0.0, "num_predict": 256, "reasoning": False},
+}
+
+# --- CLIENT REGISTRY ---
+# {(model, base_url, params): ChatOllama}, one per distinct configuration
+_clients = {}
+_lock = threading.Lock()
+
+
+def role_config(role: str) -> dict:
+    """Model + sampling parameters for a role (env overrides applied)."""
+    config = dict(ROLE_CONFIGS.get(role, ROLE_CONFIGS["generator"]))
+    prefix = f"LLM_{role.upper()}_"
+    config["model"] = os.getenv(prefix + "MODEL") or OLLAMA_MODEL
+    if os.getenv(prefix + "TEMPERATURE"):
+        config["temperature"] = float(os.getenv(prefix + "TEMPERATURE"))
+    if os.getenv(prefix + "NUM_PREDICT"):
+        config["num_predict"] = int(os.getenv(prefix + "NUM_PREDICT"))
+    return config
+
+
+def _pool_kwargs() -> dict:
+    """httpx settings for the sync and async clients inside ChatOllama."""
+    limits = httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+    )
+    return {"limits": limits}
 
+
+def _build(model: str, params: dict) -> ChatOllama:
     # Debugging: See what is actually being loaded
-    if not base_url:
+    if not OLLAMA_BASE_URL:
         print("⚠️  WARNING: OLLAMA_BASE_URL not found in .env. Defaulting to localhost.")
     else:
-        print(f"🔌 LLM Setup: Connecting to {base_url} (Model: {model})")
-    
-    # 4. Prepare Headers
+        print(f"🔌 LLM Setup: Connecting to {OLLAMA_BASE_URL} (Model: {model}, {params})")
+
+    # Prepare Headers
     headers = {
         "Content-Type": "application/json"
     }
-    if api_key:
-        headers["Authorization"] = f"Bearer {api_key}"
+    if OLLAMA_API_KEY:
+        headers["Authorization"] = f"Bearer {OLLAMA_API_KEY}"
 
-    # 5. Instantiate the Built-in Class
-    llm = ChatOllama(
+    return ChatOllama(
         model=model,
-        base_url=base_url,
-        headers=headers, # This passes your key to the server
-        temperature=0.7
+        base_url=OLLAMA_BASE_URL,
+        client_kwargs={"headers": headers},  # This passes your key to the server
+        sync_client_kwargs=_pool_kwargs(),
+        async_client_kwargs=_pool_kwargs(),
+        **params,
     )
-    
-    return llm
\ No newline at end of file
+
+
+def get_llm(role: str = "generator", **overrides):
+    """
+    Returns the shared ChatOllama for a role (e.g. 'generator', 'classifier').
+    Clients are created once per (model, base_url, params) and reused, so every
+    call goes over the same keep-alive connections instead of a new TCP/TLS handshake.
+    This automatically has .invoke(), .stream(), and .batch() methods.
+    """
+    config = {**role_config(role), **overrides}
+    model = config.pop("model")
+    key = (model, OLLAMA_BASE_URL, tuple(sorted(config.items())))
+
+    llm = _clients.get(key)
+    if llm is None:
+        with _lock:
+            llm = _clients.get(key)
+            if llm is None:
+                llm = _clients[key] = _build(model, config)
+    return llm
+
+
+async def close_llm_clients():
+    """Closes the pooled connections (called on server shutdown)."""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for llm in clients:
+        # ChatOllama has no close(): reach the httpx clients inside the ollama clients
+        # if they are where we expect them (private attributes, skipped if they move)
+        sync_http = getattr(getattr(llm, "_client", None), "_client", None)
+        async_http = getattr(getattr(llm, "_async_client", None), "_client", None)
+        try:
+            if hasattr(sync_http, "close"):
+                sync_http.close()
+            if hasattr(async_http, "aclose"):
+                await async_http.aclose()
+        except Exception as e:
+            print(f"⚠️ LLM Setup: failed to close client: {e}")
@@ -0,0 +1,123 @@
+import os
+import time
+
+from langchain_core.messages import HumanMessage
+from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
+
+from src.utils.context import CHARS_PER_TOKEN, count_tokens, get_token_budget
+from src.utils.summary_cache import SummaryCache, summary_key
+
+# --- CONFIG ---
+# Documents above this many tokens are summarized hierarchically (map -> reduce tree)
+# instead of in one prompt. Defaults to the model's context budget.
+MAP_REDUCE_THRESHOLD = int(os.getenv("MAP_REDUCE_THRESHOLD_TOKENS", "0")) or None
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))  # LLM calls in flight per document
+REDUCE_FAN_IN = 8  # partial summaries merged per reduce call (at most)
+
+# LLM calls made inside a node that must not be streamed to the user as answer tokens
+INTERNAL_TAG = "internal"
+
+# Bump when the prompts change, so old cached summaries are not reused
+PROMPT_VERSION = "v1"
+
+MAP_PROMPT = """Summarize the following section of a study document.
+Keep every key concept, definition, formula and argument. Use concise bullet points.
+Do not add information that is not in the section.
+
+### SECTION
+{text}"""
+
+REDUCE_PROMPT = """The following are summaries of consecutive parts of one study document.
+Merge them into a single, coherent summary. Keep all key concepts and definitions,
+remove repetition and keep the original order of topics.
+
+### PARTIAL SUMMARIES
+{text}"""
+
+_cache = None
+
+
+def get_summary_cache() -> SummaryCache:
+    global _cache
+    if _cache is None:
+        _cache = SummaryCache(os.getenv("OLLAMA_MODEL"))
+    return _cache
+
+
+def get_summary_stats() -> dict:
+    return get_summary_cache().stats()
+
+
+def needs_map_reduce(text: str) -> bool:
+    threshold = MAP_REDUCE_THRESHOLD or get_token_budget()
+    return count_tokens(text) > threshold
+
+
+def split_sections(text: str, section_tokens: int) -> list:
+    """Splits Markdown at headings first, so sections follow the document's chapters."""
+    splitter = RecursiveCharacterTextSplitter.from_language(
+        Language.MARKDOWN, chunk_size=section_tokens * CHARS_PER_TOKEN, chunk_overlap=0
+    )
+    return splitter.split_text(text)
+
+
+async def summarize_all(llm, texts: list, prompt: str) -> list:
+    """
+    Summarizes every text with `prompt`, reusing cached summaries.
+    Cache misses go out as one batched call with at most SUMMARY_CONCURRENCY in flight.
+    """
+    cache = get_summary_cache()
+    keys = [summary_key(t, f"{PROMPT_VERSION}:{prompt}") for t in texts]
+    found = cache.get_many(keys)
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in found:
+            missing.setdefault(key, text)
+
+    if missing:
+        responses = await llm.abatch(
+            [[HumanMessage(content=prompt.format(text=t))] for t in missing.values()],
+            config={"max_concurrency": SUMMARY_CONCURRENCY, "tags": [INTERNAL_TAG]},
+        )
+        new = {key: r.content for key, r in zip(missing.keys(), responses)}
+        cache.put_many(new)
+        found.update(new)
+
+    return [found[k] for k in keys]
+
+
+async def map_reduce_summary(llm, text: str, token_budget: int = None) -> str:
+    """
+    Hierarchical summary of a document that does not fit one prompt:
+    1. Map: split into sections and summarize them concurrently.
+    2. Reduce: merge neighbouring summaries in groups until they fit `token_budget`.
+    Returns the combined summary text (to be used as the final prompt's context).
+    """
+    token_budget = token_budget or get_token_budget()
+    start = time.perf_counter()
+
+    sections = split_sections(text, token_budget)
+    summaries = await summarize_all(llm, sections, MAP_PROMPT)
+    print(f"   🗺️ Map: {len(sections)} sections summarized.")
+
+    level = 0
+    while len(summaries) > 1 and count_tokens("\n\n".join(summaries)) > token_budget:
+        level += 1
+        groups, current = [], []
+        for summary in summaries:
+            if current and (len(current) >= REDUCE_FAN_IN
+                            or count_tokens("\n\n".join(current + [summary])) > token_budget):
+                groups.append(current)
+                current = []
+            current.append(summary)
+        groups.append(current)
+
+        if len(groups) == len(summaries):
+            break  # every summary is already budget-sized; merging can't shrink further
+        summaries = await summarize_all(llm, ["\n\n".join(g) for g in groups], REDUCE_PROMPT)
+        print(f"   🔻 Reduce level {level}: {len(summaries)} partial summaries.")
+
+    stats = get_summary_stats()
+    print(f"   ✅ Map-reduce done in {time.perf_counter() - start:.1f}s (cache hits {stats['hits']}, misses {stats['misses']}).")
+    return "\n\n".join(summaries)
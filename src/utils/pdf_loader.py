@@ -1,27 +1,66 @@
 import io
 import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import pymupdf
 import pymupdf4llm
 from pptx import Presentation
 
-# --- IN-MEMORY CACHE ---
-# Even though we save files to disk, we keep a cache for the 
-# current session's text so nodes don't have to re-read files constantly.
-_pdf_cache = {}
+# --- DOCUMENT TEXT CACHE ---
+# Extracted Markdown is persisted on disk under the file's SHA-256 (the document id),
+# so re-uploading the same file never re-parses it. A small in-memory LRU sits in
+# front of the disk copy so nodes don't have to re-read files constantly.
+DOC_STORE_DIR = os.getenv("DOC_STORE_DIR", "data/doc_store")  # 🔒 Persistent (size-bounded)
+MEMORY_CACHE_SIZE = 8
+_pdf_cache = OrderedDict()
+_cache_lock = threading.Lock()  # written from ingestion threads, read from the event loop
+
+def document_dir(doc_id: str) -> str:
+    return os.path.join(DOC_STORE_DIR, doc_id)
+
+def _remember(doc_id: str, text: str):
+    with _cache_lock:
+        _pdf_cache[doc_id] = text
+        _pdf_cache.move_to_end(doc_id)
+        while len(_pdf_cache) > MEMORY_CACHE_SIZE:
+            _pdf_cache.popitem(last=False)
 
-def save_to_cache(thread_id: str, text: str):
-    """Stores text in the global in-memory cache for fast access by nodes."""
-    if thread_id:
-        print(f"🧠 Cache: Updating context for thread {thread_id} with newest document.")
-        _pdf_cache[thread_id] = text
+def save_to_cache(doc_id: str, text: str):
+    """Stores a document's text on disk and in the in-memory cache."""
+    if not doc_id:
+        return
+    print(f"🧠 Cache: Storing extracted text for document {doc_id[:12]}.")
+    os.makedirs(document_dir(doc_id), exist_ok=True)
+    path = os.path.join(document_dir(doc_id), "content.md")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)  # atomic: readers never see half a file
+    _remember(doc_id, text)
+
+def get_from_cache(doc_id: str) -> str:
+    """Retrieves a document's text (memory first, then disk). Empty string if unknown."""
+    if not doc_id:
+        return ""
+    with _cache_lock:
+        if doc_id in _pdf_cache:
+            _pdf_cache.move_to_end(doc_id)
+            return _pdf_cache[doc_id]
 
-def get_from_cache(thread_id: str) -> str:
-    """Retrieves text from the global in-memory cache."""
-    return _pdf_cache.get(thread_id, "")
+    path = os.path.join(document_dir(doc_id), "content.md")
+    if not os.path.exists(path):
+        return ""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    _remember(doc_id, text)
+    return text
 
-def clear_cache(thread_id: str):
-    """Removes a specific entry from the cache."""
-    if thread_id in _pdf_cache:
-        del _pdf_cache[thread_id]
+def clear_cache(doc_id: str):
+    """Removes a document's text from memory and disk."""
+    with _cache_lock:
+        _pdf_cache.pop(doc_id, None)
+    shutil.rmtree(document_dir(doc_id), ignore_errors=True)
 
 # --- LOADING LOGIC ---
 
@@ -41,6 +80,18 @@ def load_pptx_content(file_path: str) -> str:
         print(f"Error extracting PPTX from {file_path}: {e}")
         return ""
 
+def get_page_count(file_path: str) -> int:
+    with pymupdf.open(file_path) as doc:
+        return doc.page_count
+
+def extract_page_range(file_path: str, pages: list) -> list:
+    """
+    Converts the given 0-based pages to Markdown, one string per page.
+    Top-level function so it can run in a worker process (see jobs.iter_parsed_pages).
+    """
+    chunks = pymupdf4llm.to_markdown(file_path, pages=pages, page_chunks=True)
+    return [chunk["text"] for chunk in chunks]
+
 def load_pdf_content(file_path: str) -> str:
     """
     Primary function for loading documents from the 'data/' folder.
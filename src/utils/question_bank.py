@@ -0,0 +1,203 @@
+import os
+import re
+import json
+import math
+import random
+import asyncio
+import hashlib
+import threading
+
+from langchain_core.messages import HumanMessage
+
+from src.utils.pdf_loader import document_dir
+from src.utils.doc_store import get_document
+from src.utils.session import safe_session_id
+from src.utils.map_reduce import INTERNAL_TAG, SUMMARY_CONCURRENCY, split_sections
+
+# --- CONFIG ---
+# Questions are generated per document section and kept in a bank next to the
+# document's text (data/doc_store/<doc_id>/questions.json), so they are evicted with it.
+SECTION_TOKENS = 1500          # size of the text slice one generation call sees
+QUESTIONS_PER_SECTION = 3
+MAX_QUESTIONS_PER_SECTION = 10  # asked of one section when the document has too few sections
+FILL_ATTEMPTS = 3              # generation rounds tried before serving a short quiz
+SECTIONS_PER_ROUND = 4         # sections sampled per (top-up) generation round
+LOW_WATERMARK = 10             # unseen questions left before a background top-up starts
+BANK_FILE = "questions.json"
+
+QUESTION_PROMPT = """You are a Professor writing exam questions about the text below.
+Write {count} multiple choice questions that test understanding of this text only.
+
+Reply with ONLY a JSON list, no other text:
+[{{"question": "...", "options": {{"A": "...", "B": "...", "C": "...", "D": "..."}}, "answer": "A", "explanation": "one sentence"}}]
+
+### TEXT
+{text}"""
+
+_lock = threading.Lock()
+_top_ups = {}  # doc_id -> running background task
+
+
+def _bank_path(doc_id: str) -> str:
+    return os.path.join(document_dir(doc_id), BANK_FILE)
+
+
+def load_bank(doc_id: str) -> dict:
+    """{"questions": [...], "used_sections": [...], "seen": {session_id: [question ids]}}"""
+    bank = {"questions": [], "used_sections": [], "seen": {}}
+    path = _bank_path(doc_id)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                bank.update(json.load(f))
+        except Exception as e:
+            print(f"⚠️ Question Bank: unreadable bank for {doc_id[:12]} ({e}). Starting empty.")
+    return bank
+
+
+def _save_bank(doc_id: str, bank: dict):
+    os.makedirs(document_dir(doc_id), exist_ok=True)
+    path = _bank_path(doc_id)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(bank, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def unseen_count(doc_id: str, session_id: str) -> int:
+    with _lock:
+        bank = load_bank(doc_id)
+    seen = set(bank["seen"].get(safe_session_id(session_id), []))
+    return sum(1 for q in bank["questions"] if q["id"] not in seen)
+
+
+def draw_questions(doc_id: str, session_id: str, n: int) -> list:
+    """Takes up to n questions this session hasn't seen yet and marks them as seen."""
+    session = safe_session_id(session_id)
+    with _lock:
+        bank = load_bank(doc_id)
+        seen = bank["seen"].setdefault(session, [])
+        seen_ids = set(seen)
+        unseen = [q for q in bank["questions"] if q["id"] not in seen_ids]
+        picked = random.sample(unseen, min(n, len(unseen)))
+        seen.extend(q["id"] for q in picked)
+        _save_bank(doc_id, bank)
+    return picked
+
+
+def normalize_question(text: str) -> str:
+    """'What is  TCP?' and 'what is tcp' are the same question."""
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+def question_id(text: str) -> str:
+    return hashlib.sha1(normalize_question(text).encode("utf-8")).hexdigest()[:16]
+
+
+def parse_questions(text: str) -> list:
+    """Extracts the JSON question list from an LLM reply; malformed entries are dropped."""
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end <= start:
+        return []
+    try:
+        items = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return []
+
+    questions = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        options = item.get("options") or {}
+        answer = str(item.get("answer", "")).strip().upper()[:1]
+        if not item.get("question") or set(options) != {"A", "B", "C", "D"} or answer not in options:
+            continue
+        questions.append({
+            "id": question_id(item["question"]),
+            "question": item["question"].strip(),
+            "options": options,
+            "answer": answer,
+            "explanation": item.get("explanation", ""),
+        })
+    return questions
+
+
+async def generate_questions(llm, doc_id: str, text: str, rounds: int = 1, wanted: int = 0) -> int:
+    """
+    Samples sections that haven't been used yet, generates questions for each
+    in one batched call (parallel, bounded) and adds them to the bank.
+    wanted: questions needed; with few sections, more are asked of each one.
+    Returns the number of new questions (duplicates by normalized text are dropped).
+    """
+    sections = split_sections(text, SECTION_TOKENS)
+    with _lock:
+        used = set(load_bank(doc_id)["used_sections"])
+
+    fresh = [i for i in range(len(sections)) if i not in used]
+    if not fresh:
+        fresh = list(range(len(sections)))  # every section used: ask again for new questions
+    picked = random.sample(fresh, min(len(fresh), SECTIONS_PER_ROUND * rounds))
+    if not picked:
+        return 0
+    count = min(MAX_QUESTIONS_PER_SECTION, max(QUESTIONS_PER_SECTION, math.ceil(wanted / len(picked))))
+
+    responses = await llm.abatch(
+        [[HumanMessage(content=QUESTION_PROMPT.format(count=count, text=sections[i]))] for i in picked],
+        config={"max_concurrency": SUMMARY_CONCURRENCY, "tags": [INTERNAL_TAG]},
+        return_exceptions=True,
+    )
+
+    if get_document(doc_id) is None:
+        return 0  # evicted from the doc store meanwhile: don't recreate its folder
+
+    with _lock:
+        bank = load_bank(doc_id)
+        known = {normalize_question(q["question"]) for q in bank["questions"]}
+        added = 0
+        for section, response in zip(picked, responses):
+            if isinstance(response, Exception):
+                print(f"   ⚠️ Question generation failed for section {section}: {response}")
+                continue
+            for q in parse_questions(response.content):
+                if normalize_question(q["question"]) in known:
+                    continue
+                q["section"] = section
+                bank["questions"].append(q)
+                known.add(normalize_question(q["question"]))
+                added += 1
+            if section not in bank["used_sections"]:
+                bank["used_sections"].append(section)
+        _save_bank(doc_id, bank)
+
+    print(f"   🏦 Question Bank {doc_id[:12]}: +{added} questions from {len(picked)} sections ({len(bank['questions'])} total).")
+    return added
+
+
+async def fill_bank(llm, doc_id: str, session_id: str, text: str, n: int) -> int:
+    """
+    Generates until the session has at least n unseen questions, for at most
+    FILL_ATTEMPTS rounds (a repeated question adds nothing). Returns the unseen count.
+    """
+    unseen = unseen_count(doc_id, session_id)
+    for _ in range(FILL_ATTEMPTS):
+        if unseen >= n:
+            break
+        await generate_questions(llm, doc_id, text, rounds=2, wanted=n - unseen)
+        unseen = unseen_count(doc_id, session_id)
+    return unseen
+
+
+def schedule_top_up(llm, doc_id: str, text: str):
+    """Refills the bank in the background (at most one top-up per document at a time)."""
+    task = _top_ups.get(doc_id)
+    if task and not task.done():
+        return
+
+    async def top_up():
+        try:
+            await generate_questions(llm, doc_id, text)
+        except Exception as e:
+            print(f"   ⚠️ Question Bank top-up failed: {e}")
+        finally:
+            _top_ups.pop(doc_id, None)
+
+    _top_ups[doc_id] = asyncio.create_task(top_up())
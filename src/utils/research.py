@@ -0,0 +1,98 @@
+import os
+import time
+import asyncio
+
+from langchain_community.utilities import SerpAPIWrapper
+
+from src.utils.bm25 import rank
+from src.utils.fetcher import fetch_text
+
+# --- CONFIG ---
+RESEARCH_TOP_N = int(os.getenv("RESEARCH_TOP_N", "4"))                 # result pages fetched in parallel
+RESEARCH_DEADLINE = float(os.getenv("RESEARCH_DEADLINE", "8"))          # seconds for all fetches together
+RESEARCH_PAGE_CHARS = 30000                                             # text read per page before ranking
+PASSAGE_CHARS = 700                                                     # size of one ranked passage
+
+
+def split_passages(text: str, size: int = PASSAGE_CHARS) -> list:
+    """Groups consecutive lines into passages of roughly `size` characters."""
+    passages, current, length = [], [], 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if current and length + len(line) > size:
+            passages.append(" ".join(current))
+            current, length = [], 0
+        current.append(line[:size])
+        length += len(line) + 1
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+async def fetch_pages(urls: list, deadline: float) -> dict:
+    """Fetches all urls concurrently; whatever hasn't finished by the deadline is dropped."""
+    tasks = {asyncio.create_task(fetch_text(url, max_chars=RESEARCH_PAGE_CHARS)): url for url in urls}
+    if not tasks:
+        return {}
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        print(f"   ⏱️ Deep Research: {len(pending)} page(s) missed the {deadline:.0f}s deadline.")
+
+    pages = {}
+    for task in done:
+        text = task.result()  # fetch_text never raises; failures come back as 'Error: ...' strings
+        if text and not text.startswith(("Error", "Scraping failed")):
+            pages[tasks[task]] = text
+    return pages
+
+
+async def deep_research(query: str, max_passages: int = 6, top_n: int = RESEARCH_TOP_N,
+                        deadline: float = RESEARCH_DEADLINE) -> str:
+    """
+    Searches Google (SerpAPI), reads the top_n result pages concurrently within
+    `deadline`, splits them into passages and returns only the passages that
+    best match the query (BM25), each labelled with its source URL.
+    """
+    start = time.perf_counter()
+    results = await SerpAPIWrapper().aresults(query)
+    organic = [r for r in results.get("organic_results") or [] if r.get("link")][:top_n]
+    if not organic:
+        return "No search results found on Google."
+
+    print(f"🔗 Deep Research: reading {len(organic)} results for '{query[:40]}'...")
+    pages = await fetch_pages([r["link"] for r in organic], deadline)
+
+    # Candidate passages: Google snippets (always available) + page passages
+    candidates = []  # (result, passage)
+    for result in organic:
+        if result.get("snippet"):
+            candidates.append((result, result["snippet"]))
+        candidates.extend((result, p) for p in split_passages(pages.get(result["link"], "")))
+
+    ranked = rank(query, [passage for _, passage in candidates], top_k=max_passages)
+    if not ranked:
+        ranked = [(i, 0.0) for i in range(min(max_passages, len(candidates)))]  # nothing matched: keep search order
+
+    lines = [f"### RESEARCH RESULTS for: {query}"]
+    sources = []
+    seen = set()
+    for index, _ in ranked:
+        result, passage = candidates[index]
+        if passage in seen:
+            continue
+        seen.add(passage)
+        if result["link"] not in sources:
+            sources.append(result["link"])
+        lines.append(f"\n[{sources.index(result['link']) + 1}] {passage}")
+
+    lines.append("\n### SOURCES")
+    for i, link in enumerate(sources, 1):
+        title = next((r.get("title") for r in organic if r["link"] == link), "")
+        lines.append(f"[{i}] {title} - {link}")
+
+    print(f"   ✅ Deep Research: {len(seen)} passages from {len(pages)}/{len(organic)} pages in {time.perf_counter() - start:.1f}s.")
+    return "\n".join(lines)
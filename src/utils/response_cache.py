@@ -0,0 +1,169 @@
+import os
+import re
+import time
+import hashlib
+
+import numpy as np
+
+from src.utils.sqlite_kv import SqliteKV
+
+# --- CONFIG ---
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "data/response_cache.sqlite3")  # 🔒 Permanent
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))  # LRU beyond this
+# Cosine similarity above which a differently worded question counts as the same one
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.92"))
+
+# Quizzes must be fresh every time and grading depends on the session's answer key
+CACHEABLE_MODES = {"summarize", "simplify", "query", "advisor"}
+
+
+def normalize_query(text: str) -> str:
+    """'Summarize Chapter 3!!' -> 'summarize chapter 3'"""
+    text = re.sub(r"[^\w\s]", " ", (text or "").lower())
+    return " ".join(text.split())
+
+
+def exact_key(mode: str, doc_key: str, query: str, context: str = "") -> str:
+    return hashlib.sha256(f"{mode}\n{doc_key}\n{context}\n{normalize_query(query)}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Final answers keyed by (mode, document content hash, conversation context, normalized query).
+    Lookup is exact first, then by embedding similarity among the entries of
+    the same (mode, document, context). Entries expire after RESPONSE_CACHE_TTL (or the
+    shorter ttl given to store()) and the least recently used ones are dropped above
+    RESPONSE_CACHE_MAX_ENTRIES.
+    """
+
+    def __init__(self, path: str = RESPONSE_CACHE_PATH, ttl: float = RESPONSE_CACHE_TTL,
+                 max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, similarity: float = RESPONSE_CACHE_SIMILARITY):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+
+        self._db = SqliteKV(
+            path,
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, mode TEXT NOT NULL, doc_key TEXT NOT NULL, query TEXT NOT NULL,"
+            " vector BLOB, response TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL,"
+            " context TEXT NOT NULL DEFAULT '', expires_at REAL)",
+            "CREATE INDEX IF NOT EXISTS responses_scope ON responses (mode, doc_key)",
+        )
+        # Cache files written before conversation contexts / per-entry expiry
+        self._db.add_column("responses", "context", "TEXT NOT NULL DEFAULT ''")
+        self._db.add_column("responses", "expires_at", "REAL")
+
+    def lookup(self, mode: str, doc_key: str, query: str, vector=None, count_miss: bool = True, context: str = ""):
+        """
+        Returns (response, 'exact' | 'semantic') or (None, None).
+        count_miss=False for an exact-only probe that is followed by a semantic lookup.
+        context identifies the earlier turns of the conversation ('' for a first turn).
+        """
+        now = time.time()
+        key = exact_key(mode, doc_key, query, context)
+        with self._db.transaction() as conn:
+            row = conn.execute(
+                "SELECT key, response FROM responses WHERE key = ? AND created_at > ? AND COALESCE(expires_at, ?) > ?",
+                (key, now - self.ttl, now + 1, now),
+            ).fetchone()
+            kind = "exact"
+
+            if row is None and vector is not None:
+                rows = conn.execute(
+                    "SELECT key, response, vector FROM responses"
+                    " WHERE mode = ? AND doc_key = ? AND context = ? AND created_at > ?"
+                    " AND COALESCE(expires_at, ?) > ? AND vector IS NOT NULL",
+                    (mode, doc_key, context, now - self.ttl, now + 1, now),
+                ).fetchall()
+                if rows:
+                    matrix = np.stack([np.frombuffer(r[2], dtype=np.float32) for r in rows])
+                    query_vec = np.asarray(vector, dtype=np.float32)
+                    scores = matrix @ query_vec / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vec) + 1e-9)
+                    best = int(scores.argmax())
+                    if scores[best] >= self.similarity:
+                        row, kind = rows[best][:2], "semantic"
+
+            if row is None:
+                self.misses += count_miss
+                return None, None
+
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, row[0]))
+        self.hits[kind] += 1
+        return row[1], kind
+
+    def store(self, mode: str, doc_key: str, query: str, response: str, vector=None, context: str = "", ttl: float = None):
+        """ttl shortens the entry's lifetime below the cache TTL (e.g. answers built from web search)."""
+        now = time.time()
+        expires_at = now + min(ttl, self.ttl) if ttl is not None else None
+        blob = np.asarray(vector, dtype=np.float32).tobytes() if vector is not None else None
+        with self._db.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses"
+                " (key, mode, doc_key, query, vector, response, created_at, last_used, context, expires_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (exact_key(mode, doc_key, query, context), mode, doc_key, normalize_query(query), blob, response,
+                 now, now, context, expires_at),
+            )
+            # TTL + LRU eviction
+            conn.execute("DELETE FROM responses WHERE created_at <= ? OR expires_at <= ?", (now - self.ttl, now))
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def invalidate(self, doc_key: str = None, mode: str = None) -> int:
+        """Drops the entries of a document and/or mode (e.g. when it is re-indexed or evicted)."""
+        clauses, params = [], []
+        if doc_key is not None:
+            clauses.append("doc_key = ?")
+            params.append(doc_key)
+        if mode is not None:
+            clauses.append("mode = ?")
+            params.append(mode)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return self._db.execute(f"DELETE FROM responses{where}", params)
+
+    def stats(self) -> dict:
+        entries = self._db.fetch_all("SELECT COUNT(*) FROM responses")[0][0]
+        hits = self.hits["exact"] + self.hits["semantic"]
+        total = hits + self.misses
+        return {
+            "entries": entries,
+            "exact_hits": self.hits["exact"],
+            "semantic_hits": self.hits["semantic"],
+            "misses": self.misses,
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+        }
+
+
+_cache = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
+
+
+def get_response_cache_stats() -> dict:
+    return get_response_cache().stats()
+
+
+def invalidate_document(doc_key: str):
+    deleted = get_response_cache().invalidate(doc_key=doc_key)
+    if deleted:
+        print(f"🧹 Response Cache: dropped {deleted} answers for document {doc_key[:12]}.")
+
+
+def invalidate_mode(mode: str):
+    """Drops every cached answer of one mode (e.g. 'advisor' after the faculty data changed)."""
+    deleted = get_response_cache().invalidate(mode=mode)
+    if deleted:
+        print(f"🧹 Response Cache: dropped {deleted} '{mode}' answers.")
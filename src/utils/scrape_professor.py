@@ -1,107 +1,245 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
 import json
 import os
 import re
-from urllib.parse import urljoin
+import time
+from urllib.parse import urljoin, urlsplit
+
+import lxml.html
+
+from src.utils.fetcher import fetch
 
 # NCKU CSIE Faculty Page
 BASE_URL = "https://www.csie.ncku.edu.tw"
 URL = f"{BASE_URL}/zh-hant/members/csie"
-
-def scrape_ncku_professors():
+PROFESSORS_JSON = "data/professors.json"
+
+# --- CONFIG ---
+PROFILE_CONCURRENCY = int(os.getenv("PROFILE_CONCURRENCY", "4"))  # profile pages fetched at once
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.2"))    # min seconds between two request starts (be polite)
+MAX_CARD_CHARS = 800   # a normal profile card is 200-400 chars; bigger blocks hold several people
+MAX_AREAS_CHARS = 400
+
+EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+LAB_RE = re.compile(r'(\S*實驗室)')
+PROFILE_HREF_RE = re.compile(r'/members/[^/?#]+/?$')
+JUNK_KEYWORDS = ["台南市", "交通資訊", "系所簡介", "檔案下載", "National", "Cheng", "Kung", "師資", "Faculty"]
+DEPARTMENT_EMAIL = "em62500@email.ncku.edu.tw"
+HEADING_TAGS = ("h4", "h3", "h5", "strong")
+# Labels of the research-areas section on a profile page
+AREA_LABELS = ("研究領域", "研究方向", "研究專長", "研究興趣", "專長", "Research Areas", "Research Interests", "Expertise")
+
+
+def save_professors(professors: list, path: str = PROFESSORS_JSON):
+    """Writes professors.json atomically (readers never see a half-written file)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(professors, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _parse_html(html):
+    if isinstance(html, bytes):
+        return lxml.html.fromstring(html, parser=lxml.html.HTMLParser(encoding="utf-8"))
+    return lxml.html.fromstring(html)
+
+
+def _text(element) -> str:
+    """Same as BeautifulSoup's get_text(" ", strip=True), minus the literal '&nbsp' the site leaves in."""
+    pieces = (piece.replace("&nbsp", " ").strip() for piece in element.itertext())
+    return " ".join(" ".join(piece for piece in pieces if piece).split())
+
+
+def parse_listing(html, base_url: str = BASE_URL) -> list:
+    """
+    Single pass over the faculty listing (lxml).
+
+    Each professor card is found from its profile link: walking up from the link,
+    the card is the outermost <div> that still links to only ONE profile. Link
+    ancestors are counted once, and each card's text is read exactly once (the old
+    parser re-read every nested container, quadratic in the nesting depth).
+    """
+    tree = _parse_html(html)
+
+    # --- 1. Profile links, and which profiles every ancestor contains ---
+    first_link = {}   # profile url -> first <a> pointing at it
+    contains = {}     # element -> set of profile urls below it
+    for a in tree.iter("a"):
+        href = a.get("href") or ""
+        if not PROFILE_HREF_RE.search(href) or href.rstrip("/").endswith("/members/csie"):
+            continue
+        url = urljoin(base_url, href)
+        first_link.setdefault(url, a)
+        for ancestor in a.iterancestors():
+            contains.setdefault(ancestor, set()).add(url)
+
+    professors, seen_names = [], set()
+    for profile_url, link in first_link.items():
+        # --- 2. Card = outermost single-profile <div> ---
+        card = None
+        for ancestor in link.iterancestors():
+            if len(contains[ancestor]) > 1:
+                break
+            if ancestor.tag == "div":
+                card = ancestor
+        if card is None:
+            continue
+
+        raw_text = _text(card)
+
+        # --- 🛡️ FILTER 1: Must look like a person ---
+        if "@" not in raw_text and "教授" not in raw_text:
+            continue
+        # --- 🛡️ FILTER 2: Ignore Department Office ---
+        if DEPARTMENT_EMAIL in raw_text:
+            continue
+        # --- 🛡️ FILTER 3: Ignore Giant Containers ---
+        if len(raw_text) > MAX_CARD_CHARS or len(raw_text) <= 20:
+            continue
+
+        # Extract Name (first heading of the card, else the link text)
+        heading = next(card.iter(*HEADING_TAGS), None)
+        name = _text(heading) if heading is not None else _text(link)
+
+        # --- 🛡️ FILTER 4: Ignore Junk Keywords ---
+        if not name or any(k in name for k in JUNK_KEYWORDS) or name[0].isdigit():
+            continue
+        # Deduplication
+        if name in seen_names or len(name) > 30:
+            continue
+        seen_names.add(name)
+
+        email_match = EMAIL_RE.search(raw_text)
+        lab_match = LAB_RE.search(raw_text)
+        professors.append({
+            "name": name,
+            "email": email_match.group(0) if email_match else "N/A",
+            "lab": lab_match.group(0) if lab_match else "N/A",
+            "profile_url": profile_url,
+            "raw_info": raw_text,
+        })
+    return professors
+
+
+def parse_profile(html, page_url: str) -> dict:
+    """
+    Fields only found on a professor's own page: research areas, lab website, email.
+    Missing fields are left out.
+    """
+    tree = _parse_html(html)
+    found = {}
+
+    # --- 1. Research areas: the element right after an area label ('研究領域', 'Research Areas'...) ---
+    for element in tree.iter("h1", "h2", "h3", "h4", "h5", "h6", "strong", "b", "th", "dt", "label", "span", "div", "p"):
+        own_text = (element.text or "").strip().rstrip(":：").strip()
+        if own_text not in AREA_LABELS:
+            continue
+        areas = _text(element)[len(own_text):].lstrip(":： ")  # 'Research Areas: AI, ...' on one line
+        if not areas and (element.tail or "").strip():
+            areas = " ".join(element.tail.split()).lstrip(":： ")  # <strong>研究領域：</strong> AI, ...
+        if not areas:
+            sibling = element.getnext()
+            if sibling is None and element.getparent() is not None:
+                sibling = element.getparent().getnext()  # <th>label</th> -> next cell / <h4> inside a header div
+            areas = _text(sibling) if sibling is not None else ""
+        if areas:
+            found["areas"] = areas[:MAX_AREAS_CHARS]
+            break
+
+    # --- 2. Lab website: an outside link labelled as a lab ---
+    own_host = urlsplit(page_url).netloc
+    for a in tree.iter("a"):
+        href = urljoin(page_url, a.get("href") or "")
+        label = _text(a)
+        if href.startswith("http") and urlsplit(href).netloc != own_host and ("實驗室" in label or "lab" in label.lower()):
+            found["lab_url"] = href
+            break
+
+    # --- 3. Email: mailto link first, else anything that looks like an address (never the department office's) ---
+    candidates = [
+        a.get("href")[7:].split("?")[0].strip()
+        for a in tree.iter("a") if (a.get("href") or "").lower().startswith("mailto:")
+    ]
+    candidates += [match.group(0) for match in EMAIL_RE.finditer(_text(tree))]
+    email = next((e for e in candidates if e and e.lower() != DEPARTMENT_EMAIL), None)
+    if email:
+        found["email"] = email
+    return found
+
+
+async def enrich_profiles(professors: list, concurrency: int = PROFILE_CONCURRENCY,
+                          interval: float = PROFILE_INTERVAL) -> int:
+    """
+    Fetches every profile page concurrently (at most `concurrency` in flight, request
+    starts at least `interval` apart) and fills in areas / lab_url / email.
+    Failed pages are skipped. Returns the number of professors enriched.
+    """
+    slots = asyncio.Semaphore(concurrency)
+    pacing = asyncio.Lock()
+    next_start = 0.0
+
+    async def enrich(prof):
+        nonlocal next_start
+        if not prof.get("profile_url", "N/A").startswith("http"):
+            return False
+        async with slots:
+            async with pacing:
+                wait = next_start - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                next_start = time.monotonic() + interval
+            try:
+                result = await fetch(prof["profile_url"])
+                if not result.ok:
+                    return False
+                details = await asyncio.to_thread(parse_profile, result.body, prof["profile_url"])
+            except Exception as e:
+                print(f"   ⚠️ Profile of {prof.get('name')} skipped: {e}")
+                return False
+
+        prof["areas"] = details.get("areas", prof.get("areas", "N/A"))
+        prof["lab_url"] = details.get("lab_url", prof.get("lab_url", "N/A"))
+        if details.get("email"):
+            prof["email"] = details["email"]  # the profile page is cleaner than the listing card
+        return True
+
+    results = await asyncio.gather(*[enrich(p) for p in professors])
+    return sum(results)
+
+
+async def scrape_ncku_professors(save: bool = True, enrich: bool = True):
+    """
+    Scrapes the faculty listing, then (enrich=True) every professor's profile page.
+    save=False only returns the professors (the incremental refresh writes the
+    file after re-indexing).
+    """
     print(f"🕷️ Scraping {URL}...")
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
 
     try:
-        response = requests.get(URL, headers=headers, timeout=15)
-        response.encoding = 'utf-8'
-        
-        if response.status_code != 200:
-            print(f"❌ Failed to retrieve page (Status: {response.status_code})")
+        # Shared fetcher: pooled connection, byte budget, ETag revalidation
+        start = time.perf_counter()
+        response = await fetch(URL)
+
+        if not response.ok:
+            print(f"❌ Failed to retrieve page (Status: {response.status})")
             return []
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        professors = []
-
-        # Find all potential blocks
-        potential_blocks = soup.find_all("div", class_=re.compile(r"(row|item|col|d-flex)"))
-        seen_names = set()
-
-        for block in potential_blocks:
-            raw_text = block.get_text(separator=" ", strip=True)
-            
-            # --- 🛡️ FILTER 1: Must look like a person ---
-            if "@" not in raw_text and "教授" not in raw_text:
-                continue
-
-            # --- 🛡️ FILTER 2: Ignore Department Office ---
-            if "em62500@email.ncku.edu.tw" in raw_text:
-                continue
-
-            # --- 🛡️ FILTER 3: Ignore Giant Containers (THE FIX) ---
-            # If the text is massive (holds multiple people), skip it.
-            # A normal profile is usually 200-400 chars.
-            if len(raw_text) > 800:
-                continue
-
-            # Extract Name
-            name = "Unknown"
-            profile_url = "N/A"
-            
-            header_link = block.find(["h4", "h3", "h5", "strong"])
-            
-            if header_link:
-                name = header_link.get_text(strip=True)
-                a_tag = header_link.find("a") if not header_link.name == 'a' else header_link
-                if not a_tag:
-                    a_tag = block.find("a", href=True)
-                if a_tag and a_tag.has_attr("href"):
-                    profile_url = urljoin(BASE_URL, a_tag["href"])
-            else:
-                name = " ".join(raw_text.split()[:3])
-
-            # --- 🛡️ FILTER 4: Ignore Junk Keywords ---
-            junk_keywords = ["台南市", "交通資訊", "系所簡介", "檔案下載", "National", "Cheng", "Kung", "師資", "Faculty"]
-            if any(k in name for k in junk_keywords):
-                continue
-            
-            if name[0].isdigit():
-                continue
-                
-            # Filter invalid header links
-            if profile_url.strip().endswith("/members/csie"):
-                continue
-
-            # Deduplication
-            if name in seen_names or len(name) > 30: continue
-            seen_names.add(name)
-
-            # Extract Details
-            email_match = re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', raw_text)
-            email = email_match.group(0) if email_match else "N/A"
-
-            lab_match = re.search(r'(\S*實驗室)', raw_text)
-            lab_name = lab_match.group(0) if lab_match else "N/A"
-
-            if len(raw_text) > 20: 
-                professors.append({
-                    "name": name,
-                    "email": email,
-                    "lab": lab_name,
-                    "profile_url": profile_url,
-                    "raw_info": raw_text
-                })
+        # --- 1. Listing page (single pass) ---
+        parse_start = time.perf_counter()
+        professors = await asyncio.to_thread(parse_listing, response.body)
+        print(f"   📄 Listing: {len(professors)} professors, fetched in {parse_start - start:.2f}s, parsed in {(time.perf_counter() - parse_start) * 1000:.0f}ms.")
+
+        # --- 2. Profile pages (concurrent, rate-limited) ---
+        if enrich and professors:
+            enrich_start = time.perf_counter()
+            enriched = await enrich_profiles(professors)
+            print(f"   👤 Profiles: {enriched}/{len(professors)} enriched in {time.perf_counter() - enrich_start:.1f}s.")
 
         # Save to JSON
-        os.makedirs("data", exist_ok=True)
-        with open("data/professors.json", "w", encoding="utf-8") as f:
-            json.dump(professors, f, ensure_ascii=False, indent=2)
-        
-        print(f"✅ Saved {len(professors)} professors (Cleaned container issues).")
+        if save:
+            save_professors(professors)
+            print(f"✅ Saved {len(professors)} professors in {time.perf_counter() - start:.1f}s.")
         return professors
 
     except Exception as e:
@@ -109,4 +247,4 @@ def scrape_ncku_professors():
         return []
 
 if __name__ == "__main__":
-    scrape_ncku_professors()
\ No newline at end of file
+    asyncio.run(scrape_ncku_professors())
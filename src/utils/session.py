@@ -0,0 +1,29 @@
+import os
+import re
+import hashlib
+
+# --- CONFIG ---
+UPLOAD_ROOT = "uploads"          # 🗑️ Ephemeral (one sub-folder per session)
+DEFAULT_SESSION = "default"      # Used by clients that don't send a session id
+
+
+def safe_session_id(session_id: str) -> str:
+    """
+    Normalizes a client-supplied session id so it is safe to use as a
+    folder name and as part of a ChromaDB collection name (at most 48 chars).
+    Ids that had to be changed get a short hash of the raw id appended, so two
+    ids that only differ in replaced or cut-off characters stay distinct.
+    """
+    session_id = session_id or DEFAULT_SESSION
+    clean = re.sub(r"[^a-zA-Z0-9_-]", "_", session_id)
+    if clean == session_id and len(clean) <= 48:
+        return clean
+    digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:8]
+    return f"{clean[:39]}-{digest}"
+
+
+def session_upload_dir(session_id: str) -> str:
+    """Returns (and creates) the private upload folder of a session."""
+    path = os.path.join(UPLOAD_ROOT, safe_session_id(session_id))
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+_LOOKUP_BATCH = 500  # SQLite limits the number of '?' placeholders per query
+
+
+class SqliteKV:
+    """
+    The storage shared by the on-disk caches (embeddings, summaries, responses, tool
+    results): one SQLite file in WAL mode, one connection shared by all threads and
+    serialized by a lock. The callers own their tables and SQL.
+    """
+
+    def __init__(self, path: str, *schema: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in schema:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    @contextmanager
+    def transaction(self):
+        """Several statements under the lock, committed together."""
+        with self._lock:
+            try:
+                yield self._conn
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def fetch_all(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def fetch_in(self, sql: str, params: list, keys: list) -> list:
+        """Rows for every key, where sql ends with 'IN ({})'; keys are sent in batches."""
+        rows = []
+        with self._lock:
+            for i in range(0, len(keys), _LOOKUP_BATCH):
+                batch = keys[i:i + _LOOKUP_BATCH]
+                rows.extend(self._conn.execute(sql.format(",".join("?" * len(batch))), [*params, *batch]))
+        return rows
+
+    def execute(self, sql: str, params=()) -> int:
+        """Runs one write and commits it. Returns the number of rows changed."""
+        with self.transaction() as conn:
+            return conn.execute(sql, params).rowcount
+
+    def execute_many(self, sql: str, rows: list):
+        with self.transaction() as conn:
+            conn.executemany(sql, rows)
+
+    def add_column(self, table: str, column: str, definition: str):
+        """Adds a column to a table created by an older version (no-op if it exists)."""
+        with self.transaction() as conn:
+            if column not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
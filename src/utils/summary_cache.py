@@ -0,0 +1,57 @@
+import os
+import hashlib
+from typing import List
+
+from src.utils.sqlite_kv import SqliteKV
+
+# --- CONFIG ---
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", "data/summary_cache.sqlite3")  # 🔒 Permanent
+
+
+def summary_key(text: str, prompt_version: str) -> str:
+    """Content address of a section: same text + same prompt = same summary."""
+    return hashlib.sha256(f"{prompt_version}\n{text}".encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    On-disk cache of partial (map/reduce) summaries keyed by (model, sha256 of prompt + text).
+    Sections are summarized independently of the user's question, so any later
+    summary request over the same document reuses them.
+    """
+
+    def __init__(self, model_name: str, path: str = SUMMARY_CACHE_PATH):
+        self.model_name = model_name or "default"
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+        self._db = SqliteKV(
+            path,
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " model TEXT NOT NULL, hash TEXT NOT NULL, summary TEXT NOT NULL,"
+            " PRIMARY KEY (model, hash))",
+        )
+
+    def get_many(self, keys: List[str]) -> dict:
+        found = dict(self._db.fetch_in(
+            "SELECT hash, summary FROM summaries WHERE model = ? AND hash IN ({})", [self.model_name], list(set(keys))
+        ))
+        self.hits += sum(1 for k in keys if k in found)
+        self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put_many(self, items: dict):
+        self._db.execute_many(
+            "INSERT OR REPLACE INTO summaries (model, hash, summary) VALUES (?, ?, ?)",
+            [(self.model_name, k, v) for k, v in items.items()],
+        )
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
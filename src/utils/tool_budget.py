@@ -0,0 +1,128 @@
+import os
+import time
+import asyncio
+
+from langchain_core.messages import AIMessage, ToolMessage, SystemMessage
+
+from src.utils.research import RESEARCH_DEADLINE
+
+# --- CONFIG ---
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "60"))  # seconds per chat request (whole graph run)
+MAX_TOOL_ROUNDS = int(os.getenv("MAX_TOOL_ROUNDS", "3"))        # agent -> tools -> agent cycles per request
+MIN_TOOL_TIME = 3.0  # don't start a tool round with less time left than this
+MIN_ANSWER_TIME = float(os.getenv("MIN_ANSWER_TIME", "10"))  # an agent's LLM call always gets at least this long
+
+# Seconds a single tool call may take (the remaining request time caps it further)
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "15"))
+TOOL_TIMEOUTS = {
+    "deep_research": RESEARCH_DEADLINE + 5,  # search + concurrent page reads
+    "scrape_website": 12,
+    "google_search": 10,
+    "tavily_search": 10,
+    "ncku_faculty_search": 10,
+    "wolfram_alpha": 10,
+    "arxiv": 10,
+    "wikipedia": 8,
+    "python_calculator": 5,
+}
+
+BUDGET_NOTE = (
+    "TOOL BUDGET EXHAUSTED: No more tools can be called for this request. "
+    "Answer now using the document context and the tool results you already have. "
+    "If something could not be looked up, say so briefly."
+)
+LLM_TIMEOUT_MESSAGE = (
+    "⏱️ Sorry, the model took too long to answer and the request ran out of time. "
+    "Please try again, or ask a shorter or more specific question."
+)
+
+
+def new_deadline() -> float:
+    return time.time() + REQUEST_DEADLINE
+
+
+def time_left(state) -> float:
+    deadline = state.get("deadline") or new_deadline()
+    return deadline - time.time()
+
+
+def budget_exhausted(state) -> bool:
+    """True when the agent must answer without calling more tools."""
+    return (state.get("tool_rounds") or 0) >= MAX_TOOL_ROUNDS or time_left(state) < MIN_TOOL_TIME
+
+
+def bind_tools_within_budget(llm, tools, state):
+    """
+    The agent's model: with tools while budget remains, otherwise the plain
+    model plus a note telling it to answer with what it has.
+    Returns (model, extra system messages).
+    """
+    if budget_exhausted(state):
+        print(f"   ⏱️ Tool budget exhausted (rounds {state.get('tool_rounds') or 0}/{MAX_TOOL_ROUNDS}, {max(time_left(state), 0):.0f}s left).")
+        return llm, [SystemMessage(content=BUDGET_NOTE)]
+    return llm.bind_tools(tools), []
+
+
+async def invoke_within_budget(model, messages, state):
+    """
+    Agent LLM call capped by the request deadline (never less than MIN_ANSWER_TIME).
+    Returns (message, timed_out); on timeout the message is a short apology.
+    """
+    timeout = max(time_left(state), MIN_ANSWER_TIME)
+    try:
+        return await asyncio.wait_for(model.ainvoke(messages), timeout=timeout), False
+    except asyncio.TimeoutError:
+        print(f"   ⏱️ LLM call cancelled after {timeout:.0f}s.")
+        return AIMessage(content=LLM_TIMEOUT_MESSAGE), True
+
+
+def make_tool_node(tools):
+    """
+    Drop-in replacement for ToolNode that runs the requested tool calls
+    concurrently, each under its own timeout (capped by the request deadline).
+    Calls that time out or fail come back as error ToolMessages, so the agent
+    can still answer. Beyond the budget, calls are not executed at all.
+    """
+    tools_by_name = {t.name: t for t in tools}
+
+    async def run_call(call, timeout, config):
+        tool = tools_by_name.get(call["name"])
+        if tool is None:
+            return ToolMessage(content=f"Error: unknown tool '{call['name']}'.", tool_call_id=call["id"], name=call["name"], status="error"), True
+        start = time.perf_counter()
+        try:
+            message = await asyncio.wait_for(tool.ainvoke({**call, "type": "tool_call"}, config), timeout=timeout)
+            print(f"   🔧 {call['name']} finished in {time.perf_counter() - start:.1f}s.")
+            return message, False
+        except asyncio.TimeoutError:
+            print(f"   ⏱️ {call['name']} cancelled after {timeout:.0f}s.")
+            content = f"Error: {call['name']} timed out after {timeout:.0f}s and was cancelled. Answer with the information you already have."
+        except Exception as e:
+            print(f"   ⚠️ {call['name']} failed: {e}")
+            content = f"Error: {call['name']} failed ({e}). Answer with the information you already have."
+        return ToolMessage(content=content, tool_call_id=call["id"], name=call["name"], status="error"), True
+
+    async def tool_node(state, config):
+        calls = getattr(state["messages"][-1], "tool_calls", None) or []
+        rounds = (state.get("tool_rounds") or 0) + 1
+        remaining = time_left(state)
+
+        if budget_exhausted(state):
+            # Every tool call needs an answer; tell the model instead of running it
+            messages = [
+                ToolMessage(content=BUDGET_NOTE, tool_call_id=c["id"], name=c["name"], status="error")
+                for c in calls
+            ]
+            return {"messages": messages, "tool_rounds": rounds, "degraded": True}
+
+        print(f"🛠️ Tool round {rounds}/{MAX_TOOL_ROUNDS}: {', '.join(c['name'] for c in calls)} ({remaining:.0f}s left)")
+        results = await asyncio.gather(*[
+            run_call(c, min(TOOL_TIMEOUTS.get(c["name"], DEFAULT_TOOL_TIMEOUT), remaining), config)
+            for c in calls
+        ])
+        update = {"messages": [message for message, _ in results], "tool_rounds": rounds}
+        if any(failed for _, failed in results):
+            update["degraded"] = True
+        return update
+
+    return tool_node
@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import hashlib
+import inspect
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from langchain_core.tools.base import _get_runnable_config_param
+
+from src.utils.sqlite_kv import SqliteKV
+
+# --- CONFIG ---
+TOOL_CACHE_PATH = os.getenv("TOOL_CACHE_PATH", "data/tool_cache.sqlite3")  # 🔒 Permanent
+TOOL_CACHE_MAX_MB = float(os.getenv("TOOL_CACHE_MAX_MB", "100"))  # LRU eviction above this
+
+HOUR = 3600
+# Seconds a result stays valid, per tool name. Search results go stale fast,
+# reference material (papers, encyclopedia, math) barely changes.
+TOOL_TTLS = {
+    "google_search": 6 * HOUR,
+    "tavily_search": 6 * HOUR,
+    "deep_research": 12 * HOUR,
+    "scrape_website": 24 * HOUR,
+    "ncku_faculty_search": 7 * 24 * HOUR,
+    "arxiv": 7 * 24 * HOUR,
+    "wikipedia": 3 * 24 * HOUR,
+    "wolfram_alpha": 30 * 24 * HOUR,
+}
+DEFAULT_TTL = HOUR
+
+# Only successful, non-empty results are cached. Outputs that report a failure
+# (ours, and the LangChain wrappers' "nothing found" replies) are not.
+ERROR_PREFIXES = ("Error", "Scraping failed", "Deep research failed", "No search results")
+FAILURE_MARKERS = (
+    "no good wikipedia search result was found",  # WikipediaAPIWrapper
+    "wolfram alpha wasn't able to answer it",     # WolframAlphaAPIWrapper
+    "no good search result found",                # SerpAPIWrapper
+    "no good arxiv result was found",             # ArxivAPIWrapper
+    "arxiv exception",
+)
+
+
+def is_cacheable_result(result) -> bool:
+    """False for empty results, failure messages and error payloads."""
+    if result is None:
+        return False
+    if isinstance(result, str):
+        text = result.strip()
+        return bool(text) and not text.startswith(ERROR_PREFIXES) and not text.lower().startswith(FAILURE_MARKERS)
+    if isinstance(result, dict):
+        return bool(result) and not result.get("error") and result.get("results") != []  # Tavily: {"results": [...]}
+    if isinstance(result, (list, tuple)):
+        return bool(result)
+    return True
+
+
+def normalize_args(tool_input) -> str:
+    """Same question, same key: whitespace collapsed, case folded (except URLs), keys sorted."""
+    def clean(key, value):
+        if isinstance(value, str):
+            value = " ".join(value.split())
+            return value if "url" in key.lower() else value.lower()
+        return value
+
+    if isinstance(tool_input, dict):
+        tool_input = {k: clean(k, v) for k, v in tool_input.items() if v is not None}
+    else:
+        tool_input = clean("", tool_input)
+    return json.dumps(tool_input, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class ToolCache:
+    """
+    On-disk cache of tool results keyed by (namespace, tool name, normalized arguments).
+    Each entry expires after its tool's TTL; least recently used entries are
+    evicted once the stored results exceed TOOL_CACHE_MAX_MB.
+    """
+
+    def __init__(self, path: str = TOOL_CACHE_PATH, max_mb: float = TOOL_CACHE_MAX_MB):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.counters = {}  # {tool: {"hits": n, "misses": n}}
+
+        self._db = SqliteKV(
+            path,
+            "CREATE TABLE IF NOT EXISTS tool_results ("
+            " key TEXT PRIMARY KEY, tool TEXT NOT NULL, args TEXT NOT NULL, result TEXT NOT NULL,"
+            " size INTEGER NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL)",
+        )
+
+    @staticmethod
+    def key(tool: str, args: str, namespace: str = "") -> str:
+        return hashlib.sha256(f"{namespace}\n{tool}\n{args}".encode("utf-8")).hexdigest()
+
+    def _count(self, tool: str, field: str):
+        self.counters.setdefault(tool, {"hits": 0, "misses": 0})[field] += 1
+
+    def get(self, tool: str, args: str, namespace: str = ""):
+        """Returns (True, result) on a fresh hit, (False, None) otherwise."""
+        now = time.time()
+        key = self.key(tool, args, namespace)
+        with self._db.transaction() as conn:
+            row = conn.execute(
+                "SELECT result FROM tool_results WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE tool_results SET last_used = ? WHERE key = ?", (now, key))
+        self._count(tool, "hits" if row else "misses")
+        return (True, json.loads(row[0])) if row else (False, None)
+
+    def put(self, tool: str, args: str, result, ttl: float, namespace: str = ""):
+        try:
+            payload = json.dumps(result, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return  # not serializable (e.g. artifacts); just don't cache it
+        now = time.time()
+        with self._db.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tool_results (key, tool, args, result, size, expires_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.key(tool, args, namespace), tool, args, payload, len(payload), now + ttl, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now: float):
+        conn.execute("DELETE FROM tool_results WHERE expires_at <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM tool_results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Oldest-used first until we are back under the limit
+        for key, size in conn.execute("SELECT key, size FROM tool_results ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM tool_results WHERE key = ?", (key,))
+            total -= size
+
+    def stats(self) -> dict:
+        entries, size = self._db.fetch_all("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM tool_results")[0]
+        hits = sum(c["hits"] for c in self.counters.values())
+        misses = sum(c["misses"] for c in self.counters.values())
+        return {
+            "entries": entries,
+            "size_mb": round(size / 1024 / 1024, 2),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "per_tool": self.counters,
+        }
+
+
+_cache = None
+
+
+def get_tool_cache() -> ToolCache:
+    global _cache
+    if _cache is None:
+        _cache = ToolCache()
+    return _cache
+
+
+def get_tool_cache_stats() -> dict:
+    return get_tool_cache().stats()
+
+
+class CachedTool(BaseTool):
+    """
+    Wraps any LangChain tool (ours or prebuilt) so repeated calls with the same
+    arguments are answered from the ToolCache. Name, description and argument
+    schema are the wrapped tool's, so the LLM sees no difference.
+    """
+
+    inner: BaseTool
+    ttl: float = DEFAULT_TTL
+    namespace: str = ""
+
+    def _run(self, *args, config: RunnableConfig = None, run_manager=None, **kwargs) -> Any:
+        tool_input = kwargs or (args[0] if args else "")
+        cache = get_tool_cache()
+        normalized = normalize_args(tool_input)
+        hit, result = cache.get(self.name, normalized, self.namespace)
+        if hit:
+            print(f"⚡ Tool Cache: {self.name} hit.")
+            return result
+        func = self.inner._run
+        result = func(*args, **kwargs, **_inner_extras(func, config, run_manager))
+        self._remember(normalized, result)
+        return result
+
+    async def _arun(self, *args, config: RunnableConfig = None, run_manager=None, **kwargs) -> Any:
+        tool_input = kwargs or (args[0] if args else "")
+        cache = get_tool_cache()
+        normalized = normalize_args(tool_input)
+        hit, result = cache.get(self.name, normalized, self.namespace)
+        if hit:
+            print(f"⚡ Tool Cache: {self.name} hit.")
+            return result
+        # Tools without their own _arun run _run in a thread (BaseTool._arun), which expects a sync run_manager
+        own_arun = type(self.inner)._arun is not BaseTool._arun
+        extras = _inner_extras(self.inner._arun if own_arun else self.inner._run, config, run_manager)
+        result = await self.inner._arun(*args, **kwargs, **extras)
+        self._remember(normalized, result)
+        return result
+
+    def _remember(self, normalized: str, result):
+        if not is_cacheable_result(result):
+            return
+        try:
+            get_tool_cache().put(self.name, normalized, result, self.ttl, self.namespace)
+        except Exception as e:
+            print(f"⚠️ Tool Cache: could not store {self.name} result: {e}")
+
+
+def _inner_extras(func, config, run_manager) -> dict:
+    """
+    The run_manager / config arguments BaseTool.run would pass to a tool's _run/_arun.
+    The wrapped tool is called directly (not through invoke), so it does not start
+    a second tool run: callbacks and /chat/stream see one tool_start/tool_end per call.
+    """
+    extras = {}
+    if "run_manager" in inspect.signature(func).parameters:
+        extras["run_manager"] = run_manager
+    if config_param := _get_runnable_config_param(func):
+        extras[config_param] = config or {}
+    return extras
+
+
+def with_cache(tool: BaseTool, ttl: Optional[float] = None, namespace: str = "") -> BaseTool:
+    """Returns the tool wrapped in CachedTool (TTL from TOOL_TTLS unless given)."""
+    return CachedTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema or tool.get_input_schema(),  # prebuilt tools infer it from _run
+        inner=tool,
+        handle_tool_error=tool.handle_tool_error,  # the inner tool's own run no longer handles them
+        ttl=ttl if ttl is not None else TOOL_TTLS.get(tool.name, DEFAULT_TTL),
+        namespace=namespace,
+    )
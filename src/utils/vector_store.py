@@ -1,6 +1,10 @@
 import os
 import json
 import shutil
+import hashlib
+from collections import OrderedDict
+
+import chromadb
 from langchain_chroma import Chroma
 from langchain_ollama import OllamaEmbeddings
 from langchain_text_splitters import (
@@ -9,128 +13,192 @@ from langchain_text_splitters import (
 )
 from langchain_core.documents import Document
 
+from src.utils.embedding_cache import CachedEmbeddings
+
 # --- CONFIG ---
-DB_PATH_USER = "./chroma_db_user"       # 🗑️ Ephemeral (User Docs)
+DB_PATH_USER = "./chroma_db_user"       # 🗑️ Ephemeral (User Docs, one collection per document)
 DB_PATH_FACULTY = "./chroma_db_faculty" # 🔒 Permanent (Professors)
 
 OLLAMA_URL = os.getenv("OLLAMA_LOCAL_URL", "http://localhost:11434")
 EMBED_MODEL = "nomic-embed-text"
 
+# Max number of per-document user collection handles kept at once (LRU)
+MAX_ACTIVE_USER_DBS = int(os.getenv("MAX_ACTIVE_USER_DBS", "32"))
+
 # --- SINGLETON STORAGE ---
-# We store instances here: {'user': ChromaObj, 'faculty': ChromaObj}
+# We store instances here: {'faculty': ChromaObj, 'user:<document_id>': ChromaObj, ...}
 # This prevents opening multiple connections to the same folder (WinError 32 fix)
-_active_dbs = {} 
+# Ordered by last use, so the least recently used user collection handle is released first.
+_active_dbs = OrderedDict()
+
+# One PersistentClient per folder, shared by every collection inside it
+_clients = {}
+
+# Shared, disk-cached embedder (re-indexing identical text never hits Ollama again)
+_embeddings = None
 
 def get_embeddings():
-    return OllamaEmbeddings(
-        model=EMBED_MODEL,
-        base_url=OLLAMA_URL
-    )
+    global _embeddings
+    if _embeddings is None:
+        _embeddings = CachedEmbeddings(
+            OllamaEmbeddings(model=EMBED_MODEL, base_url=OLLAMA_URL),
+            model_name=EMBED_MODEL
+        )
+    return _embeddings
+
+def get_embedding_stats() -> dict:
+    """Hit/miss counters of the embedding cache (for /stats)."""
+    return get_embeddings().stats()
+
+def get_client(path: str):
+    """Returns the shared ChromaDB client for a folder."""
+    if path not in _clients:
+        _clients[path] = chromadb.PersistentClient(path=path)
+    return _clients[path]
+
+
+def user_collection_name(document_id: str) -> str:
+    """
+    Each uploaded document (by content hash) gets its own collection.
+    Sessions only point at documents, so users never see (or wipe) each other's files,
+    and the same file uploaded twice is indexed once.
+    """
+    return f"doc_{document_id[:32]}"
+
+
+def _release_idle_user_dbs():
+    """
+    Forgets the least recently used user collection handles above MAX_ACTIVE_USER_DBS.
+    Chroma collections have nothing to close (the shared client owns the files);
+    this only bounds the handles kept here. The next request re-opens the collection.
+    """
+    user_keys = [key for key in _active_dbs if key.startswith("user:")]
+    for key in user_keys[:max(0, len(user_keys) - MAX_ACTIVE_USER_DBS)]:
+        del _active_dbs[key]
+        print(f"💤 Released idle collection handle for document '{key[5:17]}'.")
+
 
-def get_vector_store(db_type: str):
+def get_vector_store(db_type: str, document_id: str = None):
     """
     The Single Source of Truth for DB connections.
     db_type: "user" or "faculty"
+    document_id: required for "user" (one collection per document)
     """
     global _active_dbs
     
-    # 1. Determine Path & Collection Name
+    # 1. Determine Path, Collection Name & Cache Key
     if db_type == "user":
+        if not document_id:
+            raise ValueError("A document_id is required for the user DB.")
         path = DB_PATH_USER
-        collection = "user_rag_collection"
+        collection = user_collection_name(document_id)
+        key = f"user:{document_id}"
     elif db_type == "faculty":
         path = DB_PATH_FACULTY
         collection = "faculty_rag_collection"
+        key = "faculty"
     else:
         raise ValueError("Invalid db_type. Use 'user' or 'faculty'.")
 
     # 2. Return existing instance if available (Singleton)
-    if db_type in _active_dbs:
-        return _active_dbs[db_type]
+    if key in _active_dbs:
+        _active_dbs.move_to_end(key)
+        return _active_dbs[key]
 
     # 3. Create new ONLY if missing
-    print(f"🔌 Establishing connection to {db_type} ChromaDB...")
+    print(f"🔌 Establishing connection to {key} ChromaDB...")
     instance = Chroma(
-        persist_directory=path,
+        client=get_client(path),
         embedding_function=get_embeddings(),
         collection_name=collection
     )
     
-    _active_dbs[db_type] = instance
+    _active_dbs[key] = instance
+    _release_idle_user_dbs()
     return instance
 
 
-def get_total_chunk_count(filename: str, db_type: str = "user") -> int:
+def clear_database(document_id: str):
     """
-    Returns the exact number of chunks associated with a specific file.
+    Drops ONE document's collection (used when the doc store evicts it).
+    Other documents, and the faculty DB, are untouched.
     """
     try:
-        db = get_vector_store(db_type)
-        # ChromaDB allows filtering by metadata 'where' clause
-        # We assume you stored the filename in metadata={"source": filename}
-        data = db.get(where={"source": filename})
-        
-        count = len(data['ids'])
-        print(f"📊 Found {count} chunks for file: {filename}")
-        return count
-    except Exception as e:
-        print(f"⚠️ Error counting chunks: {e}")
-        return 5 # Fallback default
-
-
-
-def clear_database():
-    """
-    Clears the User DB by deleting content, NOT the folder.
-    This is safe for Windows file locks.
-    """
-    try:
-        # Use the singleton getter
-        db = get_vector_store("user")
-        
-        # Get all IDs currently in the DB
-        existing_data = db.get()
-        ids_to_delete = existing_data['ids']
-        
-        if ids_to_delete:
-            print(f"🗑️ Deleting {len(ids_to_delete)} existing user documents...")
-            db.delete(ids_to_delete)
-            print("✅ User Database content wiped.")
-        else:
-            print("ℹ️ User Database was already empty.")
-            
+        _active_dbs.pop(f"user:{document_id}", None)
+        client = get_client(DB_PATH_USER)
+        client.delete_collection(user_collection_name(document_id))
+        print(f"🗑️ Dropped collection of document {document_id[:12]}.")
         return True
     except Exception as e:
         print(f"❌ Error clearing database: {e}")
         return False
 
-def index_document(text: str, filename: str) -> int:
+# Chunks per embedding request (also the granularity of progress reports)
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+
+def chunk_document(text: str, filename: str) -> list:
     """
-    1. Wipes old User DB content (Safely).
-    2. Indexes new file content.
-    3. Returns the number of chunks created.
+    Splits extracted text into overlapping chunks tagged with the file name.
     """
-    # Step 1: Clear old data safely
-    clear_database()
-
-    # Step 2: Normalize filename (Strip path "uploads/")
+    # Normalize filename (Strip path "uploads/")
     clean_name = os.path.basename(filename)
-    print(f"📊 Indexing new file: {clean_name}")
 
-    # Step 3: Create Chunks
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000, chunk_overlap=100, add_start_index=True
     )
-    # Note: We use clean_name in metadata so get_total_chunk_count finds it later!
-    chunks = splitter.create_documents(
+    # 'source' names the file in every chunk; the chunk count itself is kept in the
+    # doc store manifest (chunk_count) and reaches the nodes through the graph state
+    return splitter.create_documents(
         [text], metadatas=[{"source": clean_name}]
     )
 
-    # Step 4: Add to DB
-    db = get_vector_store("user")
-    db.add_documents(chunks)
-    
-    count = len(chunks)
+def chunk_pages(pages: list, filename: str) -> list:
+    """
+    Same as chunk_document, but for a batch of (page_number, text) tuples.
+    Chunks never span two pages and carry their page number in metadata.
+    """
+    clean_name = os.path.basename(filename)
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000, chunk_overlap=100, add_start_index=True
+    )
+    texts = [text for _, text in pages]
+    metadatas = [{"source": clean_name, "page": page} for page, _ in pages]
+    return splitter.create_documents(texts, metadatas=metadatas)
+
+def chunk_id(chunk: Document) -> str:
+    """Stable id (page + offset), so re-indexing the same document overwrites instead of duplicating."""
+    return f"p{chunk.metadata.get('page', 0)}-{chunk.metadata.get('start_index', 0)}"
+
+def add_chunks(chunks: list, document_id: str, progress=None) -> int:
+    """
+    Embeds and stores chunks in the document's collection, batch by batch.
+    progress(done, total) is called after every committed batch.
+    """
+    db = get_vector_store("user", document_id)
+    total = len(chunks)
+
+    for i in range(0, total, EMBED_BATCH_SIZE):
+        batch = chunks[i:i + EMBED_BATCH_SIZE]
+        db.add_documents(batch, ids=[chunk_id(c) for c in batch])
+        if progress:
+            progress(min(i + EMBED_BATCH_SIZE, total), total)
+
+    return total
+
+def index_document(text: str, filename: str, document_id: str, progress=None) -> int:
+    """
+    1. Chunks the file content.
+    2. Indexes it into the document's collection (idempotent, stable ids).
+    3. Returns the number of chunks created.
+    """
+    print(f"📊 Indexing new file: {os.path.basename(filename)}")
+
+    # Step 1: Create Chunks
+    chunks = chunk_document(text, filename)
+
+    # Step 2: Add to DB
+    count = add_chunks(chunks, document_id, progress)
     print(f"✅ User document indexed successfully. Total Chunks: {count}")
     
     return count
@@ -139,6 +207,59 @@ def index_document(text: str, filename: str) -> int:
 # 2. FACULTY DB MANAGEMENT (Permanent)
 # ==========================================
 
+def professor_id(prof: dict) -> str:
+    """Stable id of a professor across re-scrapes (profile URL, else name)."""
+    url = prof.get("profile_url")
+    key = url if url and url != "N/A" else prof.get("name", "Unknown")
+    return "prof-" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def professor_hash(prof: dict) -> str:
+    """Hash of every field that ends up in the index: same hash, nothing to re-embed."""
+    fields = {k: prof.get(k, "N/A") for k in ("name", "lab", "email", "areas", "profile_url", "raw_info")}
+    return hashlib.sha256(json.dumps(fields, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def professor_documents(prof: dict, splitter=None) -> tuple:
+    """
+    Chunks of one professor, ready for the Faculty DB.
+    Returns (documents, ids); ids are '<professor_id>-<n>', so re-indexing overwrites.
+    """
+    splitter = splitter or TokenTextSplitter(chunk_size=256, chunk_overlap=32)
+    name = prof.get("name", "Unknown")
+    lab = prof.get("lab", "N/A")
+    # 👇 Capture the new field
+    profile_url = prof.get("profile_url", "N/A")
+    raw_info = prof.get("raw_info", "")
+    if not raw_info.strip():
+        return [], []
+
+    # Research areas come from the profile page (scraper enrichment); every chunk carries them
+    areas = prof.get("areas", "N/A")
+    areas_line = f"Areas: {areas}\n" if areas and areas != "N/A" else ""
+
+    pid = professor_id(prof)
+    docs = []
+    for chunk in splitter.split_text(raw_info):
+        content = f"Professor: {name}\nLab: {lab}\n{areas_line}...\n{chunk}"
+        docs.append(Document(
+            page_content=content,
+            # 👇 Save it in metadata
+            metadata={
+                "source": "faculty_db",
+                "name": name,
+                "profile_url": profile_url,
+                # Contact fields let the advisor build a professor record without re-reading the JSON
+                "lab": lab,
+                "email": prof.get("email", "N/A"),
+                # Lets an incremental refresh find (and replace) this professor's chunks
+                "professor_id": pid,
+                "content_hash": professor_hash(prof),
+            }
+        ))
+    return docs, [f"{pid}-{i}" for i in range(len(docs))]
+
+
 def index_professors_to_chroma():
     """
     Indexes professors into the Faculty DB if it's empty.
@@ -162,48 +283,18 @@ def index_professors_to_chroma():
         professors = json.load(f)
 
     splitter = TokenTextSplitter(chunk_size=256, chunk_overlap=32)
-    docs = []
+    docs, ids = [], []
 
     for prof in professors:
-        name = prof.get("name", "Unknown")
-        lab = prof.get("lab", "N/A")
-        areas = prof.get("areas", "N/A")
-        # 👇 Capture the new field
-        profile_url = prof.get("profile_url", "N/A") 
-        raw_info = prof.get("raw_info", "")
-
-        if not raw_info.strip(): continue
-
-        chunks = splitter.split_text(raw_info)
-        for chunk in chunks:
-            content = f"Professor: {name}\nLab: {lab}\n...\n{chunk}"
-            
-            docs.append(Document(
-                page_content=content,
-                # 👇 Save it in metadata
-                metadata={
-                    "source": "faculty_db", 
-                    "name": name, 
-                    "profile_url": profile_url 
-                }
-            ))
+        prof_docs, prof_ids = professor_documents(prof, splitter)
+        docs.extend(prof_docs)
+        ids.extend(prof_ids)
 
     if docs:
         print(f"📥 Adding {len(docs)} faculty chunks...")
         # Add in batches to be safe
         batch_size = 50
         for i in range(0, len(docs), batch_size):
-            db.add_documents(docs[i:i + batch_size])
+            db.add_documents(docs[i:i + batch_size], ids=ids[i:i + batch_size])
         
         print(f"✅ Indexed all faculty to {DB_PATH_FACULTY}")
-
-# ==========================================
-# 3. RETRIEVER ACCESS
-# ==========================================
-
-def get_retriever(k: int = 5, db_type: str = "user"):
-    """
-    Returns retriever from the cached Singleton instance.
-    """
-    db = get_vector_store(db_type)
-    return db.as_retriever(search_kwargs={"k": k})
\ No newline at end of file
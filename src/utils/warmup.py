@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import asyncio
+
+from src.utils.scrape_professor import scrape_ncku_professors, PROFESSORS_JSON
+from src.utils.vector_store import index_professors_to_chroma, get_vector_store, get_client, get_embeddings, DB_PATH_USER
+from src.utils.faculty_index import reload_faculty_index
+from src.utils.llm_setup import get_llm
+from src.utils.intent import get_model
+
+# --- CONFIG ---
+FACULTY_RETRY_INTERVAL = float(os.getenv("FACULTY_RETRY_INTERVAL", "300"))  # seconds between failed faculty builds
+LLM_CHECK_TIMEOUT = float(os.getenv("LLM_CHECK_TIMEOUT", "60"))            # first call may load the model
+LLM_RETRY_INTERVAL = 30
+
+# Subsystems reported by /readyz
+SUBSYSTEMS = ("graph", "user_store", "faculty_index", "llm")
+
+# --- SHARED STATE ---
+# {name: {"ready": bool, "detail": str, "since": epoch}}; subsystems never registered
+# (graph used outside the server, scripts) count as ready
+_status = {}
+
+
+def mark(name: str, ready: bool, detail: str = ""):
+    previous = _status.get(name, {})
+    if previous.get("ready") != ready or previous.get("detail") != detail:
+        _status[name] = {"ready": ready, "detail": detail, "since": time.time()}
+
+
+def mark_starting(*names):
+    """Registers subsystems as not ready yet (called at the very start of the server lifespan)."""
+    for name in names or SUBSYSTEMS:
+        mark(name, False, "starting")
+
+
+def is_ready(name: str) -> bool:
+    return _status.get(name, {}).get("ready", True)
+
+
+def get_readiness() -> dict:
+    subsystems = {name: _status.get(name, {"ready": True, "detail": "not managed"}) for name in SUBSYSTEMS}
+    return {"ready": all(s["ready"] for s in subsystems.values()), "subsystems": subsystems}
+
+
+def _faculty_chunks() -> int:
+    return len(get_vector_store("faculty").get(limit=1)["ids"])
+
+
+def _saved_professors() -> int:
+    """Professors in professors.json (0 if missing, empty or unreadable)."""
+    try:
+        with open(PROFESSORS_JSON, "r", encoding="utf-8") as f:
+            return len(json.load(f))
+    except (OSError, ValueError):
+        return 0
+
+
+async def warm_up_faculty():
+    """
+    Scrapes (when there is no saved faculty data), indexes and loads the faculty DB,
+    retrying every FACULTY_RETRY_INTERVAL if the NCKU site is unreachable. A scrape
+    that found nobody, or an index left empty, is scraped again on the next attempt.
+    Until it succeeds, the advisor answers with a 'still loading' message instead of guessing.
+    """
+    attempt = 0
+    rescrape = False
+    while True:
+        attempt += 1
+        try:
+            # We use 'data/' for persistent system data (Professors)
+            os.makedirs("data", exist_ok=True)
+            if rescrape or not _saved_professors():
+                mark("faculty_index", False, "scraping NCKU website")
+                print("   🚀 No faculty data yet! Building Professor Database in the background...")
+                await scrape_ncku_professors()
+
+            if _saved_professors():
+                mark("faculty_index", False, "indexing")
+                await asyncio.to_thread(index_professors_to_chroma)
+                await asyncio.to_thread(reload_faculty_index)
+                if await asyncio.to_thread(_faculty_chunks):
+                    mark("faculty_index", True)
+                    print("   ✅ Professor DB Ready.")
+                    return
+            rescrape = True
+            mark("faculty_index", False, f"no faculty data yet (attempt {attempt}), retrying in {FACULTY_RETRY_INTERVAL:.0f}s")
+        except Exception as e:
+            mark("faculty_index", False, f"build failed (attempt {attempt}): {e}")
+            print(f"   ⚠️ Faculty warm-up failed: {e}")
+        await asyncio.sleep(FACULTY_RETRY_INTERVAL)
+
+
+async def warm_up_user_store():
+    """Opens the user ChromaDB folder and loads the local models (intent classifier, embedder)."""
+    try:
+        await asyncio.to_thread(get_client, DB_PATH_USER)
+        mark("user_store", True)
+    except Exception as e:
+        mark("user_store", False, f"ChromaDB unavailable: {e}")
+        print(f"   ⚠️ User store warm-up failed: {e}")
+
+    # Best effort: first requests shouldn't pay for training / model loading
+    try:
+        await asyncio.to_thread(get_model)
+        await get_embeddings().aembed_query("warm up")
+        print("   🔥 Intent model and embedder warmed up.")
+    except Exception as e:
+        print(f"   ⚠️ Local model warm-up skipped: {e}")
+
+
+async def warm_up_llm():
+    """Tiny completion against the remote model: checks it is reachable and gets it loaded."""
+    while True:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(get_llm("classifier").ainvoke("Reply with the word: ready"), LLM_CHECK_TIMEOUT)
+            mark("llm", True, f"answered in {time.perf_counter() - start:.1f}s")
+            print(f"   🔥 LLM reachable ({time.perf_counter() - start:.1f}s).")
+            return
+        except Exception as e:
+            detail = "timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+            mark("llm", False, f"unreachable: {detail}")
+            print(f"   ⚠️ LLM check failed ({detail}), retrying in {LLM_RETRY_INTERVAL}s.")
+        await asyncio.sleep(LLM_RETRY_INTERVAL)
+
+
+def start_warmup() -> list:
+    """Starts every warm-up as a background task; the API serves requests meanwhile."""
+    return [
+        asyncio.create_task(warm_up_faculty()),
+        asyncio.create_task(warm_up_user_store()),
+        asyncio.create_task(warm_up_llm()),
+    ]
@@ -0,0 +1,88 @@
+import asyncio
+import copy
+import json
+import os
+import sys
+from collections import OrderedDict
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import src.utils.vector_store as vector_store
+import src.utils.faculty_refresh as faculty_refresh
+from src.utils.scrape_professor import save_professors
+
+PROFESSORS = [
+    {
+        "name": f"教授{i}",
+        "email": f"prof{i}@ncku.edu.tw",
+        "lab": f"第{i}實驗室",
+        "profile_url": f"https://www.csie.ncku.edu.tw/zh-hant/members/{i}",
+        "raw_info": f"教授{i} 教授 第{i}實驗室 research topic number {i}",
+    }
+    for i in range(8)
+]
+
+
+@pytest.fixture
+def faculty_db(tmp_path, monkeypatch):
+    """A throwaway faculty collection (fake embeddings, no tokenizer download) in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(vector_store, "DB_PATH_FACULTY", str(tmp_path / "chroma_db_faculty"))
+    monkeypatch.setattr(vector_store, "_active_dbs", OrderedDict())
+    monkeypatch.setattr(vector_store, "_clients", {})
+    monkeypatch.setattr(vector_store, "_embeddings", DeterministicFakeEmbedding(size=16))
+    monkeypatch.setattr(
+        vector_store, "TokenTextSplitter",
+        lambda chunk_size, chunk_overlap: RecursiveCharacterTextSplitter(chunk_size=chunk_size * 4, chunk_overlap=chunk_overlap * 4),
+    )
+    monkeypatch.setattr(faculty_refresh, "reload_faculty_index", lambda: None)
+    monkeypatch.setattr(faculty_refresh, "invalidate_mode", lambda mode: None)
+
+    save_professors(PROFESSORS)
+    vector_store.index_professors_to_chroma()
+    return vector_store.get_vector_store("faculty")
+
+
+def _refresh_with(monkeypatch, scraped):
+    async def scrape(save=True):
+        return scraped
+    monkeypatch.setattr(faculty_refresh, "scrape_ncku_professors", scrape)
+    return asyncio.run(faculty_refresh.refresh_faculty())
+
+
+def test_renamed_profile_url_keeps_professor_chunks(faculty_db, monkeypatch):
+    before = len(faculty_db.get()["ids"])
+    new = copy.deepcopy(PROFESSORS)
+    new[0]["profile_url"] = "https://www.csie.ncku.edu.tw/zh-hant/members/100"
+    new[1]["profile_url"] = "https://www.csie.ncku.edu.tw/zh-hant/members/101"
+
+    result = _refresh_with(monkeypatch, new)
+
+    assert result["status"] == "updated"
+    assert (result["added"], result["removed"]) == (2, 2)
+    data = faculty_db.get()
+    assert len(data["ids"]) == before
+    urls = {m["name"]: m["profile_url"] for m in data["metadatas"]}
+    assert urls["教授0"].endswith("/members/100")
+    assert urls["教授1"].endswith("/members/101")
+    with open("data/professors.json", encoding="utf-8") as f:
+        assert json.load(f)[0]["profile_url"].endswith("/members/100")
+
+
+def test_changed_and_removed_professors_replace_chunks(faculty_db, monkeypatch):
+    new = copy.deepcopy(PROFESSORS[:-1])
+    new[2]["lab"] = "新實驗室"
+    # A chunk indexed before stable ids: matched by name only
+    faculty_db.add_texts(["legacy chunk"], metadatas=[{"name": "教授2"}], ids=["legacy-0"])
+
+    result = _refresh_with(monkeypatch, new)
+
+    assert (result["changed"], result["removed"]) == (1, 1)
+    data = faculty_db.get()
+    assert "legacy-0" not in data["ids"]
+    assert {m["name"] for m in data["metadatas"]} == {p["name"] for p in new}
+    assert {m["lab"] for m in data["metadatas"] if m["name"] == "教授2"} == {"新實驗室"}
@@ -0,0 +1,65 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.utils.scrape_professor import DEPARTMENT_EMAIL, parse_listing, parse_profile
+
+# Synthetic pages (mimic the NCKU CSIE markup; not saved copies of the site)
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks", "fixtures")
+PROFILE_URL = "https://www.csie.ncku.edu.tw/zh-hant/members/2"
+
+
+def _read(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+@pytest.fixture(scope="module")
+def professors():
+    return parse_listing(_read("synthetic_members.html"))
+
+
+def test_listing_finds_every_card(professors):
+    assert len(professors) == 42
+    assert len({p["name"] for p in professors}) == 42
+
+
+def test_listing_fields(professors):
+    first = professors[0]
+    assert first["name"] == "王士豪"
+    assert first["email"] == "shyhhau@gmail.com"
+    assert first["lab"] == "生醫超音波系統實驗室"
+    assert first["profile_url"] == PROFILE_URL
+    assert "王士豪" in first["raw_info"] and "&nbsp" not in first["raw_info"]
+    assert professors[-1]["email"] == "changrh@ncku.edu.tw"
+    assert all(p["profile_url"].startswith("https://www.csie.ncku.edu.tw/zh-hant/members/") for p in professors)
+
+
+def test_listing_skips_department_office_and_navigation(professors):
+    assert all(p["email"] != DEPARTMENT_EMAIL for p in professors)
+    assert all(not p["profile_url"].endswith("/members/csie") for p in professors)
+    assert all("系所簡介" not in p["name"] and "Faculty" not in p["name"] for p in professors)
+
+
+def test_profile_fields():
+    details = parse_profile(_read("synthetic_profile.html"), PROFILE_URL)
+    assert details["areas"].startswith("生醫超音波")
+    assert details["lab_url"] == "http://bmus.csie.ncku.edu.tw/"
+    assert details["email"] == "shyhhau@gmail.com"
+
+
+def test_profile_areas_after_inline_label():
+    assert parse_profile("<p><strong>研究領域：</strong> AI, ML</p>", PROFILE_URL) == {"areas": "AI, ML"}
+
+
+def test_profile_email_skips_department_office():
+    html = f"<div><p>系辦 {DEPARTMENT_EMAIL}</p><p>Email: prof@ncku.edu.tw</p></div>"
+    assert parse_profile(html, PROFILE_URL)["email"] == "prof@ncku.edu.tw"
+
+    html = f'<div><a href="mailto:{DEPARTMENT_EMAIL}">系辦</a><a href="mailto:prof@ncku.edu.tw">Mail</a></div>'
+    assert parse_profile(html, PROFILE_URL)["email"] == "prof@ncku.edu.tw"
+
+    assert "email" not in parse_profile(f"<p>聯絡系辦: {DEPARTMENT_EMAIL}</p>", PROFILE_URL)